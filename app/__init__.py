@@ -9,8 +9,25 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Optional in-memory SQLite database checkpointed to a snapshot file
+    from app import memorydb
+    memorydb.init_app(app)
+
     db.init_app(app)
 
+    # orjson-backed app.json when installed (JSON_PROVIDER)
+    from app import json_provider
+    json_provider.init_app(app)
+
+    # Bump DataVersion counters on every ORM write (ETags, caches)
+    from app import versioning
+
+    # Keep the visit count rollups (/api/stats/visits) current on every ORM write
+    from app import rollups
+
+    # Log owner/pet/visit changes for the analytics snapshots (/api/analytics)
+    from app import analytics
+
     # Register web routes
     from app.routes import main, owners, vets
     app.register_blueprint(main.bp)
@@ -21,7 +38,36 @@ def create_app(config_class=Config):
     from app.api import api_bp
     app.register_blueprint(api_bp)
 
+    # Opt-in group commit: write views run by one writer thread, committed in batches
+    from app import group_commit
+    group_commit.init_app(app)
+
+    # SQLite pragmas (WAL, mmap, ...) and retry of write views on SQLITE_BUSY
+    from app import sqlite
+    sqlite.init_app(app)
+
+    # Server-Timing header and per-request timing log
+    from app import instrumentation
+    instrumentation.init_app(app)
+
+    # Prometheus /metrics endpoint shared across worker processes
+    from app import metrics
+    metrics.init_app(app)
+
+    # Precompiled Jinja bytecode cache and `flask compile-templates`
+    from app import templating
+    templating.init_app(app)
+
+    # {% cache %} tag for rendered template fragments
+    from app import fragments
+    fragments.init_app(app)
+
+    from app import schema
     with app.app_context():
-        db.create_all()
+        schema.upgrade()
+
+        # GET responses shared by the worker processes through one cache file
+        from app import shared_cache
+        shared_cache.init_app(app)
 
     return app
@@ -0,0 +1,456 @@
+"""
+Columnar in-memory snapshot of owners, pets and visits for ad-hoc analytics.
+
+Each worker keeps the columns analysts group and filter on as NumPy arrays
+(ids, foreign keys, pet types, dates, and owner cities dictionary-encoded
+as int32 codes), and answers /api/analytics queries with vectorized
+filters, np.unique grouping and bincount/ufunc.at aggregation. Derived
+fields (pet age, visit intervals per pet, the owner's city of a pet or
+visit) are computed on first use and kept with the snapshot.
+
+The snapshot is refreshed incrementally. ORM updates and deletes of those
+rows are recorded in `row_changes` (a before_flush listener, in the same
+transaction), and new rows are found by id above the snapshot's highest
+id, which also covers Core bulk inserts. When the 'owners'/'pets'/'visits'
+DataVersions moved, a refresh reads the changes after its marker and
+re-reads only those rows. The log keeps the last ANALYTICS_CHANGELOG_SIZE
+entries; a snapshot that fell further behind is rebuilt from scratch.
+
+NumPy is optional: without it (or with ANALYTICS off) is_available() is
+False and the endpoint answers 501. ANALYTICS defaults to on only where
+NumPy is installed; changes are logged whenever it is on, with or without
+NumPy, so a deployment mixing both kinds of workers can turn it on
+explicitly and keep every snapshot correct.
+"""
+
+import threading
+from datetime import date
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event, func, type_coerce
+
+from app import db, reference_data
+from app.models import DataVersion, Owner, Pet, RowChange, Visit
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see is_available()
+    np = None
+
+TRACKED = (Owner, Pet, Visit)
+VERSIONS = ('owners', 'pets', 'visits')
+# Rows per IN (...) batch when re-reading changed rows
+CHUNK = 500
+
+_lock = threading.Lock()
+
+
+class InvalidAnalyticsQuery(ValueError):
+    """Raised for an unknown dataset, field, operator or aggregate."""
+
+
+def is_available():
+    """True if NumPy is installed and ANALYTICS is on (without the change log, snapshots go stale)."""
+    return np is not None and current_app.config['ANALYTICS']
+
+
+# Snapshot tables: name -> (model, [(column, dtype)]); `id` comes first
+COLUMNS = {
+    'owners': (Owner, [('id', 'int64'), ('city', 'int32')]),
+    'pets': (Pet, [('id', 'int64'), ('owner_id', 'int64'), ('type_id', 'int64'), ('birth_date', 'datetime64[D]')]),
+    'visits': (Visit, [('id', 'int64'), ('pet_id', 'int64'), ('date', 'datetime64[D]')]),
+}
+
+
+class Dictionary:
+    """Append-only string <-> int32 code mapping; None is code -1."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code] if code >= 0 else None
+
+
+class Snapshot:
+    """Immutable set of column arrays; refreshed() returns a new Snapshot."""
+
+    def __init__(self, tables, cities, seq, versions):
+        self.tables = tables          # name -> {column: array}, sorted by id
+        self.cities = cities
+        self.seq = seq                # last row_changes entry applied
+        self.versions = versions
+        self._derived = {}
+        self._derived_lock = threading.RLock()
+
+    def column(self, table, name):
+        return self.tables[table][name]
+
+    def derived(self, key, compute):
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = compute(self)
+            return self._derived[key]
+
+    def nbytes(self):
+        return sum(array.nbytes for columns in self.tables.values() for array in columns.values())
+
+
+def _read_rows(name, where=None):
+    """Read the snapshot columns of `name` rows (optionally filtered), sorted by id."""
+    model, columns = COLUMNS[name]
+    table = model.__table__
+    # Dates are left as stored: NumPy parses ISO strings much faster than it converts date objects
+    query = db.select(*(type_coerce(table.c[column], db.String) if dtype.startswith('datetime') else table.c[column]
+                        for column, dtype in columns)).order_by(table.c.id)
+    if where is not None:
+        query = query.where(where)
+    return db.session.execute(query).all()
+
+
+def _to_arrays(name, rows, cities):
+    _, columns = COLUMNS[name]
+    arrays = {}
+    for index, (column, dtype) in enumerate(columns):
+        values = [row[index] for row in rows]
+        if column == 'city':
+            values = [cities.encode(value) for value in values]
+        elif dtype == 'int64':
+            values = [-1 if value is None else value for value in values]
+        arrays[column] = np.array(values, dtype=dtype)
+    return arrays
+
+
+def _merge(arrays, fresh, removed):
+    """Drop ids in `removed` and upsert the `fresh` rows (both by id); returns new arrays."""
+    ids = arrays['id']
+    keep = ~np.isin(ids, np.concatenate([removed, fresh['id']]))
+    merged = {column: np.concatenate([values[keep], fresh[column]]) for column, values in arrays.items()}
+    order = np.argsort(merged['id'], kind='stable')
+    return {column: values[order] for column, values in merged.items()}
+
+
+def build():
+    """Read a whole new Snapshot."""
+    versions = DataVersion.get_many(VERSIONS)
+    seq = db.session.execute(db.select(func.max(RowChange.seq))).scalar() or 0
+    cities = Dictionary()
+    tables = {name: _to_arrays(name, _read_rows(name), cities) for name in COLUMNS}
+    return Snapshot(tables, cities, seq, versions)
+
+
+def refreshed(snapshot):
+    """`snapshot` with the changes since its marker applied (or rebuilt if it fell behind)."""
+    versions = DataVersion.get_many(VERSIONS)
+    if versions == snapshot.versions:
+        return snapshot
+    changes = db.session.execute(
+        db.select(RowChange.seq, RowChange.table_name, RowChange.row_id)
+        .where(RowChange.seq > snapshot.seq).order_by(RowChange.seq)).all()
+    if changes and changes[0].seq != snapshot.seq + 1:
+        return build()  # the entries we need were pruned
+
+    cities = snapshot.cities
+    tables = dict(snapshot.tables)
+    for name, (model, _) in COLUMNS.items():
+        changed = sorted({row_id for _, table_name, row_id in changes if table_name == name})
+        arrays = tables[name]
+        # New rows get ids above the highest existing one, so above every row
+        # of the snapshot that was not changed since (deleted ids can be reused)
+        unchanged = arrays['id'][~np.isin(arrays['id'], changed)]
+        boundary = int(unchanged[-1]) if len(unchanged) else 0
+        rows = _read_rows(name, model.id > boundary)
+        known = [row_id for row_id in changed if row_id <= boundary]
+        for start in range(0, len(known), CHUNK):
+            rows += _read_rows(name, model.id.in_(known[start:start + CHUNK]))
+        if not rows and not changed:
+            continue
+        rows.sort(key=lambda row: row[0])
+        fresh = _to_arrays(name, rows, cities)
+        removed = np.setdiff1d(np.array(changed, dtype='int64'), fresh['id'])
+        tables[name] = _merge(arrays, fresh, removed)
+    seq = changes[-1].seq if changes else snapshot.seq
+    return Snapshot(tables, cities, seq, versions)
+
+
+def current():
+    """This worker's snapshot, refreshed if owners, pets or visits changed."""
+    state = current_app.extensions.setdefault('analytics', {})
+    with _lock:
+        snapshot = state.get('snapshot')
+        state['snapshot'] = build() if snapshot is None else refreshed(snapshot)
+        return state['snapshot']
+
+
+# Derived columns
+
+def _lookup(ids, keys, values, missing):
+    """values[i] where keys[i] == id, for each id (keys sorted); `missing` elsewhere."""
+    if not len(keys):
+        return np.full(len(ids), missing, dtype=values.dtype)
+    position = np.clip(np.searchsorted(keys, ids), 0, len(keys) - 1)
+    return np.where(keys[position] == ids, values[position], missing)
+
+
+def _pet_city(snapshot):
+    return _lookup(snapshot.column('pets', 'owner_id'), snapshot.column('owners', 'id'),
+                   snapshot.column('owners', 'city'), -1)
+
+
+def _visit_pet_column(values):
+    def compute(snapshot):
+        return _lookup(snapshot.column('visits', 'pet_id'), snapshot.column('pets', 'id'), values(snapshot), -1)
+    return compute
+
+
+def _pet_age(snapshot):
+    """Whole years since birth as of today (NaN without a birth date)."""
+    born = snapshot.column('pets', 'birth_date')
+    days = (np.datetime64(date.today(), 'D') - born).astype('int64').astype('float64')
+    days[np.isnat(born)] = np.nan
+    return np.floor(days / 365.25)
+
+
+def _visit_interval(snapshot):
+    """Days since the previous visit of the same pet (NaN for a pet's first visit)."""
+    pets, dates = snapshot.column('visits', 'pet_id'), snapshot.column('visits', 'date')
+    order = np.lexsort((dates, pets))
+    days = dates[order].astype('float64')
+    interval = np.full(len(order), np.nan)
+    same_pet = pets[order][1:] == pets[order][:-1]
+    interval[1:][same_pet] = np.diff(days)[same_pet]
+    result = np.empty_like(interval)
+    result[order] = interval
+    return result
+
+
+def _as_float(array, missing=None):
+    values = array.astype('float64')
+    if missing is not None:
+        values[array == missing] = np.nan
+    return values
+
+
+def _dates(table, column, unit, offset=0):
+    """Dates truncated to `unit`, as units since 1970 plus `offset` (NaN for none)."""
+    def compute(snapshot):
+        values = snapshot.column(table, column).astype(f'datetime64[{unit}]')
+        result = values.astype('int64').astype('float64') + offset
+        result[np.isnat(values)] = np.nan
+        return result
+    return compute
+
+
+def _parse_month(value):
+    return float(np.datetime64(value, 'M').astype('int64'))
+
+
+def _format_month(value):
+    return str(np.datetime64(int(value), 'M'))
+
+
+def _type(value):
+    return reference_data.pet_types.get(int(value)) if value > 0 else None
+
+
+class Field:
+    """
+    An analytics field: compute(snapshot) returns float64 values (NaN for
+    missing); parse/format convert filter values and group values.
+    City fields hold codes of the snapshot's cities dictionary instead.
+    """
+
+    def __init__(self, compute, parse=float, format=int, bucketable=False, city=False):
+        self.compute = compute
+        self.parse = parse
+        self.format = format
+        self.bucketable = bucketable
+        self.city = city
+
+    def parse_value(self, snapshot, value):
+        if self.city:
+            return float(snapshot.cities.codes.get(value, -2))
+        return self.parse(value)
+
+    def format_value(self, snapshot, value):
+        if self.city:
+            return snapshot.cities.decode(int(value))
+        return self.format(value)
+
+
+def _column(table, column, missing=None):
+    return lambda snapshot: _as_float(snapshot.column(table, column), missing)
+
+
+def _city_field(codes):
+    return Field(lambda snapshot: _as_float(codes(snapshot), -1), city=True)
+
+
+FIELDS = {
+    'owners': {
+        'id': Field(_column('owners', 'id')),
+        'city': _city_field(lambda snapshot: snapshot.column('owners', 'city')),
+    },
+    'pets': {
+        'id': Field(_column('pets', 'id')),
+        'ownerId': Field(_column('pets', 'owner_id', -1)),
+        'type': Field(_column('pets', 'type_id', -1), format=_type),
+        'city': _city_field(lambda snapshot: snapshot.derived('pet.city', _pet_city)),
+        'age': Field(lambda snapshot: snapshot.derived('pet.age', _pet_age), bucketable=True),
+        'birthYear': Field(_dates('pets', 'birth_date', 'Y', 1970), bucketable=True),
+    },
+    'visits': {
+        'id': Field(_column('visits', 'id')),
+        'petId': Field(_column('visits', 'pet_id', -1)),
+        'type': Field(lambda snapshot: _as_float(snapshot.derived(
+            'visit.type', _visit_pet_column(lambda s: s.column('pets', 'type_id'))), -1), format=_type),
+        'city': _city_field(lambda snapshot: snapshot.derived(
+            'visit.city', _visit_pet_column(lambda s: s.derived('pet.city', _pet_city)))),
+        'year': Field(_dates('visits', 'date', 'Y', 1970), bucketable=True),
+        'month': Field(_dates('visits', 'date', 'M'), parse=_parse_month, format=_format_month),
+        'interval': Field(lambda snapshot: snapshot.derived('visit.interval', _visit_interval), bucketable=True),
+    },
+}
+
+OPERATORS = {
+    'eq': 'equal', 'ne': 'not_equal', 'lt': 'less', 'le': 'less_equal', 'gt': 'greater', 'ge': 'greater_equal',
+}
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max')
+
+
+def _field(dataset, name):
+    try:
+        return FIELDS[dataset][name]
+    except KeyError:
+        raise InvalidAnalyticsQuery(f'Unknown field {name!r} for {dataset}')
+
+
+def query(snapshot, dataset, group_by=(), aggregates=('count',), filters=(), bucket=None):
+    """
+    Filter, group and aggregate `dataset` ('owners', 'pets' or 'visits').
+    `filters` are (field, operator, value string) triples, `aggregates` are
+    'count' or 'sum|mean|min|max:field', and `bucket` (a positive integer)
+    groups bucketable numeric fields (age, interval, years) by ranges of
+    that width, each named after its lower bound.
+    Returns a list of dicts, one per group, ordered by the group values.
+    """
+    if dataset not in FIELDS:
+        raise InvalidAnalyticsQuery(f"dataset must be one of {', '.join(FIELDS)}")
+    values = {}
+
+    def field_values(name):
+        if name not in values:
+            values[name] = _field(dataset, name).compute(snapshot)
+        return values[name]
+
+    size = len(snapshot.column(dataset, 'id'))
+    mask = np.ones(size, dtype=bool)
+    for name, operator, value in filters:
+        if operator not in OPERATORS:
+            raise InvalidAnalyticsQuery(f"filter operator must be one of {', '.join(OPERATORS)}")
+        try:
+            parsed = _field(dataset, name).parse_value(snapshot, value)
+        except ValueError:
+            raise InvalidAnalyticsQuery(f'Invalid value {value!r} for {name}')
+        mask &= getattr(np, OPERATORS[operator])(field_values(name), parsed)
+
+    keys = []
+    for name in group_by:
+        key = field_values(name)
+        if bucket and _field(dataset, name).bucketable:
+            key = np.floor(key / bucket) * bucket
+        mask &= ~np.isnan(key)
+        keys.append(key)
+
+    specs = []
+    for spec in aggregates:
+        function, _, name = spec.partition(':')
+        if function not in AGGREGATES or (function == 'count') != (not name):
+            raise InvalidAnalyticsQuery(f'Invalid aggregate {spec!r}')
+        specs.append((spec, function, field_values(name)[mask] if name else None))
+
+    # Group ids: each key's values are factorized separately, then the codes are combined
+    # (much faster than np.unique(axis=0), which sorts the rows as records)
+    uniques, codes = [], []
+    for key in keys:
+        values, code = np.unique(key[mask], return_inverse=True)
+        uniques.append(values)
+        codes.append(code.reshape(-1))
+    if keys:
+        shape = tuple(len(values) for values in uniques)
+        if np.prod(shape, dtype='float64') > np.iinfo('int64').max:
+            raise InvalidAnalyticsQuery('Too many groups')
+        present, inverse = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        groups = np.column_stack([values[index] for values, index in zip(uniques, np.unravel_index(present, shape))])
+    else:
+        groups, inverse = np.empty((1, 0)), np.zeros(int(mask.sum()), dtype='int64')
+    count = np.bincount(inverse, minlength=len(groups))
+
+    results = {}
+    for spec, function, data in specs:
+        if function == 'count':
+            results[spec] = count
+            continue
+        present = ~np.isnan(data)
+        if function in ('sum', 'mean'):
+            total = np.bincount(inverse[present], weights=data[present], minlength=len(groups))
+            if function == 'mean':
+                present_count = np.bincount(inverse[present], minlength=len(groups))
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    total = total / present_count
+            results[spec] = total
+        else:
+            extreme = np.full(len(groups), np.nan)
+            (np.fmin if function == 'min' else np.fmax).at(extreme, inverse[present], data[present])
+            results[spec] = extreme
+
+    rows = []
+    for index, group in enumerate(groups):
+        row = {name: _field(dataset, name).format_value(snapshot, value) for name, value in zip(group_by, group)}
+        for spec, function, _ in specs:
+            value = results[spec][index]
+            if function == 'count':
+                row[spec] = int(value)
+            else:
+                row[spec] = None if np.isnan(value) else float(value)
+        rows.append(row)
+    if any(_field(dataset, name).city for name in group_by):
+        # city codes follow first appearance; order by the names instead
+        def sort_key(index):
+            return [(rows[index][name] is None, rows[index][name] or '') if _field(dataset, name).city else value
+                    for name, value in zip(group_by, groups[index])]
+        rows = [rows[index] for index in sorted(range(len(rows)), key=sort_key)]
+    return rows
+
+
+@event.listens_for(db.session, 'before_flush')
+def log_row_changes(session, flush_context, instances):
+    if not current_app.config['ANALYTICS']:
+        return
+    rows = [{'table_name': obj.__tablename__, 'row_id': obj.id}
+            for obj in set(chain(session.dirty, session.deleted))
+            if isinstance(obj, TRACKED) and obj.id is not None
+            and (obj in session.deleted or session.is_modified(obj))]
+    if not rows:
+        return
+    session.execute(db.insert(RowChange), rows)
+    newest = db.select(func.max(RowChange.seq)).scalar_subquery()
+    session.execute(db.delete(RowChange).where(
+        RowChange.seq <= newest - current_app.config['ANALYTICS_CHANGELOG_SIZE']))
+
+
+def create_row_changes():
+    """Schema revision 4: create the row_changes log."""
+    RowChange.__table__.create(db.session.connection(), checkfirst=True)
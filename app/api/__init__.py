@@ -9,6 +9,7 @@ API Endpoints Overview:
 | GET    | /api/owners                                 | Retrieve all pet owners  |
 | GET    | /api/owners/{ownerId}                       | Get a pet owner by ID    |
 | POST   | /api/owners                                 | Add a new pet owner      |
+| POST   | /api/owners/bulk                            | Add many pet owners      |
 | PUT    | /api/owners/{ownerId}                       | Update an owner's details|
 | DELETE | /api/owners/{ownerId}                       | Delete an owner          |
 | GET    | /api/owners/{ownerId}/pets/{petId}          | Get a pet by ID          |
@@ -18,6 +19,7 @@ API Endpoints Overview:
 | Pets                                                                           |
 | GET    | /api/pets                                   | Retrieve all pets        |
 | GET    | /api/pets/{petId}                           | Get a pet by ID          |
+| POST   | /api/pets/bulk                              | Add many pets            |
 | PUT    | /api/pets/{petId}                           | Update pet details       |
 | DELETE | /api/pets/{petId}                           | Delete a pet             |
 | Vets                                                                           |
@@ -26,6 +28,7 @@ API Endpoints Overview:
 | POST   | /api/vets                                   | Add a new vet            |
 | PUT    | /api/vets/{vetId}                           | Update vet details       |
 | DELETE | /api/vets/{vetId}                           | Delete a vet             |
+| GET    | /api/vets/{vetId}/appointments              | A vet's appointments     |
 | Pet Types                                                                      |
 | GET    | /api/pettypes                               | Retrieve all pet types   |
 | GET    | /api/pettypes/{petTypeId}                   | Get a pet type by ID     |
@@ -42,12 +45,38 @@ API Endpoints Overview:
 | GET    | /api/visits                                 | Retrieve all vet visits  |
 | GET    | /api/visits/{visitId}                       | Get a visit by ID        |
 | POST   | /api/visits                                 | Add a new visit          |
+| POST   | /api/visits/bulk                            | Add many visits          |
 | PUT    | /api/visits/{visitId}                       | Update a visit           |
 | DELETE | /api/visits/{visitId}                       | Delete a visit           |
+| Search                                                                         |
+| GET    | /api/search?q={text}                        | Full-text search         |
+| Stats                                                                          |
+| GET    | /api/stats/visits?groupBy=month,type        | Visit counts             |
+| Appointments                                                                   |
+| GET    | /api/appointments/availability?specialty=X  | First free vet and slot  |
+| POST   | /api/appointments                           | Book an appointment      |
+| GET    | /api/appointments/{appointmentId}           | Get an appointment by ID |
+| DELETE | /api/appointments/{appointmentId}           | Cancel an appointment    |
+| Analytics                                                                      |
+| GET    | /api/analytics/{dataset}?groupBy=city       | Grouped aggregates       |
+
+List endpoints are paginated with keyset cursors: pass `limit` (default
+API_PAGE_SIZE) and the opaque `cursor` taken from the `Link: <...>; rel="next"`
+response header to fetch the following page. List pages are read as Core rows
+and serialized without ORM objects (app/api/rows.py).
+
+Responses can be narrowed with sparse fieldsets and explicit expansion, e.g.
+`/api/owners?include=pets&fields[owner]=id,lastName&fields[pet]=id,name`
+(see app/api/fieldsets.py); only the requested columns are loaded.
+
+GET responses carry a strong ETag; send it back in `If-None-Match` to get a
+304, or in `If-Match` on PUT to have the update rejected (412) if the
+resource changed in the meantime.
 """
 
 from flask import Blueprint
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-from app.api import owners, pets, vets, visits, pettypes, specialties
+from app.api import owners, pets, vets, visits, pettypes, specialties, bulk, search, stats, analytics, \
+    appointments
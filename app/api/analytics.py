@@ -0,0 +1,46 @@
+"""
+Analytics REST API endpoint.
+Answered from the columnar snapshot in app/analytics.py (requires NumPy).
+"""
+
+from flask import request, jsonify
+from app import analytics
+from app.api import api_bp
+from app.api.conditional import versioned
+
+
+def _list(name):
+    return [item.strip() for item in request.args.get(name, '').split(',') if item.strip()]
+
+
+@api_bp.route('/analytics/<dataset>', methods=['GET'])
+@versioned('owners', 'pets', 'visits', 'types', shared=False)
+def analytics_query(dataset):
+    """
+    Filter, group and aggregate owners, pets or visits.
+    Optional query param: groupBy - comma-separated fields (owners: city;
+    pets: city, type, age, birthYear, ownerId; visits: city, type, year, month, interval, petId).
+    Optional query param: agg - comma-separated count, sum:field, mean:field, min:field, max:field (default count).
+    Optional query param: filter - field:op:value, repeatable; op is eq, ne, lt, le, gt or ge.
+    Optional query param: bucket - width of the ranges age, birthYear, year and interval are grouped by.
+    """
+    filters = []
+    for item in request.args.getlist('filter'):
+        parts = item.split(':', 2)
+        if len(parts) != 3:
+            return jsonify({'error': 'filter must be field:op:value'}), 400
+        filters.append(tuple(parts))
+    
+    bucket = request.args.get('bucket', type=int)
+    if request.args.get('bucket') and (bucket is None or bucket < 1):
+        return jsonify({'error': 'bucket must be a positive integer'}), 400
+    
+    if not analytics.is_available():
+        return jsonify({'error': 'Analytics is not available (requires NumPy and ANALYTICS)'}), 501
+    
+    try:
+        result = analytics.query(analytics.current(), dataset, group_by=_list('groupBy'),
+                                 aggregates=_list('agg') or ['count'], filters=filters, bucket=bucket)
+    except analytics.InvalidAnalyticsQuery as error:
+        return jsonify({'error': str(error)}), 400
+    return jsonify(result), 200
@@ -0,0 +1,201 @@
+"""
+Appointments REST API endpoints: booking and vet availability.
+Backed by the per-vet schedules in app/scheduling.py.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app, request, jsonify, url_for
+from sqlalchemy.orm import selectinload
+from app import db, reference_data, scheduling, vets_directory
+from app.models import Appointment, Pet
+from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.schemas import serialize_appointment, parse_datetime
+
+
+class InvalidRequest(ValueError):
+    """A request parameter that does not validate; its message is the API error."""
+
+
+def _duration(minutes):
+    """Validate an appointment length in minutes (default: one slot)."""
+    config = current_app.config
+    slot = config['APPOINTMENT_SLOT_MINUTES']
+    if minutes in (None, ''):
+        minutes = slot
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        raise InvalidRequest('duration must be a number of minutes')
+    # no appointment outlasts the opening hours, whatever APPOINTMENT_MAX_MINUTES says
+    longest = min(config['APPOINTMENT_MAX_MINUTES'], scheduling.opening_hours().length // timedelta(minutes=1))
+    if minutes <= 0 or minutes % slot or minutes > longest:
+        raise InvalidRequest(f"duration must be a multiple of {slot} minutes, at most {longest}")
+    return timedelta(minutes=minutes)
+
+
+def _specialty_id(value):
+    """Resolve a specialty id or name."""
+    if isinstance(value, dict):
+        value = value.get('id', value.get('name'))
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        if reference_data.specialties.get(int(value)):
+            return int(value)
+    elif isinstance(value, str):
+        specialty_id = reference_data.specialties.id_for_name(value)
+        if specialty_id is not None:
+            return specialty_id
+    raise InvalidRequest('Specialty not found')
+
+
+def _candidates(vet_id, specialty):
+    """Vet ids to consider: the given vet, or the vets with the given specialty."""
+    if vet_id is not None:
+        if vet_id not in vets_directory.current().rows:
+            raise InvalidRequest('Vet not found')
+        return [vet_id]
+    return scheduling.vets_with_specialty(_specialty_id(specialty))
+
+
+def _slot(vet_id, start, duration):
+    return {'vetId': vet_id, 'start': start.isoformat(), 'end': (start + duration).isoformat()}
+
+
+@api_bp.route('/appointments/availability', methods=['GET'])
+def availability():
+    """
+    Find the earliest free slot of a vet, or of any vet with a specialty.
+    Query params: vetId, or specialty - specialty id or name.
+    Optional query params: from, to - ISO date-times (default: now, and APPOINTMENT_SEARCH_DAYS later).
+    Optional query param: duration - minutes (default one slot).
+    """
+    now = datetime.now()
+    try:
+        duration = _duration(request.args.get('duration'))
+        start = max(parse_datetime(request.args.get('from')) or now, now)
+        end = parse_datetime(request.args.get('to')) \
+            or start + timedelta(days=current_app.config['APPOINTMENT_SEARCH_DAYS'])
+    except InvalidRequest as error:
+        return jsonify({'error': str(error)}), 400
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO date-times'}), 400
+    if end - start > timedelta(days=current_app.config['APPOINTMENT_SEARCH_DAYS']):
+        return jsonify({'error': f"Search at most {current_app.config['APPOINTMENT_SEARCH_DAYS']} days"}), 400
+    
+    vet_id, specialty = request.args.get('vetId', type=int), request.args.get('specialty')
+    if vet_id is None and not specialty:
+        return jsonify({'error': 'vetId or specialty is required'}), 400
+    try:
+        vet_ids = _candidates(vet_id, specialty)
+    except InvalidRequest as error:
+        return jsonify({'error': str(error)}), 404
+    
+    found = scheduling.first_available(vet_ids, start, end, duration)
+    if found is None:
+        return jsonify({'error': 'No vet is available in that period'}), 404
+    
+    slot, vet_id = found
+    return jsonify(_slot(vet_id, slot, duration)), 200
+
+
+@api_bp.route('/appointments', methods=['POST'])
+def book_appointment():
+    """
+    Book an appointment, and the visit it is for.
+    Body: petId, start (ISO date-time), description, optional duration (minutes),
+    and vetId, or specialty (id or name) to book the first vet of that specialty free at start.
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No input data provided'}), 400
+    
+    # Validate required fields
+    if not data.get('description'):
+        return jsonify({'error': 'description is required'}), 400
+    if not data.get('petId'):
+        return jsonify({'error': 'petId is required'}), 400
+    
+    try:
+        duration = _duration(data.get('duration'))
+        start = parse_datetime(data.get('start'))
+    except InvalidRequest as error:
+        return jsonify({'error': str(error)}), 400
+    except ValueError:
+        return jsonify({'error': 'start must be an ISO date-time'}), 400
+    if start is None:
+        return jsonify({'error': 'start is required'}), 400
+    if start < datetime.now():
+        return jsonify({'error': 'start must not be in the past'}), 400
+    end = start + duration
+    if not scheduling.opening_hours().contains(start, end):
+        return jsonify({'error': 'The appointment must start on a slot and end within opening hours'}), 400
+    
+    if not data.get('vetId') and not data.get('specialty'):
+        return jsonify({'error': 'vetId or specialty is required'}), 400
+    if Pet.query.get(data['petId']) is None:
+        return jsonify({'error': 'Pet not found'}), 404
+    try:
+        vet_ids = _candidates(data.get('vetId'), data.get('specialty'))
+    except InvalidRequest as error:
+        return jsonify({'error': str(error)}), 404
+    
+    found = scheduling.first_available(vet_ids, start, end, duration)
+    appointment = scheduling.book(found[1], data['petId'], start, end, data['description']) if found else None
+    if appointment is None:
+        return jsonify({'error': 'The slot is not available'}), 409
+    
+    response = jsonify(serialize_appointment(appointment))
+    response.status_code = 201
+    response.headers['Location'] = url_for('api.get_appointment', appointment_id=appointment.id)
+    return response
+
+
+@api_bp.route('/appointments/<int:appointment_id>', methods=['GET'])
+@versioned('appointments', 'visits')
+def get_appointment(appointment_id):
+    """Get an appointment by ID."""
+    appointment = Appointment.query.get(appointment_id)
+    if appointment is None:
+        return jsonify({'error': 'Appointment not found'}), 404
+    
+    return jsonify(serialize_appointment(appointment)), 200
+
+
+@api_bp.route('/appointments/<int:appointment_id>', methods=['DELETE'])
+def cancel_appointment(appointment_id):
+    """Cancel an appointment, deleting its visit."""
+    appointment = Appointment.query.get(appointment_id)
+    if appointment is None:
+        return jsonify({'error': 'Appointment not found'}), 404
+    
+    db.session.delete(appointment.visit)
+    db.session.commit()
+    
+    return '', 204
+
+
+@api_bp.route('/vets/<int:vet_id>/appointments', methods=['GET'])
+@versioned('schedule:{vet_id}', 'vets', 'visits', shared=False)
+def list_vet_appointments(vet_id):
+    """
+    List a vet's appointments, ordered by start.
+    Optional query params: from, to - ISO date-times (default: from today on).
+    """
+    if vet_id not in vets_directory.current().rows:
+        return jsonify({'error': 'Vet not found'}), 404
+    
+    try:
+        start = parse_datetime(request.args.get('from')) or datetime.combine(date.today(), time())
+        end = parse_datetime(request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO date-times'}), 400
+    
+    longest = timedelta(minutes=current_app.config['APPOINTMENT_MAX_MINUTES'])
+    query = Appointment.query.options(selectinload(Appointment.visit)).filter(
+        Appointment.vet_id == vet_id, Appointment.starts_at > start - longest, Appointment.ends_at > start)
+    if end is not None:
+        query = query.filter(Appointment.starts_at < end)
+    appointments = query.order_by(Appointment.starts_at).all()
+    return jsonify([serialize_appointment(appointment) for appointment in appointments]), 200
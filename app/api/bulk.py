@@ -0,0 +1,194 @@
+"""
+Bulk create endpoints for owners, pets and visits.
+
+Each endpoint takes a JSON array of records in the same shape as the single
+create endpoint. All records are validated up front, foreign keys are
+resolved with one IN query, and the valid records are inserted with a
+single executemany in one transaction. The response lists one result per
+input record, in input order:
+
+    {"index": 0, "status": 201, "id": 42}
+    {"index": 1, "status": 400, "error": "name is required"}
+
+The response status is 201 when every record was created and 207 otherwise.
+"""
+
+from collections import Counter
+from datetime import date
+
+from flask import current_app, jsonify, request
+from sqlalchemy import func, insert
+
+from app import db, reference_data, rollups
+from app.models import DataVersion, Owner, Pet, Visit, normalize_name
+from app.api import api_bp
+from app.api.schemas import parse_date
+
+
+def _bulk_input():
+    """Return the list of records in the request body, or an error response."""
+    data = request.get_json()
+    if not data or not isinstance(data, list):
+        return None, (jsonify({'error': 'A non-empty JSON array is required'}), 400)
+    limit = current_app.config['API_BULK_MAX_ITEMS']
+    if len(data) > limit:
+        return None, (jsonify({'error': f'At most {limit} records per request'}), 413)
+    return data, None
+
+
+def _insert_all(model, rows):
+    """Insert `rows` with one executemany and return the new ids in order."""
+    if not rows:
+        return []
+    if db.session.get_bind().dialect.name != 'sqlite':
+        # batched INSERT ... RETURNING, the ids in parameter order
+        statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+        return list(db.session.scalars(statement, rows))
+    # SQLite runs that form one row at a time. A plain executemany gives each row
+    # the largest id so far + 1, and the transaction holds the write lock from the
+    # first insert on, so the new ids are the range ending at the largest id.
+    db.session.execute(insert(model), rows)
+    last = db.session.execute(db.select(func.max(model.id))).scalar()
+    return list(range(last - len(rows) + 1, last + 1))
+
+
+def _bulk_response(results, valid, ids):
+    """Merge the ids of the inserted rows into the per-record results."""
+    for index, new_id in zip(valid, ids):
+        results[index] = {'index': index, 'status': 201, 'id': new_id}
+    status = 201 if all(result['status'] == 201 for result in results) else 207
+    return jsonify(results), status
+
+
+def _error(index, message):
+    return {'index': index, 'status': 400, 'error': message}
+
+
+def _type_id(value):
+    """Resolve a pet type given as {'id': ...} or an int, like add_pet_to_owner."""
+    if isinstance(value, dict) and 'id' in value:
+        value = value['id']
+    if isinstance(value, int) and reference_data.pet_types.get(value):
+        return value
+    return None
+
+
+@api_bp.route('/owners/bulk', methods=['POST'])
+def bulk_add_owners():
+    """Add many pet owners in one transaction."""
+    data, error = _bulk_input()
+    if error:
+        return error
+    
+    required_fields = ['firstName', 'lastName', 'address', 'city', 'telephone']
+    results, valid, rows = [], [], []
+    for index, item in enumerate(data):
+        missing = [f for f in required_fields if not isinstance(item, dict) or not item.get(f)]
+        if missing:
+            results.append(_error(index, f'{missing[0]} is required'))
+            continue
+        results.append(None)
+        valid.append(index)
+        rows.append({
+            'first_name': item['firstName'],
+            'last_name': item['lastName'],
+            'last_name_key': normalize_name(item['lastName']),
+            'address': item['address'],
+            'city': item['city'],
+            'telephone': item['telephone'],
+        })
+    
+    ids = _insert_all(Owner, rows)
+    if ids:
+        DataVersion.bump('owners')
+    db.session.commit()
+    
+    return _bulk_response(results, valid, ids)
+
+
+@api_bp.route('/pets/bulk', methods=['POST'])
+def bulk_add_pets():
+    """Add many pets in one transaction. Each record needs an ownerId."""
+    data, error = _bulk_input()
+    if error:
+        return error
+    
+    owner_ids = {item.get('ownerId') for item in data
+                 if isinstance(item, dict) and isinstance(item.get('ownerId'), int)}
+    known_owners = set(db.session.scalars(db.select(Owner.id).where(Owner.id.in_(owner_ids))))
+    
+    results, valid, rows = [], [], []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict) or not item.get('name'):
+            results.append(_error(index, 'name is required'))
+            continue
+        if not isinstance(item.get('ownerId'), int) or item['ownerId'] not in known_owners:
+            results.append(_error(index, 'Owner not found'))
+            continue
+        try:
+            birth_date = parse_date(item.get('birthDate'))
+        except (TypeError, ValueError):
+            results.append(_error(index, 'birthDate must be an ISO date'))
+            continue
+        results.append(None)
+        valid.append(index)
+        rows.append({
+            'name': item['name'],
+            'birth_date': birth_date,
+            'type_id': _type_id(item.get('type')),
+            'owner_id': item['ownerId'],
+        })
+    
+    ids = _insert_all(Pet, rows)
+    if ids:
+        DataVersion.bump('owners', 'pets', *{f"owner:{row['owner_id']}" for row in rows})
+    db.session.commit()
+    
+    return _bulk_response(results, valid, ids)
+
+
+@api_bp.route('/visits/bulk', methods=['POST'])
+def bulk_add_visits():
+    """Add many visits in one transaction. Each record needs a petId."""
+    data, error = _bulk_input()
+    if error:
+        return error
+    
+    pet_ids = {item.get('petId') for item in data
+               if isinstance(item, dict) and isinstance(item.get('petId'), int)}
+    pet_rows = db.session.execute(db.select(Pet.id, Pet.owner_id, Pet.type_id).where(Pet.id.in_(pet_ids))).all()
+    pet_owners = {row.id: row.owner_id for row in pet_rows}
+    pet_types = {row.id: row.type_id or rollups.NO_TYPE for row in pet_rows}
+    
+    results, valid, rows = [], [], []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict) or not item.get('description'):
+            results.append(_error(index, 'description is required'))
+            continue
+        if not item.get('petId'):
+            results.append(_error(index, 'petId is required'))
+            continue
+        if not isinstance(item['petId'], int) or item['petId'] not in pet_owners:
+            results.append(_error(index, 'Pet not found'))
+            continue
+        try:
+            visit_date = parse_date(item.get('date')) or date.today()
+        except (TypeError, ValueError):
+            results.append(_error(index, 'date must be an ISO date'))
+            continue
+        results.append(None)
+        valid.append(index)
+        rows.append({
+            'pet_id': item['petId'],
+            'date': visit_date,
+            'description': item['description'],
+        })
+    
+    ids = _insert_all(Visit, rows)
+    if ids:
+        owners = {f"owner:{pet_owners[row['pet_id']]}" for row in rows if pet_owners[row['pet_id']]}
+        DataVersion.bump('owners', 'pets', 'visits', *owners)
+        rollups.apply(db.session, Counter((row['date'], pet_types[row['pet_id']]) for row in rows))
+    db.session.commit()
+    
+    return _bulk_response(results, valid, ids)
@@ -0,0 +1,69 @@
+"""
+Conditional requests (ETag / If-None-Match / If-Match) for the REST API.
+
+ETags are derived from DataVersion counters, so a matching If-None-Match
+is answered with 304 after a single lookup in data_versions, before any
+entity is loaded or serialized. On PUT, a stale If-Match is rejected with
+412 before the update is applied.
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+from app import shared_cache
+from app.api.fieldsets import field_selection
+from app.models import DataVersion
+
+
+def compute_etag(names):
+    """Return a strong ETag for the current request URL and version counters."""
+    versions = DataVersion.get_many(names)
+    key = request.path + '?' + '&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))
+    key += '|' + ','.join(f'{name}={versions[name]}' for name in names)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def versioned(*names, resource=None, shared=True):
+    """
+    Decorate a view with ETag support.
+    `names` are DataVersion names; they may use view arguments as format
+    fields, e.g. versioned('owner:{owner_id}', 'types').
+    With `resource`, the counters of the relationships the request includes
+    (app.api.fieldsets) are added, e.g. 'pets' and 'types' for
+    /api/visits?include=pet, whose collection counter does not cover them.
+    GET responses are also kept in the cross-worker cache (app.shared_cache)
+    unless `shared` is False, for views whose output depends on more than
+    those counters (e.g. the current date).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            keys = [name.format(**kwargs) for name in names]
+            if resource is not None:
+                keys += sorted(field_selection(resource).versions().difference(keys))
+            etag = compute_etag(keys)
+
+            if request.method in ('GET', 'HEAD'):
+                if request.if_none_match.contains_weak(etag):
+                    response = make_response('', 304)
+                    response.set_etag(etag)
+                    return response
+                cached = shared_cache.lookup(etag) if shared else None
+                if cached is not None:
+                    cached.set_etag(etag)
+                    return cached
+            elif request.if_match and not request.if_match.contains(etag):
+                return jsonify({'error': 'Resource has been modified'}), 412
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                if request.method not in ('GET', 'HEAD'):
+                    etag = compute_etag(keys)
+                elif shared:
+                    shared_cache.store(etag, response)
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
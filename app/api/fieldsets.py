@@ -0,0 +1,176 @@
+"""
+Sparse fieldsets and opt-in expansion for the REST API.
+
+    ?fields[owner]=id,lastName      only these attributes of every owner
+    ?include=pets                   expand these relationships (dotted paths)
+
+Without `include` each endpoint expands its usual relationships, so default
+payloads are unchanged; a fieldset that leaves out a relationship name drops
+that default expansion too. An explicit `include` replaces the defaults.
+The selection also drives app.loaders.with_fields, so narrow requests load
+fewer columns and skip the relationship queries altogether.
+"""
+
+from flask import jsonify, request
+
+from app.api import api_bp
+from app.api.schemas import (
+    OWNER_FIELDS, PET_FIELDS, VISIT_FIELDS, VET_FIELDS, PET_TYPE_FIELDS, SPECIALTY_FIELDS
+)
+
+ATTRIBUTES = {
+    'owner': OWNER_FIELDS,
+    'pet': PET_FIELDS,
+    'visit': VISIT_FIELDS,
+    'vet': VET_FIELDS,
+    'type': PET_TYPE_FIELDS,
+    'specialty': SPECIALTY_FIELDS,
+}
+
+# relationship name -> resource type, per resource type
+RELATIONSHIPS = {
+    'owner': {'pets': 'pet'},
+    'pet': {'visits': 'visit', 'owner': 'owner'},
+    'visit': {'pet': 'pet'},
+    'vet': {'specialties': 'specialty'},
+}
+
+# include paths accepted at the root of each endpoint, and the default ones
+INCLUDABLE = {
+    'owner': ('pets', 'pets.visits'),
+    'pet': ('visits', 'owner'),
+    'visit': ('pet',),
+    'vet': ('specialties',),
+}
+DEFAULT_INCLUDES = {
+    'owner': ('pets', 'pets.visits'),
+    'pet': ('visits',),
+    'vet': ('specialties',),
+}
+
+# DataVersion counters the payload of each resource type is read from (a pet embeds its type)
+VERSIONS = {
+    'owner': ('owners',),
+    'pet': ('pets', 'types'),
+    'visit': ('visits',),
+    'vet': ('vets',),
+    'type': ('types',),
+    'specialty': ('specialties',),
+}
+
+
+class InvalidFieldSelection(ValueError):
+    """Raised when a fields[...] or include query parameter is malformed."""
+
+
+@api_bp.errorhandler(InvalidFieldSelection)
+def handle_invalid_field_selection(error):
+    return jsonify({'error': str(error)}), 400
+
+
+class FieldSelection:
+    """The attributes and relationships to emit for one resource type."""
+
+    def __init__(self, resource, fields, include):
+        self.resource = resource
+        self.fields = fields
+        self.include = frozenset(include)
+
+    @property
+    def narrowed(self):
+        """True when a fieldset limits the attributes of this resource."""
+        return self.fields.get(self.resource) is not None
+
+    def attributes(self):
+        """JSON attribute names to emit, in the default payload order."""
+        table = ATTRIBUTES[self.resource]
+        wanted = self.fields.get(self.resource)
+        return [key for key in table if wanted is None or key in wanted]
+
+    def columns(self):
+        """Model attribute names read by attributes()."""
+        table = ATTRIBUTES[self.resource]
+        return [table[key][0] for key in self.attributes()]
+
+    def includes(self, name):
+        return name in self.include
+
+    def versions(self):
+        """DataVersion names of the resources expanded by the included relationships."""
+        names = set()
+        for path in self.include:
+            resource = self.resource
+            for name in path.split('.'):
+                resource = RELATIONSHIPS[resource][name]
+            names.update(VERSIONS[resource])
+        return names
+
+    def apply(self, data):
+        """Narrow an already serialized (default payload) dict to this selection."""
+        result = {key: data[key] for key in self.attributes()}
+        for name in RELATIONSHIPS.get(self.resource, ()):
+            if self.includes(name) and name in data:
+                nested, value = self.nested(name), data[name]
+                if isinstance(value, list):
+                    result[name] = [nested.apply(item) for item in value]
+                else:
+                    result[name] = nested.apply(value) if value is not None else None
+        return result
+
+    def nested(self, name):
+        """The selection for the resources behind relationship `name`."""
+        prefix = name + '.'
+        return FieldSelection(
+            RELATIONSHIPS[self.resource][name],
+            self.fields,
+            [path[len(prefix):] for path in self.include if path.startswith(prefix)],
+        )
+
+
+def _parse_fields():
+    fields = {}
+    for arg, value in request.args.items():
+        if not (arg.startswith('fields[') and arg.endswith(']')):
+            continue
+        resource = arg[len('fields['):-1]
+        if resource not in ATTRIBUTES:
+            raise InvalidFieldSelection(f'Unknown resource type in {arg}')
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        allowed = set(ATTRIBUTES[resource]) | set(RELATIONSHIPS.get(resource, ()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise InvalidFieldSelection(f'Unknown field(s) in {arg}: {", ".join(unknown)}')
+        fields[resource] = frozenset(names)
+    return fields
+
+
+def _path_allowed(resource, path, fields):
+    """True unless a fieldset along `path` leaves out one of its relationships."""
+    for name in path.split('.'):
+        wanted = fields.get(resource)
+        if wanted is not None and name not in wanted:
+            return False
+        resource = RELATIONSHIPS[resource][name]
+    return True
+
+
+def field_selection(resource):
+    """Parse `fields[...]` and `include` from the request for a `resource` endpoint."""
+    fields = _parse_fields()
+    if 'include' in request.args:
+        include = set()
+        for path in request.args['include'].split(','):
+            path = path.strip()
+            if not path:
+                continue
+            if path not in INCLUDABLE.get(resource, ()):
+                raise InvalidFieldSelection(f'Cannot include {path!r} here')
+            include.add(path)
+            # pets.visits implies pets
+            while '.' in path:
+                path = path.rsplit('.', 1)[0]
+                include.add(path)
+    else:
+        include = {path for path in DEFAULT_INCLUDES.get(resource, ())
+                   if _path_allowed(resource, path, fields)}
+    return FieldSelection(resource, fields, include)
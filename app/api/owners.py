@@ -3,47 +3,71 @@ Owners REST API endpoints.
 Based on Spring Petclinic REST API.
 """
 
-from flask import request, jsonify, url_for
-from app import db
+from functools import partial
+
+from flask import current_app, request, jsonify, url_for
+from app import db, read_model
 from app.models import Owner, Pet, PetType, Visit
 from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.fieldsets import field_selection
+from app.api.pagination import keyset_page, keyset_query, page_response
+from app.api.rows import select_rows, serialize_rows
+from app.api.streaming import wants_stream, stream_response
 from app.api.schemas import (
     serialize_owner, serialize_pet, serialize_visit, parse_date
 )
 
 
 @api_bp.route('/owners', methods=['GET'])
+@versioned('owners', 'types')
 def list_owners():
     """
-    Retrieve all pet owners.
+    Retrieve pet owners, ordered by last name (case-insensitive).
     Optional query param: lastName - filter owners by last name.
+    Optional query params: cursor, limit - keyset pagination.
+    Optional query param: stream - stream the whole collection from cursor on.
+    Optional query params: fields[...], include - sparse fieldsets.
     """
     last_name = request.args.get('lastName')
+    selection = field_selection('owner')
+    
+    keys = (Owner.last_name_key, Owner.id)
+    
+    if wants_stream():
+        query = read_model.select_records('owner')
+        if last_name:
+            query = query.where(Owner.last_name_starts_with(last_name))
+        records = read_model.iterate(keyset_query(query, keys), selection, current_app.config['API_STREAM_BATCH_SIZE'])
+        return stream_response(records, partial(serialize_owner, selection=selection))
     
+    query = select_rows(selection, 'last_name_key')
     if last_name:
-        owners = Owner.query.filter(Owner.last_name.ilike(f'{last_name}%')).all()
-    else:
-        owners = Owner.query.all()
+        query = query.where(Owner.last_name_starts_with(last_name))
+    owners, next_cursor = keyset_page(query, keys)
     
     if not owners:
         return jsonify([]), 200
     
-    return jsonify([serialize_owner(owner) for owner in owners]), 200
+    return page_response(serialize_rows(owners, selection), next_cursor)
 
 
 @api_bp.route('/owners/<int:owner_id>', methods=['GET'])
+@versioned('owner:{owner_id}', 'types')
 def get_owner(owner_id):
     """Get a pet owner by ID."""
-    owner = Owner.query.get(owner_id)
+    selection = field_selection('owner')
+    owner = read_model.first(selection, Owner.id == owner_id)
     if owner is None:
         return jsonify({'error': 'Owner not found'}), 404
     
-    return jsonify(serialize_owner(owner)), 200
+    return jsonify(serialize_owner(owner, selection=selection)), 200
 
 
 @api_bp.route('/owners', methods=['POST'])
 def add_owner():
     """Add a new pet owner."""
+    selection = field_selection('owner')
     data = request.get_json()
     
     if not data:
@@ -66,15 +90,17 @@ def add_owner():
     db.session.add(owner)
     db.session.commit()
     
-    response = jsonify(serialize_owner(owner))
+    response = jsonify(serialize_owner(owner, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_owner', owner_id=owner.id)
     return response
 
 
 @api_bp.route('/owners/<int:owner_id>', methods=['PUT'])
+@versioned('owner:{owner_id}', 'types')
 def update_owner(owner_id):
     """Update an owner's details."""
+    selection = field_selection('owner')
     owner = Owner.query.get(owner_id)
     if owner is None:
         return jsonify({'error': 'Owner not found'}), 404
@@ -97,7 +123,7 @@ def update_owner(owner_id):
     
     db.session.commit()
     
-    return jsonify(serialize_owner(owner)), 200
+    return jsonify(serialize_owner(owner, selection=selection)), 200
 
 
 @api_bp.route('/owners/<int:owner_id>', methods=['DELETE'])
@@ -116,22 +142,25 @@ def delete_owner(owner_id):
 # Owner's pets endpoints
 
 @api_bp.route('/owners/<int:owner_id>/pets/<int:pet_id>', methods=['GET'])
+@versioned('owner:{owner_id}', 'types')
 def get_owners_pet(owner_id, pet_id):
     """Get a pet by ID (owner's pet)."""
     owner = Owner.query.get(owner_id)
     if owner is None:
         return jsonify({'error': 'Owner not found'}), 404
     
-    pet = owner.get_pet(pet_id)
+    selection = field_selection('pet')
+    pet = read_model.first(selection, Pet.id == pet_id, Pet.owner_id == owner.id)
     if pet is None:
         return jsonify({'error': 'Pet not found'}), 404
     
-    return jsonify(serialize_pet(pet)), 200
+    return jsonify(serialize_pet(pet, selection=selection)), 200
 
 
 @api_bp.route('/owners/<int:owner_id>/pets', methods=['POST'])
 def add_pet_to_owner(owner_id):
     """Add a new pet to an owner."""
+    selection = field_selection('pet')
     owner = Owner.query.get(owner_id)
     if owner is None:
         return jsonify({'error': 'Owner not found'}), 404
@@ -162,13 +191,14 @@ def add_pet_to_owner(owner_id):
     db.session.add(pet)
     db.session.commit()
     
-    response = jsonify(serialize_pet(pet))
+    response = jsonify(serialize_pet(pet, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_pet', pet_id=pet.id)
     return response
 
 
 @api_bp.route('/owners/<int:owner_id>/pets/<int:pet_id>', methods=['PUT'])
+@versioned('owner:{owner_id}', 'types')
 def update_owners_pet(owner_id, pet_id):
     """Update pet details (owner's pet)."""
     owner = Owner.query.get(owner_id)
@@ -204,6 +234,7 @@ def update_owners_pet(owner_id, pet_id):
 @api_bp.route('/owners/<int:owner_id>/pets/<int:pet_id>/visits', methods=['POST'])
 def add_visit_to_pet(owner_id, pet_id):
     """Add a vet visit for a pet."""
+    selection = field_selection('visit')
     owner = Owner.query.get(owner_id)
     if owner is None:
         return jsonify({'error': 'Owner not found'}), 404
@@ -229,7 +260,7 @@ def add_visit_to_pet(owner_id, pet_id):
     db.session.add(visit)
     db.session.commit()
     
-    response = jsonify(serialize_visit(visit))
+    response = jsonify(serialize_visit(visit, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_visit', visit_id=visit.id)
     return response
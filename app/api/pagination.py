@@ -0,0 +1,123 @@
+"""
+Keyset (cursor) pagination for the REST list endpoints.
+
+Pages are requested with the opaque `cursor` and `limit` query parameters.
+Instead of OFFSET, each page filters on the sort key of the last row of the
+previous page, so deep pages cost the same as the first one. The URL of the
+next page is returned in a `Link: <...>; rel="next"` response header.
+"""
+
+import base64
+import json
+from bisect import bisect_right
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import Select, tuple_
+
+from app import db
+from app.api import api_bp
+
+
+class InvalidPageRequest(ValueError):
+    """Raised when the cursor or limit query parameter is malformed."""
+
+
+@api_bp.errorhandler(InvalidPageRequest)
+def handle_invalid_page_request(error):
+    return jsonify({'error': str(error)}), 400
+
+
+def encode_cursor(values):
+    """Encode sort key values into an opaque URL-safe cursor."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor produced by encode_cursor into a list of `size` values."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise InvalidPageRequest('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest('Invalid cursor')
+    return values
+
+
+def page_limit():
+    """Return the requested page size, bounded by API_MAX_PAGE_SIZE."""
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be positive')
+    return min(limit, current_app.config['API_MAX_PAGE_SIZE'])
+
+
+def keyset_query(query, keys):
+    """Order `query` by `keys` and skip past the row named by the `cursor` param."""
+    query = query.order_by(*keys)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor, len(keys))
+        if len(keys) == 1:
+            query = query.filter(keys[0] > after[0])
+        else:
+            query = query.filter(tuple_(*keys) > tuple_(*after))
+    return query
+
+
+def keyset_page(query, keys):
+    """
+    Fetch one page of `query` (an ORM query or a Core select) ordered by `keys`.
+    The last key must be unique (normally the primary key).
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    limit = page_limit()
+    query = keyset_query(query, keys).limit(limit + 1)
+    items = db.session.execute(query).all() if isinstance(query, Select) else query.all()
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    return items, encode_cursor([getattr(items[-1], key.key) for key in keys])
+
+
+def list_page(items, ids):
+    """
+    Keyset page over an in-memory list: `ids` are the unique integer sort
+    keys of `items`, in ascending order. Returns (items, next_cursor).
+    """
+    limit = page_limit()
+    start = 0
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor, 1)[0]
+        if not isinstance(after, int):
+            raise InvalidPageRequest('Invalid cursor')
+        start = bisect_right(ids, after)
+    if start + limit >= len(items):
+        return items[start:], None
+    return items[start:start + limit], encode_cursor([ids[start + limit - 1]])
+
+
+def page_response(data, next_cursor):
+    """
+    Build a JSON list response with a `Link` header pointing to the next page.
+    `data` is the list, or its JSON body as bytes.
+    """
+    if isinstance(data, bytes):
+        response = current_app.response_class(data, mimetype=current_app.json.mimetype)
+    else:
+        response = jsonify(data)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        args['limit'] = page_limit()
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response, 200
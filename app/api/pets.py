@@ -3,37 +3,61 @@ Pets REST API endpoints.
 Based on Spring Petclinic REST API.
 """
 
-from flask import request, jsonify, url_for
-from app import db
+from functools import partial
+
+from flask import current_app, request, jsonify, url_for
+from app import db, read_model
 from app.models import Pet, PetType
 from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.pagination import keyset_page, keyset_query, page_response
+from app.api.rows import select_rows, serialize_rows
+from app.api.streaming import wants_stream, stream_response
+from app.api.fieldsets import field_selection
 from app.api.schemas import serialize_pet, parse_date
 
 
 @api_bp.route('/pets', methods=['GET'])
+@versioned('pets', 'types', resource='pet')
 def list_pets():
-    """Retrieve all pets."""
-    pets = Pet.query.all()
+    """
+    Retrieve all pets.
+    Optional query params: cursor, limit - keyset pagination.
+    Optional query param: stream - stream the whole collection from cursor on.
+    Optional query params: fields[...], include - sparse fieldsets.
+    """
+    selection = field_selection('pet')
+    
+    if wants_stream():
+        query = keyset_query(read_model.select_records('pet'), (Pet.id,))
+        records = read_model.iterate(query, selection, current_app.config['API_STREAM_BATCH_SIZE'])
+        return stream_response(records, partial(serialize_pet, selection=selection))
+    
+    pets, next_cursor = keyset_page(select_rows(selection), (Pet.id,))
     
     if not pets:
         return jsonify([]), 200
     
-    return jsonify([serialize_pet(pet) for pet in pets]), 200
+    return page_response(serialize_rows(pets, selection), next_cursor)
 
 
 @api_bp.route('/pets/<int:pet_id>', methods=['GET'])
+@versioned('pets', 'types', resource='pet')
 def get_pet(pet_id):
     """Get a pet by ID."""
-    pet = Pet.query.get(pet_id)
+    selection = field_selection('pet')
+    pet = read_model.first(selection, Pet.id == pet_id)
     if pet is None:
         return jsonify({'error': 'Pet not found'}), 404
     
-    return jsonify(serialize_pet(pet)), 200
+    return jsonify(serialize_pet(pet, selection=selection)), 200
 
 
 @api_bp.route('/pets/<int:pet_id>', methods=['PUT'])
+@versioned('pets', 'types', resource='pet')
 def update_pet(pet_id):
     """Update pet details."""
+    selection = field_selection('pet')
     pet = Pet.query.get(pet_id)
     if pet is None:
         return jsonify({'error': 'Pet not found'}), 404
@@ -57,7 +81,7 @@ def update_pet(pet_id):
     
     db.session.commit()
     
-    return jsonify(serialize_pet(pet)), 200
+    return jsonify(serialize_pet(pet, selection=selection)), 200
 
 
 @api_bp.route('/pets/<int:pet_id>', methods=['DELETE'])
@@ -4,36 +4,49 @@ Based on Spring Petclinic REST API.
 """
 
 from flask import request, jsonify, url_for
-from app import db
+from app import db, reference_data
 from app.models import PetType
 from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.pagination import keyset_page, page_response
+from app.api.rows import select_rows, serialize_rows
+from app.api.fieldsets import field_selection
 from app.api.schemas import serialize_pet_type
 
 
 @api_bp.route('/pettypes', methods=['GET'])
+@versioned('types')
 def list_pet_types():
-    """Retrieve all pet types."""
-    pet_types = PetType.query.all()
+    """
+    Retrieve all pet types.
+    Optional query params: cursor, limit - keyset pagination.
+    Optional query param: fields[type] - sparse fieldset.
+    """
+    selection = field_selection('type')
+    pet_types, next_cursor = keyset_page(select_rows(selection), (PetType.id,))
     
     if not pet_types:
         return jsonify([]), 200
     
-    return jsonify([serialize_pet_type(pt) for pt in pet_types]), 200
+    return page_response(serialize_rows(pet_types, selection), next_cursor)
 
 
 @api_bp.route('/pettypes/<int:pet_type_id>', methods=['GET'])
+@versioned('types')
 def get_pet_type(pet_type_id):
     """Get a pet type by ID."""
+    selection = field_selection('type')
     pet_type = PetType.query.get(pet_type_id)
     if pet_type is None:
         return jsonify({'error': 'Pet type not found'}), 404
     
-    return jsonify(serialize_pet_type(pet_type)), 200
+    return jsonify(serialize_pet_type(pet_type, selection=selection)), 200
 
 
 @api_bp.route('/pettypes', methods=['POST'])
 def add_pet_type():
     """Add a new pet type."""
+    selection = field_selection('type')
     data = request.get_json()
     
     if not data:
@@ -46,17 +59,20 @@ def add_pet_type():
     pet_type = PetType(name=data['name'])
     
     db.session.add(pet_type)
+    reference_data.pet_types.invalidate()
     db.session.commit()
     
-    response = jsonify(serialize_pet_type(pet_type))
+    response = jsonify(serialize_pet_type(pet_type, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_pet_type', pet_type_id=pet_type.id)
     return response
 
 
 @api_bp.route('/pettypes/<int:pet_type_id>', methods=['PUT'])
+@versioned('types')
 def update_pet_type(pet_type_id):
     """Update pet type details."""
+    selection = field_selection('type')
     pet_type = PetType.query.get(pet_type_id)
     if pet_type is None:
         return jsonify({'error': 'Pet type not found'}), 404
@@ -69,9 +85,10 @@ def update_pet_type(pet_type_id):
     if 'name' in data:
         pet_type.name = data['name']
     
+    reference_data.pet_types.invalidate()
     db.session.commit()
     
-    return jsonify(serialize_pet_type(pet_type)), 200
+    return jsonify(serialize_pet_type(pet_type, selection=selection)), 200
 
 
 @api_bp.route('/pettypes/<int:pet_type_id>', methods=['DELETE'])
@@ -82,6 +99,7 @@ def delete_pet_type(pet_type_id):
         return jsonify({'error': 'Pet type not found'}), 404
     
     db.session.delete(pet_type)
+    reference_data.pet_types.invalidate()
     db.session.commit()
     
     return '', 204
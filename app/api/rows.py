@@ -0,0 +1,110 @@
+"""
+ORM-free serializers for the REST list endpoints.
+
+A page is read with a Core SELECT of only the columns its FieldSelection
+(app.api.fieldsets) emits, and each result row is turned into its JSON dict
+by a function compiled once per (resource, attributes) from the *_FIELDS
+tables in app.api.schemas: same keys, same order, same converters as the
+model serializers, but no ORM objects, identity map or attribute
+instrumentation in between. Included relationships are read with one IN
+query per level, like app.loaders does for the ORM path.
+"""
+
+from functools import lru_cache
+
+from app import db
+from app.api.fieldsets import ATTRIBUTES, RELATIONSHIPS
+from app.instrumentation import timed_serializer
+from app.loaders import MODELS, ONE_TO_MANY, RELATIONSHIP_KEYS
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(resource, keys):
+    """
+    Compile `row -> dict` emitting the JSON attributes `keys` of `resource`,
+    reading attribute i from row[i] (the column order of select_rows()).
+    """
+    table = ATTRIBUTES[resource]
+    namespace = {}
+    items = []
+    for index, key in enumerate(keys):
+        convert = table[key][1]
+        value = f'row[{index}]'
+        if convert is not None:
+            namespace[f'convert_{index}'] = convert
+            value = f'convert_{index}({value})'
+        items.append(f'{key!r}: {value}')
+    name = f'serialize_{resource}_row'
+    source = f'def {name}(row):\n    return {{{", ".join(items)}}}\n'
+    exec(compile(source, f'<{name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+def select_rows(selection, *extra_columns):
+    """
+    Core SELECT of the columns serialize_rows() needs for `selection`: the
+    selected attributes first, then the primary key, the foreign keys of
+    included relationships and `extra_columns` (e.g. keyset sort keys).
+    """
+    table = MODELS[selection.resource].__table__
+    names = selection.columns()
+    needed = ['id', *extra_columns]
+    for path in selection.include:
+        needed.extend(RELATIONSHIP_KEYS.get((selection.resource, path.split('.')[0]), ()))
+    names.extend(name for name in dict.fromkeys(needed) if name not in names)
+    return db.select(*(table.c[name] for name in names))
+
+
+def _one_to_many(rows, data, selection, name):
+    nested = selection.nested(name)
+    foreign_key, order_by = ONE_TO_MANY[(selection.resource, name)]
+    column = MODELS[nested.resource].__table__.c[foreign_key]
+    query = select_rows(nested, foreign_key).where(column.in_({row.id for row in rows}))
+    children = db.session.execute(query.order_by(*order_by)).all()
+
+    grouped = {row.id: [] for row in rows}
+    for child, item in zip(children, serialize_rows(children, nested)):
+        grouped[getattr(child, foreign_key)].append(item)
+    for row, item in zip(rows, data):
+        item[name] = grouped[row.id]
+
+
+def _many_to_one(rows, data, selection, name):
+    nested = selection.nested(name)
+    foreign_key, = RELATIONSHIP_KEYS[(selection.resource, name)]
+    ids = {getattr(row, foreign_key) for row in rows} - {None}
+    parents = []
+    if ids:
+        column = MODELS[nested.resource].__table__.c.id
+        parents = db.session.execute(select_rows(nested).where(column.in_(ids))).all()
+
+    by_id = {parent.id: item for parent, item in zip(parents, serialize_rows(parents, nested))}
+    for row, item in zip(rows, data):
+        parent = by_id.get(getattr(row, foreign_key))
+        if parent is not None:
+            item[name] = parent
+
+
+@timed_serializer
+def _attributes(rows, selection):
+    serialize = compile_serializer(selection.resource, tuple(selection.attributes()))
+    return [serialize(row) for row in rows]
+
+
+def serialize_rows(rows, selection):
+    """
+    Serialize rows read with select_rows(selection) to dicts, reading the
+    included relationships (owner pets and pet visits, the pet owner and
+    the visit pet). Vets come from app.vets_directory instead.
+    """
+    data = _attributes(rows, selection)
+    if not data:
+        return data
+    for name in RELATIONSHIPS.get(selection.resource, ()):
+        if not selection.includes(name):
+            continue
+        if (selection.resource, name) in ONE_TO_MANY:
+            _one_to_many(rows, data, selection, name)
+        else:
+            _many_to_one(rows, data, selection, name)
+    return data
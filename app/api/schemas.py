@@ -1,91 +1,167 @@
 """
 JSON serialization schemas for the REST API.
 Provides functions to convert SQLAlchemy models to dictionaries for JSON responses.
+
+Each *_FIELDS table maps a JSON attribute to the model column it is read
+from and an optional converter for its value; app.api.fieldsets uses the
+tables to validate `fields[...]`, app.loaders to load only the columns a
+response will emit and app.api.rows to compile serializers for Core rows.
 """
 
-from datetime import date
+from datetime import date, datetime
+from app import reference_data
+from app.instrumentation import timed_serializer
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+PET_TYPE_FIELDS = {
+    'id': ('id', None),
+    'name': ('name', None),
+}
+
+SPECIALTY_FIELDS = {
+    'id': ('id', None),
+    'name': ('name', None),
+}
+
+VISIT_FIELDS = {
+    'id': ('id', None),
+    'date': ('date', _isoformat),
+    'description': ('description', None),
+    'petId': ('pet_id', None),
+}
+
+PET_FIELDS = {
+    'id': ('id', None),
+    'name': ('name', None),
+    'birthDate': ('birth_date', _isoformat),
+    'type': ('type_id', reference_data.pet_types.get),
+    'ownerId': ('owner_id', None),
+}
+
+OWNER_FIELDS = {
+    'id': ('id', None),
+    'firstName': ('first_name', None),
+    'lastName': ('last_name', None),
+    'address': ('address', None),
+    'city': ('city', None),
+    'telephone': ('telephone', None),
+}
+
+VET_FIELDS = {
+    'id': ('id', None),
+    'firstName': ('first_name', None),
+    'lastName': ('last_name', None),
+}
+
+APPOINTMENT_FIELDS = {
+    'id': ('id', None),
+    'vetId': ('vet_id', None),
+    'visitId': ('visit_id', None),
+    'start': ('starts_at', _isoformat),
+    'end': ('ends_at', _isoformat),
+}
+
 
+def _attributes(obj, table, selection):
+    """Read the attributes of `obj` named by `selection` (all of them if None)."""
+    keys = table if selection is None else selection.attributes()
+    data = {}
+    for key in keys:
+        column, convert = table[key]
+        value = getattr(obj, column)
+        data[key] = value if convert is None else convert(value)
+    return data
+
+
+def _nested(selection, name):
+    return None if selection is None else selection.nested(name)
 
-def serialize_pet_type(pet_type):
+
+@timed_serializer
+def serialize_pet_type(pet_type, selection=None):
     """Serialize a PetType model to dictionary."""
     if pet_type is None:
         return None
-    return {
-        'id': pet_type.id,
-        'name': pet_type.name
-    }
+    return _attributes(pet_type, PET_TYPE_FIELDS, selection)
 
 
-def serialize_specialty(specialty):
+@timed_serializer
+def serialize_specialty(specialty, selection=None):
     """Serialize a Specialty model to dictionary."""
     if specialty is None:
         return None
-    return {
-        'id': specialty.id,
-        'name': specialty.name
-    }
+    return _attributes(specialty, SPECIALTY_FIELDS, selection)
 
 
-def serialize_visit(visit, include_pet=False):
+@timed_serializer
+def serialize_visit(visit, include_pet=False, selection=None):
     """Serialize a Visit model to dictionary."""
     if visit is None:
         return None
-    data = {
-        'id': visit.id,
-        'date': visit.date.isoformat() if visit.date else None,
-        'description': visit.description,
-        'petId': visit.pet_id
-    }
+    if selection is not None:
+        include_pet = selection.includes('pet')
+    data = _attributes(visit, VISIT_FIELDS, selection)
     if include_pet and visit.pet:
-        data['pet'] = serialize_pet(visit.pet, include_visits=False)
+        data['pet'] = serialize_pet(visit.pet, include_visits=False, selection=_nested(selection, 'pet'))
     return data
 
 
-def serialize_pet(pet, include_visits=True, include_owner=False):
+@timed_serializer
+def serialize_pet(pet, include_visits=True, include_owner=False, selection=None):
     """Serialize a Pet model to dictionary."""
     if pet is None:
         return None
-    data = {
-        'id': pet.id,
-        'name': pet.name,
-        'birthDate': pet.birth_date.isoformat() if pet.birth_date else None,
-        'type': serialize_pet_type(pet.type),
-        'ownerId': pet.owner_id
-    }
+    if selection is not None:
+        include_visits = selection.includes('visits')
+        include_owner = selection.includes('owner')
+    data = _attributes(pet, PET_FIELDS, selection)
     if include_visits:
-        data['visits'] = [serialize_visit(v, include_pet=False) for v in pet.visits]
+        visits = _nested(selection, 'visits')
+        data['visits'] = [serialize_visit(v, include_pet=False, selection=visits) for v in pet.visits]
     if include_owner and pet.owner:
-        data['owner'] = serialize_owner(pet.owner, include_pets=False)
+        data['owner'] = serialize_owner(pet.owner, include_pets=False, selection=_nested(selection, 'owner'))
     return data
 
 
-def serialize_owner(owner, include_pets=True):
+@timed_serializer
+def serialize_owner(owner, include_pets=True, selection=None):
     """Serialize an Owner model to dictionary."""
     if owner is None:
         return None
-    data = {
-        'id': owner.id,
-        'firstName': owner.first_name,
-        'lastName': owner.last_name,
-        'address': owner.address,
-        'city': owner.city,
-        'telephone': owner.telephone
-    }
+    if selection is not None:
+        include_pets = selection.includes('pets')
+    data = _attributes(owner, OWNER_FIELDS, selection)
     if include_pets:
-        data['pets'] = [serialize_pet(p, include_visits=True, include_owner=False) for p in owner.pets]
+        pets = _nested(selection, 'pets')
+        data['pets'] = [serialize_pet(p, include_visits=True, include_owner=False, selection=pets)
+                        for p in owner.pets]
     return data
 
 
-def serialize_vet(vet):
+@timed_serializer
+def serialize_vet(vet, selection=None):
     """Serialize a Vet model to dictionary."""
     if vet is None:
         return None
-    return {
-        'id': vet.id,
-        'firstName': vet.first_name,
-        'lastName': vet.last_name,
-        'specialties': [serialize_specialty(s) for s in vet.specialties]
-    }
+    data = _attributes(vet, VET_FIELDS, selection)
+    if selection is None or selection.includes('specialties'):
+        specialties = _nested(selection, 'specialties')
+        data['specialties'] = [serialize_specialty(s, selection=specialties) for s in vet.specialties]
+    return data
+
+
+@timed_serializer
+def serialize_appointment(appointment):
+    """Serialize an Appointment model, with its visit, to dictionary."""
+    if appointment is None:
+        return None
+    data = _attributes(appointment, APPOINTMENT_FIELDS, None)
+    data['visit'] = serialize_visit(appointment.visit)
+    return data
 
 
 def parse_date(date_str):
@@ -95,3 +171,15 @@ def parse_date(date_str):
     if isinstance(date_str, date):
         return date_str
     return date.fromisoformat(date_str)
+
+
+def parse_datetime(value):
+    """Parse an ISO date-time string (local clinic time, without offset) to a datetime."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError('time zone offsets are not supported')
+    return parsed
@@ -0,0 +1,32 @@
+"""
+Full-text search REST API endpoint.
+Backed by the SQLite FTS5 index maintained in app/search.py.
+"""
+
+from flask import request, jsonify
+from app import search as search_index
+from app.api import api_bp
+
+
+@api_bp.route('/search', methods=['GET'])
+def search():
+    """
+    Search owners, pets and visit descriptions, best matches first.
+    Query params: q - search text (required);
+    kind - restrict to owner, pet or visit; limit - max results (default 20).
+    """
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'q is required'}), 400
+    
+    kind = request.args.get('kind')
+    if kind and kind not in search_index.KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(search_index.KINDS)}"}), 400
+    
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, 100))
+    
+    if not search_index.is_available():
+        return jsonify({'error': 'Full-text search is not available on this database'}), 501
+    
+    return jsonify(search_index.search(text, kind=kind, limit=limit)), 200
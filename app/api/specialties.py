@@ -4,36 +4,49 @@ Based on Spring Petclinic REST API.
 """
 
 from flask import request, jsonify, url_for
-from app import db
+from app import db, reference_data
 from app.models import Specialty
 from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.pagination import keyset_page, page_response
+from app.api.rows import select_rows, serialize_rows
+from app.api.fieldsets import field_selection
 from app.api.schemas import serialize_specialty
 
 
 @api_bp.route('/specialties', methods=['GET'])
+@versioned('specialties')
 def list_specialties():
-    """Retrieve all vet specialties."""
-    specialties = Specialty.query.all()
+    """
+    Retrieve all vet specialties.
+    Optional query params: cursor, limit - keyset pagination.
+    Optional query param: fields[specialty] - sparse fieldset.
+    """
+    selection = field_selection('specialty')
+    specialties, next_cursor = keyset_page(select_rows(selection), (Specialty.id,))
     
     if not specialties:
         return jsonify([]), 200
     
-    return jsonify([serialize_specialty(s) for s in specialties]), 200
+    return page_response(serialize_rows(specialties, selection), next_cursor)
 
 
 @api_bp.route('/specialties/<int:specialty_id>', methods=['GET'])
+@versioned('specialties')
 def get_specialty(specialty_id):
     """Get a specialty by ID."""
+    selection = field_selection('specialty')
     specialty = Specialty.query.get(specialty_id)
     if specialty is None:
         return jsonify({'error': 'Specialty not found'}), 404
     
-    return jsonify(serialize_specialty(specialty)), 200
+    return jsonify(serialize_specialty(specialty, selection=selection)), 200
 
 
 @api_bp.route('/specialties', methods=['POST'])
 def add_specialty():
     """Add a new specialty."""
+    selection = field_selection('specialty')
     data = request.get_json()
     
     if not data:
@@ -46,17 +59,20 @@ def add_specialty():
     specialty = Specialty(name=data['name'])
     
     db.session.add(specialty)
+    reference_data.specialties.invalidate()
     db.session.commit()
     
-    response = jsonify(serialize_specialty(specialty))
+    response = jsonify(serialize_specialty(specialty, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_specialty', specialty_id=specialty.id)
     return response
 
 
 @api_bp.route('/specialties/<int:specialty_id>', methods=['PUT'])
+@versioned('specialties')
 def update_specialty(specialty_id):
     """Update specialty details."""
+    selection = field_selection('specialty')
     specialty = Specialty.query.get(specialty_id)
     if specialty is None:
         return jsonify({'error': 'Specialty not found'}), 404
@@ -69,9 +85,10 @@ def update_specialty(specialty_id):
     if 'name' in data:
         specialty.name = data['name']
     
+    reference_data.specialties.invalidate()
     db.session.commit()
     
-    return jsonify(serialize_specialty(specialty)), 200
+    return jsonify(serialize_specialty(specialty, selection=selection)), 200
 
 
 @api_bp.route('/specialties/<int:specialty_id>', methods=['DELETE'])
@@ -82,6 +99,7 @@ def delete_specialty(specialty_id):
         return jsonify({'error': 'Specialty not found'}), 404
     
     db.session.delete(specialty)
+    reference_data.specialties.invalidate()
     db.session.commit()
     
     return '', 204
@@ -0,0 +1,66 @@
+"""
+Visit statistics REST API endpoint.
+Served from the visit_counts rollup maintained in app/rollups.py.
+"""
+
+from flask import request, jsonify
+from sqlalchemy import extract, func
+
+from app import db, reference_data
+from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.schemas import parse_date
+from app.models import VisitCount
+from app.rollups import NO_TYPE
+
+# groupBy name -> (rollup columns to group on, formatter of their values)
+GROUPS = {
+    'year': ((extract('year', VisitCount.day),), lambda year: f'{year:04d}'),
+    'month': ((extract('year', VisitCount.day), extract('month', VisitCount.day)),
+              lambda year, month: f'{year:04d}-{month:02d}'),
+    'day': ((VisitCount.day,), lambda day: day.isoformat()),
+    'type': ((VisitCount.type_id,),
+             lambda type_id: reference_data.pet_types.get(type_id) if type_id != NO_TYPE else None),
+}
+
+
+@api_bp.route('/stats/visits', methods=['GET'])
+@versioned('visits', 'pets', 'types')
+def visit_stats():
+    """
+    Count visits, grouped and filtered.
+    Optional query param: groupBy - comma-separated year, month, day and/or type (default month).
+    Optional query params: from, to - ISO dates, inclusive.
+    Optional query param: type - pet type id.
+    """
+    group_by = [name.strip() for name in request.args.get('groupBy', 'month').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in GROUPS]
+    if unknown:
+        return jsonify({'error': f"groupBy must be among {', '.join(GROUPS)}"}), 400
+    
+    try:
+        start, end = parse_date(request.args.get('from')), parse_date(request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO dates'}), 400
+    
+    columns = [column for name in group_by for column in GROUPS[name][0]]
+    query = db.select(*columns, func.sum(VisitCount.count)).group_by(*columns).order_by(*columns)
+    if start:
+        query = query.where(VisitCount.day >= start)
+    if end:
+        query = query.where(VisitCount.day <= end)
+    if request.args.get('type'):
+        type_id = request.args.get('type', type=int)
+        if type_id is None:
+            return jsonify({'error': 'type must be a pet type id'}), 400
+        query = query.where(VisitCount.type_id == type_id)
+    
+    result = []
+    for row in db.session.execute(query):
+        item, values = {}, iter(row)
+        for name in group_by:
+            columns, format_value = GROUPS[name]
+            item[name] = format_value(*(next(values) for _ in columns))
+        item['visits'] = next(values) or 0
+        result.append(item)
+    return jsonify(result), 200
@@ -0,0 +1,38 @@
+"""
+Streaming JSON responses for large REST collections.
+
+With `?stream=true` a list endpoint reads its rows in batches (see
+app.read_model.iterate) and writes the JSON array incrementally, so memory
+use and time-to-first-byte do not grow with the size of the table. Items are
+encoded with the application's JSON provider in its compact form, so the
+body is identical to what `jsonify` produces for the same list outside of
+debug mode.
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+
+def wants_stream():
+    """Return True if the client asked for a streamed response."""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_response(items, serialize):
+    """Stream the iterable `items` as a JSON array, serializing each one with `serialize`."""
+    batch_size = current_app.config['API_STREAM_BATCH_SIZE']
+    dumps = current_app.json.dumps
+
+    def generate():
+        chunk = ['[']
+        separator = ''
+        for count, item in enumerate(items, 1):
+            chunk.append(separator)
+            chunk.append(dumps(serialize(item), separators=(',', ':')))
+            separator = ','
+            if count % batch_size == 0:
+                yield ''.join(chunk)
+                chunk = []
+        chunk.append(']\n')
+        yield ''.join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
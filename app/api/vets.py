@@ -4,36 +4,80 @@ Based on Spring Petclinic REST API.
 """
 
 from flask import request, jsonify, url_for
-from app import db
+from app import db, reference_data, vets_directory
 from app.models import Vet, Specialty
 from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.pagination import list_page, page_response
+from app.api.fieldsets import field_selection
 from app.api.schemas import serialize_vet
+from app.loaders import with_fields
+
+
+def resolve_specialties(specialties_data):
+    """
+    Resolve a list of {'id': ...} or {'name': ...} dicts to Specialty rows.
+    Ids and names are checked against the reference data cache, and the
+    matching rows are fetched with a single IN query. Unknown entries are skipped.
+    """
+    specialty_ids = []
+    for spec_data in specialties_data:
+        specialty_id = None
+        if isinstance(spec_data, dict) and 'id' in spec_data:
+            if reference_data.specialties.get(spec_data['id']):
+                specialty_id = spec_data['id']
+        elif isinstance(spec_data, dict) and 'name' in spec_data:
+            specialty_id = reference_data.specialties.id_for_name(spec_data['name'])
+        if specialty_id is not None and specialty_id not in specialty_ids:
+            specialty_ids.append(specialty_id)
+    
+    if not specialty_ids:
+        return []
+    
+    by_id = {s.id: s for s in Specialty.query.filter(Specialty.id.in_(specialty_ids))}
+    return [by_id[i] for i in specialty_ids if i in by_id]
 
 
 @api_bp.route('/vets', methods=['GET'])
+@versioned('vets')
 def list_vets():
-    """Retrieve all veterinarians."""
-    vets = Vet.query.all()
+    """
+    Retrieve all veterinarians, from the precomputed vets directory.
+    Optional query params: cursor, limit - keyset pagination.
+    Optional query params: fields[...], include - sparse fieldsets.
+    """
+    selection = field_selection('vet')
+    directory = vets_directory.current()
+    
+    # Default payload: join the vets serialized when the directory was built
+    if not selection.fields and 'include' not in request.args:
+        items, next_cursor = list_page(directory.items, directory.ids)
+        return page_response(b'[' + b','.join(items) + b']\n', next_cursor)
+    
+    vets, next_cursor = list_page(directory.data, directory.ids)
     
     if not vets:
         return jsonify([]), 200
     
-    return jsonify([serialize_vet(vet) for vet in vets]), 200
+    return page_response([selection.apply(vet) for vet in vets], next_cursor)
 
 
 @api_bp.route('/vets/<int:vet_id>', methods=['GET'])
+@versioned('vets')
 def get_vet(vet_id):
     """Get a vet by ID."""
-    vet = Vet.query.get(vet_id)
+    selection = field_selection('vet')
+    vet = with_fields(Vet.query, selection).filter_by(id=vet_id).first()
     if vet is None:
         return jsonify({'error': 'Vet not found'}), 404
     
-    return jsonify(serialize_vet(vet)), 200
+    return jsonify(serialize_vet(vet, selection=selection)), 200
 
 
 @api_bp.route('/vets', methods=['POST'])
 def add_vet():
     """Add a new vet."""
+    selection = field_selection('vet')
     data = request.get_json()
     
     if not data:
@@ -52,28 +96,22 @@ def add_vet():
     
     # Handle specialties
     if 'specialties' in data and data['specialties']:
-        for spec_data in data['specialties']:
-            if isinstance(spec_data, dict) and 'id' in spec_data:
-                specialty = Specialty.query.get(spec_data['id'])
-                if specialty:
-                    vet.specialties.append(specialty)
-            elif isinstance(spec_data, dict) and 'name' in spec_data:
-                specialty = Specialty.query.filter_by(name=spec_data['name']).first()
-                if specialty:
-                    vet.specialties.append(specialty)
+        vet.specialties = resolve_specialties(data['specialties'])
     
     db.session.add(vet)
     db.session.commit()
     
-    response = jsonify(serialize_vet(vet))
+    response = jsonify(serialize_vet(vet, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_vet', vet_id=vet.id)
     return response
 
 
 @api_bp.route('/vets/<int:vet_id>', methods=['PUT'])
+@versioned('vets')
 def update_vet(vet_id):
     """Update vet details."""
+    selection = field_selection('vet')
     vet = Vet.query.get(vet_id)
     if vet is None:
         return jsonify({'error': 'Vet not found'}), 404
@@ -90,21 +128,11 @@ def update_vet(vet_id):
     
     # Handle specialties
     if 'specialties' in data:
-        vet.specialties = []
-        if data['specialties']:
-            for spec_data in data['specialties']:
-                if isinstance(spec_data, dict) and 'id' in spec_data:
-                    specialty = Specialty.query.get(spec_data['id'])
-                    if specialty:
-                        vet.specialties.append(specialty)
-                elif isinstance(spec_data, dict) and 'name' in spec_data:
-                    specialty = Specialty.query.filter_by(name=spec_data['name']).first()
-                    if specialty:
-                        vet.specialties.append(specialty)
+        vet.specialties = resolve_specialties(data['specialties'] or [])
     
     db.session.commit()
     
-    return jsonify(serialize_vet(vet)), 200
+    return jsonify(serialize_vet(vet, selection=selection)), 200
 
 
 @api_bp.route('/vets/<int:vet_id>', methods=['DELETE'])
@@ -3,37 +3,60 @@ Visits REST API endpoints.
 Based on Spring Petclinic REST API.
 """
 
-from flask import request, jsonify, url_for
-from app import db
+from functools import partial
+
+from flask import current_app, request, jsonify, url_for
+from app import db, read_model
 from app.models import Visit, Pet
 from app.api import api_bp
+from app.api.conditional import versioned
+from app.api.pagination import keyset_page, keyset_query, page_response
+from app.api.rows import select_rows, serialize_rows
+from app.api.streaming import wants_stream, stream_response
+from app.api.fieldsets import field_selection
 from app.api.schemas import serialize_visit, parse_date
 
 
 @api_bp.route('/visits', methods=['GET'])
+@versioned('visits', resource='visit')
 def list_visits():
-    """Retrieve all vet visits."""
-    visits = Visit.query.all()
+    """
+    Retrieve all vet visits.
+    Optional query params: cursor, limit - keyset pagination.
+    Optional query param: stream - stream the whole collection from cursor on.
+    Optional query params: fields[...], include - sparse fieldsets.
+    """
+    selection = field_selection('visit')
+    
+    if wants_stream():
+        query = keyset_query(read_model.select_records('visit'), (Visit.id,))
+        records = read_model.iterate(query, selection, current_app.config['API_STREAM_BATCH_SIZE'])
+        return stream_response(records, partial(serialize_visit, selection=selection))
+    
+    visits, next_cursor = keyset_page(select_rows(selection), (Visit.id,))
     
     if not visits:
         return jsonify([]), 200
     
-    return jsonify([serialize_visit(visit) for visit in visits]), 200
+    return page_response(serialize_rows(visits, selection), next_cursor)
 
 
 @api_bp.route('/visits/<int:visit_id>', methods=['GET'])
+@versioned('visits', resource='visit')
 def get_visit(visit_id):
     """Get a visit by ID."""
-    visit = Visit.query.get(visit_id)
+    selection = field_selection('visit')
+    visit = read_model.first(selection, Visit.id == visit_id)
     if visit is None:
         return jsonify({'error': 'Visit not found'}), 404
     
-    return jsonify(serialize_visit(visit)), 200
+    return jsonify(serialize_visit(visit, selection=selection)), 200
 
 
 @api_bp.route('/visits', methods=['POST'])
 def add_visit():
     """Add a new visit."""
+    selection = field_selection('visit')
     data = request.get_json()
     
     if not data:
@@ -59,15 +82,17 @@ def add_visit():
     db.session.add(visit)
     db.session.commit()
     
-    response = jsonify(serialize_visit(visit))
+    response = jsonify(serialize_visit(visit, selection=selection))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_visit', visit_id=visit.id)
     return response
 
 
 @api_bp.route('/visits/<int:visit_id>', methods=['PUT'])
+@versioned('visits', resource='visit')
 def update_visit(visit_id):
-    """Update a visit."""
+    """Update a visit. The date of a visit booked as an appointment follows the appointment."""
+    selection = field_selection('visit')
     visit = Visit.query.get(visit_id)
     if visit is None:
         return jsonify({'error': 'Visit not found'}), 404
@@ -78,7 +103,10 @@ def update_visit(visit_id):
     
     # Update fields if provided
     if 'date' in data:
-        visit.date = parse_date(data['date'])
+        visit_date = parse_date(data['date'])
+        if visit.appointment is not None and visit_date != visit.date:
+            return jsonify({'error': 'The visit has an appointment; cancel and book it again to change its date'}), 409
+        visit.date = visit_date
     if 'description' in data:
         visit.description = data['description']
     if 'petId' in data:
@@ -86,7 +114,7 @@ def update_visit(visit_id):
     
     db.session.commit()
     
-    return jsonify(serialize_visit(visit)), 200
+    return jsonify(serialize_visit(visit, selection=selection)), 200
 
 
 @api_bp.route('/visits/<int:visit_id>', methods=['DELETE'])
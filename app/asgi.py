@@ -0,0 +1,63 @@
+"""
+ASGI serving mode for the application.
+
+The Flask app is served through a2wsgi's WSGIMiddleware. The middleware
+runs the views on a bounded thread pool (ASGI_THREADS) and passes their
+output to the event loop through a queue, so a thread is not held while a
+slow client reads the response. ASGIAdapter reads the request body
+completely on the event loop before the middleware takes a thread.
+Connection I/O with slow or idle keep-alive clients therefore costs a
+coroutine, and a thread is only held while a view runs.
+
+The views stay synchronous and keep the same models, serializers and
+SQLAlchemy session. Async views would not free any more threads: Flask
+runs an async view on the thread of its request, and SQLite has no
+asynchronous I/O (aiosqlite runs sqlite3 on a thread of its own).
+"""
+
+from a2wsgi import WSGIMiddleware
+
+
+class ASGIAdapter:
+    """Serve a WSGI (Flask) application as an ASGI 3 application."""
+
+    def __init__(self, wsgi_app, threads=None, max_body=None):
+        config = getattr(wsgi_app, 'config', {})
+        self.threads = threads or config.get('ASGI_THREADS', 16)
+        self.max_body = max_body or config.get('MAX_CONTENT_LENGTH')
+        self.middleware = WSGIMiddleware(wsgi_app, workers=self.threads)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            receive = await self.read_body(receive, send)
+            if receive is not None:
+                await self.middleware(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.middleware(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def read_body(self, receive, send):
+        """
+        Read the whole request body, and return a `receive` that replays it.
+        Returns None if the client disconnected or the body is too large (413 sent).
+        """
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body += message.get('body', b'')
+            if self.max_body is not None and len(body) > self.max_body:
+                await send({'type': 'http.response.start', 'status': 413,
+                            'headers': [(b'content-type', b'text/plain')]})
+                await send({'type': 'http.response.body', 'body': b'Request Entity Too Large'})
+                return None
+            if not message.get('more_body', False):
+                break
+
+        pending = [{'type': 'http.request', 'body': bytes(body), 'more_body': False}]
+
+        async def replay():
+            return pending.pop() if pending else await receive()
+        return replay
@@ -0,0 +1,115 @@
+"""
+Rendered-fragment cache for the Jinja templates.
+
+    {% cache 'owner-details', owner_id, versions('owner:' ~ owner_id, 'types') %}
+        ... expensive markup ...
+    {% endcache %}
+
+The tag's arguments form the cache key. Including DataVersion counters
+(through the `versions()` template global, one data_versions lookup per
+request) makes every ORM write invalidate the affected fragments: the
+before_flush listener in app.versioning bumps the counters for writes from
+the web routes and the REST handlers alike, so later renders use a new key
+and stale entries simply age out of the LRU (FRAGMENT_CACHE_SIZE entries
+per process).
+
+Views pass the objects a fragment renders through `deferred()`, which
+loads them on first use only; when the fragment is cached they are never
+touched, so a hot page is served without loading anything through the ORM.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from flask import current_app, g
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from werkzeug.local import LocalProxy
+
+from app.models import DataVersion
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments."""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def fragment_cache():
+    return current_app.extensions['fragment_cache']
+
+
+def versions(*names):
+    """DataVersion counters for `names`, fetched at most once per request."""
+    known = g.setdefault('fragment_versions', {})
+    missing = [name for name in names if name not in known]
+    if missing:
+        known.update(DataVersion.get_many(missing))
+    return tuple(known[name] for name in names)
+
+
+def is_cached(*key):
+    """True if the fragment for `key` (the {% cache %} tag's arguments) is cached."""
+    return fragment_cache().get(key) is not None
+
+
+def deferred(loader):
+    """A proxy for `loader()`'s result, loaded on first use and then kept."""
+    return LocalProxy(lru_cache(maxsize=None)(loader))
+
+
+class FragmentCacheExtension(Extension):
+    """The {% cache key, ... %}...{% endcache %} tag."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.globals['versions'] = versions
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.Tuple(key, 'load')]), [], [], body) \
+            .set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = fragment_cache()
+        html = cache.get(key)
+        if html is None:
+            html = str(caller())
+            cache.set(key, html)
+        return Markup(html)
+
+
+def init_app(app):
+    """Install the {% cache %} tag and the per-process fragment store."""
+    app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
+    extensions = [*app.jinja_options.get('extensions', ()), FragmentCacheExtension]
+    app.jinja_options = {**app.jinja_options, 'extensions': extensions}
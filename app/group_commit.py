@@ -0,0 +1,177 @@
+"""
+Opt-in group commit for write requests on SQLite (GROUP_COMMIT=1).
+
+SQLite serializes commits, and each one pays for its own sync. With group
+commit, every view that accepts POST/PUT/PATCH/DELETE is executed, for
+write requests, by one writer thread per process instead of the request
+thread. The writer opens a transaction (BEGIN IMMEDIATE), runs the queued
+views one after the other, keeps taking requests that arrive within
+GROUP_COMMIT_WINDOW_MS (up to GROUP_COMMIT_MAX_BATCH), then commits them
+all at once.
+
+Each view runs in its own session, bound to the writer's connection and
+scoped to a SAVEPOINT. `db.session.commit()` in the view releases the
+savepoint, and a view that fails or never commits is rolled back to it,
+so a request's outcome (its response, or its exception re-raised in the
+request thread) is independent of its neighbours. Views run in the
+request's context (request, g, session cookie), so they need no changes.
+
+Durability: a request gets its response only after the COMMIT of its
+batch. If that COMMIT fails, every request of the batch fails with the
+error and none of their changes are applied. Otherwise the guarantees are
+the same as for one transaction per request under SQLITE_PRAGMAS:
+committed batches survive an application crash, and with
+synchronous=NORMAL an OS crash or power loss may lose the last ones.
+Requests within a batch see the changes of the requests before them.
+The price is latency: a write waits for its batch, up to the window plus
+the time of the views before it.
+
+Nothing is changed when the configured database is not SQLite.
+"""
+
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial, wraps
+
+from flask import request
+
+from app import db
+from app.sqlite import WRITE_METHODS
+
+
+class GroupCommitWriter:
+    """Writer thread running queued write views in shared transactions."""
+
+    def __init__(self, engine, window, max_batch):
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+        factory = db.session.session_factory
+
+        class WriterSession(factory.class_):
+            # Flask-SQLAlchemy picks the engine per mapper; use the writer's connection instead
+            def get_bind(self, *args, **kwargs):
+                return self.bind
+
+        self._session_class = WriterSession
+        self._session_kw = dict(factory.kw, join_transaction_mode='create_savepoint')
+        self._session_kw.pop('bind', None)
+
+    def submit(self, func):
+        """Run `func()` in the next batch and return its result once the batch is committed."""
+        if self._pid != os.getpid():
+            self._start()
+        future = Future()
+        self._queue.put((contextvars.copy_context(), func, future))
+        return future.result()
+
+    def _start(self):
+        with self._lock:
+            if self._pid != os.getpid():  # first use, or first use after a fork
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._run, name='group-commit', daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            self._run_batch(self._queue.get())
+
+    def _next(self, count, deadline):
+        """The next queued job for the current batch, or None to commit it."""
+        if count >= self.max_batch:
+            return None
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            return None
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run_batch(self, job):
+        jobs, outcomes = [job], []
+        try:
+            with self.engine.connect() as connection:
+                with connection.begin():
+                    # take the write lock up front, so the views never hit SQLITE_BUSY
+                    connection.exec_driver_sql('BEGIN IMMEDIATE')
+                    deadline = time.monotonic() + self.window
+                    while job is not None:
+                        outcomes.append(self._execute(connection, *job[:2]))
+                        job = self._next(len(outcomes), deadline)
+                        if job is not None:
+                            jobs.append(job)
+        except Exception as error:
+            for _, _, future in jobs:
+                future.set_exception(error)
+            return
+
+        for (_, _, future), (result, error) in zip(jobs, outcomes):
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _execute(self, connection, context, func):
+        """Run `func` in the request `context` with a session on `connection`; return (result, error)."""
+        session = self._session_class(bind=connection, **self._session_kw)
+
+        def call():
+            registry = db.session.registry
+            previous = registry() if registry.has() else None
+            registry.set(session)
+            try:
+                return func()
+            finally:
+                session.close()
+                if previous is None:
+                    registry.clear()
+                else:
+                    registry.set(previous)
+
+        try:
+            return context.run(call), None
+        except Exception as error:
+            return None, error
+
+
+def group_commit(view, writer):
+    """Hand write requests to `view` over to `writer`."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in WRITE_METHODS:
+            return view(*args, **kwargs)
+        return writer.submit(partial(view, *args, **kwargs))
+    wrapper.group_commit = True
+    return wrapper
+
+
+def init_app(app):
+    """Route the write views of `app` through a GroupCommitWriter when GROUP_COMMIT is set."""
+    if not app.config.get('GROUP_COMMIT'):
+        return
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    writer = GroupCommitWriter(engine, app.config['GROUP_COMMIT_WINDOW_MS'] / 1000,
+                               app.config['GROUP_COMMIT_MAX_BATCH'])
+    app.extensions['group_commit'] = writer
+    for rule in app.url_map.iter_rules():
+        if rule.methods & WRITE_METHODS:
+            view = app.view_functions[rule.endpoint]
+            if not getattr(view, 'group_commit', False):
+                app.view_functions[rule.endpoint] = group_commit(view, writer)
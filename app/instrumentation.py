@@ -0,0 +1,166 @@
+"""
+Per-request timing: SQL statements, serialization and template rendering.
+
+For every request the hook counts SQL statements and accumulates database
+time (engine cursor events), serialization time (functions in
+app/api/schemas.py decorated with `timed_serializer`) and template render
+time (Flask template signals). The totals are sent in a `Server-Timing`
+response header and logged as one JSON line on the 'petclinic.requests'
+logger. Requests slower than SLOW_REQUEST_MS are logged at WARNING level
+together with their SQL statements.
+
+State lives in a context variable, so the per-call overhead is a lookup
+and a few perf_counter() calls, and the stats follow a view that runs in a
+copied context on another thread (app/group_commit.py).
+"""
+
+import contextvars
+import json
+import logging
+from functools import wraps
+from time import perf_counter
+
+from flask import before_render_template, request, template_rendered
+from sqlalchemy import event
+
+from app import db
+
+logger = logging.getLogger('petclinic.requests')
+
+MAX_LOGGED_STATEMENTS = 100
+
+_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Timings collected for the request being handled in this context."""
+
+    __slots__ = ('started', 'queries', 'db_time', 'serialize_time', 'render_time',
+                 'statements', 'serializing', 'render_started')
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.statements = []
+        self.serializing = False
+        self.render_started = None
+
+
+def current_stats():
+    """Return the RequestStats of the current request, or None."""
+    return _stats.get()
+
+
+def timed_serializer(func):
+    """Count the time spent in `func` as serialization time (outermost call only)."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = _stats.get()
+        if stats is None or stats.serializing:
+            return func(*args, **kwargs)
+        stats.serializing = True
+        started = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serialize_time += perf_counter() - started
+            stats.serializing = False
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info['query_started'].pop()
+    stats = _stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+        if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+            stats.statements.append((statement, elapsed))
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute: drop its start time
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started and exception_context.statement is not None:
+        started.pop()
+
+
+def _before_render(sender, template, context, **extra):
+    stats = _stats.get()
+    if stats is not None and stats.render_started is None:
+        stats.render_started = (template, perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    stats = _stats.get()
+    if stats is not None and stats.render_started is not None and stats.render_started[0] is template:
+        stats.render_time += perf_counter() - stats.render_started[1]
+        stats.render_started = None
+
+
+def init_app(app):
+    """Install the timing hooks on `app` and its database engine."""
+    if not app.config.get('REQUEST_TIMING'):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    @app.before_request
+    def start_request_timing():
+        _stats.set(RequestStats())
+
+    @app.after_request
+    def report_request_timing(response):
+        stats = _stats.get()
+        if stats is None:
+            return response
+        total = (perf_counter() - stats.started) * 1000
+        db_ms = stats.db_time * 1000
+        serialize_ms = stats.serialize_time * 1000
+        render_ms = stats.render_time * 1000
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.2f};desc="{stats.queries} queries"',
+            f'serialize;dur={serialize_ms:.2f}',
+            f'render;dur={render_ms:.2f}',
+            f'total;dur={total:.2f}',
+        ])
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(total, 2),
+            'db_ms': round(db_ms, 2),
+            'db_queries': stats.queries,
+            'serialize_ms': round(serialize_ms, 2),
+            'render_ms': round(render_ms, 2),
+        }
+        if total >= app.config['SLOW_REQUEST_MS']:
+            record['statements'] = [
+                {'sql': statement, 'ms': round(elapsed * 1000, 2)}
+                for statement, elapsed in stats.statements
+            ]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+    @app.teardown_request
+    def clear_request_timing(exc):
+        _stats.set(None)
@@ -0,0 +1,87 @@
+"""
+orjson-backed JSON provider for Flask (jsonify, app.json, streamed lists).
+
+Installed by init_app when the `orjson` package is importable and
+JSON_PROVIDER is 'auto' or 'orjson'; otherwise the app keeps Flask's stdlib
+provider. The output has the same layout as Flask's: compact separators,
+or two-space indentation in debug mode, with sorted keys. Dates, dataclasses
+and other non-native values go through Flask's `default` hook, so they
+serialize as before. Unlike the stdlib provider, non-ASCII text is written
+as UTF-8 rather than \\u escapes.
+
+Calls orjson cannot honour (other separators or indents, a custom `cls`,
+integers wider than 64 bits, ...) fall back to the stdlib encoder.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: keep the stdlib provider
+    orjson = None
+
+COMPACT = (',', ':')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider encoding with orjson."""
+
+    def _option(self, kwargs):
+        """orjson option flags equivalent to json.dumps `kwargs`, or None."""
+        kwargs = dict(kwargs)
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        kwargs.pop('ensure_ascii', None)
+        if kwargs:
+            return None
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent is None and separators == COMPACT:
+            return option
+        if indent == 2 and separators in (None, (',', ': ')):
+            return option | orjson.OPT_INDENT_2
+        return None
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize `obj` to UTF-8 encoded JSON bytes."""
+        option = self._option(kwargs)
+        if option is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                pass
+        return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass  # let the stdlib decoder accept (or report) it
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self.dumps_bytes(obj, indent=2)
+        else:
+            body = self.dumps_bytes(obj, separators=COMPACT)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Install OrjsonProvider according to the JSON_PROVIDER setting."""
+    choice = app.config['JSON_PROVIDER']
+    if choice not in ('auto', 'orjson', 'stdlib'):
+        raise ValueError(f'JSON_PROVIDER must be auto, orjson or stdlib, not {choice!r}')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER is orjson but the orjson package is not installed')
+    if choice != 'stdlib' and orjson is not None:
+        app.json = OrjsonProvider(app)
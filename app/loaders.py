@@ -0,0 +1,75 @@
+"""
+Batched loaders for the owner -> pet -> visit graph.
+Each level of the graph is fetched with one IN-batched SELECT (selectinload),
+so serializing any number of owners or pets costs a fixed number of queries.
+Pet types are not loaded here; they are served from app.reference_data.
+"""
+
+from sqlalchemy.orm import load_only, selectinload
+from app.models import Owner, Pet, Visit, Vet, PetType, Specialty
+
+MODELS = {
+    'owner': Owner,
+    'pet': Pet,
+    'visit': Visit,
+    'vet': Vet,
+    'type': PetType,
+    'specialty': Specialty,
+}
+
+# (resource, relationship) -> columns the parent needs loaded to resolve it
+RELATIONSHIP_KEYS = {
+    ('pet', 'owner'): ('owner_id',),
+    ('visit', 'pet'): ('pet_id',),
+}
+
+# (resource, relationship) -> (foreign key column of the related rows, their order),
+# for the Core readers (app.api.rows, app.read_model)
+ONE_TO_MANY = {
+    ('owner', 'pets'): ('owner_id', (Pet.id,)),
+    ('pet', 'visits'): ('pet_id', (Visit.date,)),
+}
+
+
+def with_pet_graph(query, include_visits=True):
+    """Eager-load visits for a Pet query."""
+    if include_visits:
+        query = query.options(selectinload(Pet.visits))
+    return query
+
+
+def with_owner_graph(query, include_visits=True):
+    """Eager-load pets (and their visits) for an Owner query."""
+    pets = selectinload(Owner.pets)
+    if include_visits:
+        pets = pets.selectinload(Pet.visits)
+    return query.options(pets)
+
+
+def _fields_options(selection, path, extra_columns=()):
+    """Loader options for `selection`, relative to the loader `path` (None at the root)."""
+    model = MODELS[selection.resource]
+    options = []
+    if selection.narrowed:
+        columns = {'id', *selection.columns(), *extra_columns}
+        for name in selection.include:
+            columns.update(RELATIONSHIP_KEYS.get((selection.resource, name.split('.')[0]), ()))
+        attrs = [getattr(model, column) for column in sorted(columns)]
+        options.append(path.load_only(*attrs) if path is not None else load_only(*attrs))
+    for name in {path.split('.')[0] for path in selection.include}:
+        relationship = getattr(model, name)
+        if relationship.property.lazy == 'dynamic':
+            continue
+        loader = path.selectinload(relationship) if path is not None else selectinload(relationship)
+        options.append(loader)
+        options.extend(_fields_options(selection.nested(name), loader))
+    return options
+
+
+def with_fields(query, selection, *extra_columns):
+    """
+    Load only what a FieldSelection (app.api.fieldsets) will serialize:
+    the selected columns, and one IN-batched SELECT per included relationship.
+    `extra_columns` names root columns needed anyway (e.g. keyset sort keys).
+    """
+    return query.options(*_fields_options(selection, None, extra_columns))
@@ -0,0 +1,134 @@
+"""
+Memory-first SQLite storage.
+
+When SQLITE_MEMORY_SNAPSHOT names a file, the app serves from an in-memory
+SQLite database (the `memdb` VFS, so every connection of the process sees
+the same data and normal locking with busy_timeout applies) instead of
+the database file. At startup the snapshot is loaded into memory with the
+online backup API; a background thread checkpoints the database back to
+the snapshot every SQLITE_CHECKPOINT_INTERVAL seconds when it has changed,
+and once more when the interpreter exits.
+
+A checkpoint first copies the database into a private in-memory copy,
+which blocks writers only for the length of a memory copy, then writes
+that copy to `<snapshot>.tmp` and renames it over the snapshot. The
+snapshot file is therefore always a complete, consistent database, and
+the process briefly needs twice the database size in memory.
+
+Crash-loss bounds:
+  * clean shutdown (normal exit, gunicorn graceful stop): nothing is lost;
+  * crash, SIGKILL, OOM kill or an exit that skips atexit handlers: the
+    commits since the last completed checkpoint are lost, i.e. up to
+    SQLITE_CHECKPOINT_INTERVAL seconds plus the duration of a checkpoint;
+  * a failure while writing a checkpoint leaves the previous snapshot intact.
+
+The database lives in one process. Run a single worker process (use
+threads or the ASGI mode for concurrency); with several processes each one
+would hold, and checkpoint, its own copy of the data.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger('petclinic.memorydb')
+
+MEMORY_URI = 'file:/petclinic?vfs=memdb'
+MEMORY_DATABASE_URL = f'sqlite:///{MEMORY_URI}&uri=true'
+
+# Pragmas that do not apply to an in-memory database
+FILE_ONLY_PRAGMAS = ('journal_mode', 'synchronous', 'mmap_size')
+
+store = None
+
+
+class MemoryStore:
+    """The process-wide in-memory database and its snapshot file."""
+
+    def __init__(self, snapshot, interval):
+        self.snapshot = snapshot
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # Holds the in-memory database open for the lifetime of the process
+        self._keeper = sqlite3.connect(MEMORY_URI, uri=True, check_same_thread=False)
+        self._checkpointed = None
+        self.load()
+
+    def _data_version(self):
+        # Changes whenever another connection commits to the database
+        return self._keeper.execute('PRAGMA data_version').fetchone()[0]
+
+    def load(self):
+        """Copy the snapshot file, if there is one, into memory."""
+        with self._lock:
+            if os.path.exists(self.snapshot):
+                source = sqlite3.connect(self.snapshot)
+                try:
+                    source.backup(self._keeper)
+                finally:
+                    source.close()
+                logger.info('Loaded SQLite snapshot %s', self.snapshot)
+                self._checkpointed = self._data_version()
+
+    def checkpoint(self):
+        """Write the database to the snapshot file if it changed. Returns True if written."""
+        with self._lock:
+            version = self._data_version()
+            if version == self._checkpointed:
+                return False
+
+            copy = sqlite3.connect(':memory:')
+            try:
+                self._keeper.backup(copy)
+                directory = os.path.dirname(os.path.abspath(self.snapshot))
+                os.makedirs(directory, exist_ok=True)
+                partial = self.snapshot + '.tmp'
+                if os.path.exists(partial):
+                    os.remove(partial)
+                target = sqlite3.connect(partial)
+                try:
+                    copy.backup(target)
+                finally:
+                    target.close()
+                os.replace(partial, self.snapshot)
+            finally:
+                copy.close()
+            self._checkpointed = version
+            return True
+
+    def start(self):
+        """Checkpoint every `interval` seconds in a daemon thread, and at exit."""
+        thread = threading.Thread(target=self._run, name='sqlite-checkpoint', daemon=True)
+        thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception:
+                logger.exception('SQLite checkpoint to %s failed', self.snapshot)
+
+    def close(self):
+        """Stop the checkpoint thread and write a final checkpoint."""
+        self._stopped.set()
+        self.checkpoint()
+
+
+def init_app(app):
+    """Switch `app` to the in-memory database if configured. Must run before db.init_app."""
+    global store
+    snapshot = app.config.get('SQLITE_MEMORY_SNAPSHOT')
+    if not snapshot:
+        return
+    if store is None:
+        store = MemoryStore(snapshot, app.config['SQLITE_CHECKPOINT_INTERVAL'])
+        store.start()
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = MEMORY_DATABASE_URL
+    app.config['SQLITE_PRAGMAS'] = {name: value for name, value in (app.config.get('SQLITE_PRAGMAS') or {}).items()
+                                    if name not in FILE_ONLY_PRAGMAS}
+    app.extensions['memorydb'] = store
@@ -0,0 +1,360 @@
+"""
+Prometheus-compatible metrics shared across worker processes.
+
+Every process writes its samples to its own memory-mapped file in
+METRICS_DIR (`<pid>.db`). The `/metrics` view reads the files of all
+processes and sums them, so a scrape served by any gunicorn worker reports
+the totals for the whole server. Gauges only count processes that are
+still alive. The directory should be emptied when the server starts
+(see the Dockerfile). While the server runs, each scrape folds the
+counters and histograms of processes that exited (recycled workers) into
+`aggregate.db` and deletes their files, under a lock on the directory,
+so the directory does not grow with every worker ever started.
+
+A process only creates its file when it handles its first request, so
+scripts that build the app without serving it (init_db.py, benchmarks)
+leave no samples behind. Until then, samples are kept in memory and
+copied into the file when it is created.
+
+File layout: an 8-byte header holding the number of used bytes, followed
+by entries of [uint32 key length][key, padded to 8 bytes][float64 value].
+Keys are JSON [metric name, sorted label pairs].
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from flask import Response, request
+from sqlalchemy import event
+
+from app import db
+
+INITIAL_SIZE = 64 * 1024
+HEADER = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+# Samples of processes that exited, and the lock held while they are folded into it
+AGGREGATE_FILE = 'aggregate.db'
+LOCK_FILE = '.lock'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+METRICS = {
+    'petclinic_requests_total': ('counter', 'HTTP requests by endpoint, method and status.'),
+    'petclinic_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.'),
+    'petclinic_requests_in_flight': ('gauge', 'HTTP requests currently being handled.'),
+    'petclinic_db_connections_checked_out': ('gauge', 'Pooled DB connections currently in use.'),
+    'petclinic_db_connections_pooled': ('gauge', 'Open DB connections held by the pools.'),
+    'petclinic_db_connections_opened_total': ('counter', 'DB connections opened.'),
+    'petclinic_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss).'),
+}
+
+
+class MmapFile:
+    """Append-only key -> float64 store in a memory-mapped file, owned by one process."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.positions = {}
+        self._file = open(path, 'w+b')
+        self._file.truncate(INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), INITIAL_SIZE)
+        self.used = HEADER.size
+        HEADER.pack_into(self._map, 0, self.used)
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def _position(self, key):
+        position = self.positions.get(key)
+        if position is None:
+            encoded = key.encode('utf-8')
+            padded = len(encoded) + (-(LENGTH.size + len(encoded)) % 8)
+            entry = LENGTH.size + padded + VALUE.size
+            if self.used + entry > len(self._map):
+                self._grow(self.used + entry)
+            LENGTH.pack_into(self._map, self.used, len(encoded))
+            self._map[self.used + LENGTH.size:self.used + LENGTH.size + len(encoded)] = encoded
+            position = self.used + LENGTH.size + padded
+            VALUE.pack_into(self._map, position, 0.0)
+            self.used += entry
+            HEADER.pack_into(self._map, 0, self.used)
+            self.positions[key] = position
+        return position
+
+    def add(self, key, amount):
+        with self.lock:
+            position = self._position(key)
+            value = VALUE.unpack_from(self._map, position)[0]
+            VALUE.pack_into(self._map, position, value + amount)
+
+
+def read_file(path):
+    """Return {key: value} from a metrics file written by any process."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        return {}
+    used = min(HEADER.unpack_from(data, 0)[0], len(data))
+    values, offset = {}, HEADER.size
+    while offset + LENGTH.size <= used:
+        length = LENGTH.unpack_from(data, offset)[0]
+        start = offset + LENGTH.size
+        padded = length + (-(LENGTH.size + length) % 8)
+        if start + padded + VALUE.size > used:
+            break
+        key = data[start:start + length].decode('utf-8')
+        values[key] = VALUE.unpack_from(data, start + padded)[0]
+        offset = start + padded + VALUE.size
+    return values
+
+
+def write_file(path, values):
+    """Write {key: value} in the layout of MmapFile, replacing `path` atomically."""
+    data = bytearray(HEADER.size)
+    for key, value in values.items():
+        encoded = key.encode('utf-8')
+        data += LENGTH.pack(len(encoded)) + encoded + bytes(-(LENGTH.size + len(encoded)) % 8)
+        data += VALUE.pack(value)
+    HEADER.pack_into(data, 0, len(data))
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+@contextmanager
+def _locked(directory):
+    """Hold an exclusive lock on `directory` (across processes)."""
+    with open(os.path.join(directory, LOCK_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _is_gauge(name):
+    return METRICS.get(name, ('',))[0] == 'gauge'
+
+
+class Registry:
+    """Writes this process's samples and collects everyone's for exposition."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._pid = None
+        self._store = None
+        self._lock = threading.Lock()
+        # {pid: {key: value}} of the samples recorded before the process served a request
+        self._pending = {}
+
+    def activate(self):
+        """Start writing this process's samples to its file (on its first request)."""
+        # Re-open after fork so every worker writes its own file
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    os.makedirs(self.directory, exist_ok=True)
+                    store = MmapFile(os.path.join(self.directory, f'{os.getpid()}.db'))
+                    for key, amount in self._pending.pop(os.getpid(), {}).items():
+                        store.add(key, amount)
+                    self._pending.clear()
+                    self._store, self._pid = store, os.getpid()
+
+    def add(self, name, amount=1.0, **labels):
+        key = json.dumps([name, sorted(labels.items())])
+        if self._pid == os.getpid():
+            self._store.add(key, amount)
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                self._store.add(key, amount)
+            else:
+                pending = self._pending.setdefault(os.getpid(), {})
+                pending[key] = pending.get(key, 0.0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        bucket = next(b for b in buckets if value <= b)
+        self.add(name + '_bucket', 1.0, le=_format_value(bucket), **labels)
+        self.add(name + '_sum', value, **labels)
+        self.add(name + '_count', 1.0, **labels)
+
+    def collect(self):
+        """Sum samples over all processes; gauges only from live ones."""
+        self.activate()
+        with _locked(self.directory):
+            self._fold_exited()
+            totals = {}
+            for filename in os.listdir(self.directory):
+                if not filename.endswith('.db'):
+                    continue
+                try:
+                    values = read_file(os.path.join(self.directory, filename))
+                except OSError:
+                    continue
+                for key, value in values.items():
+                    name, labels = json.loads(key)
+                    sample = (name, tuple(tuple(pair) for pair in labels))
+                    totals[sample] = totals.get(sample, 0.0) + value
+        return totals
+
+    def _fold_exited(self):
+        """Add the counters of exited processes to the aggregate file and delete their files."""
+        exited = [filename for filename in os.listdir(self.directory)
+                  if filename.endswith('.db') and filename[:-3].isdigit() and not _pid_alive(int(filename[:-3]))]
+        if not exited:
+            return
+        path = os.path.join(self.directory, AGGREGATE_FILE)
+        totals = read_file(path) if os.path.exists(path) else {}
+        for filename in exited:
+            for key, value in read_file(os.path.join(self.directory, filename)).items():
+                # the gauges of an exited process no longer count
+                if not _is_gauge(json.loads(key)[0]):
+                    totals[key] = totals.get(key, 0.0) + value
+        write_file(path, totals)
+        for filename in exited:
+            os.unlink(os.path.join(self.directory, filename))
+
+    def exposition(self):
+        """Render all metrics in the Prometheus text format."""
+        samples = self.collect()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                lines.extend(_histogram_lines(name, samples))
+            else:
+                for (sample_name, labels), value in sorted(samples.items()):
+                    if sample_name == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(name, samples):
+    """Cumulative _bucket lines plus _sum and _count, per label set."""
+    series = {}
+    for (sample_name, labels), value in samples.items():
+        if sample_name == name + '_bucket':
+            le = dict(labels)['le']
+            base = tuple(pair for pair in labels if pair[0] != 'le')
+            series.setdefault(base, {}).setdefault('buckets', {})[le] = value
+        elif sample_name in (name + '_sum', name + '_count'):
+            series.setdefault(labels, {})[sample_name] = value
+    lines = []
+    for labels in sorted(series):
+        data = series[labels]
+        cumulative = 0.0
+        for bucket in LATENCY_BUCKETS:
+            le = _format_value(bucket)
+            cumulative += data.get('buckets', {}).get(le, 0.0)
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {_format_value(cumulative)}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(data.get(name + "_sum", 0.0))}')
+        lines.append(f'{name}_count{_format_labels(labels)} {_format_value(data.get(name + "_count", 0.0))}')
+    return lines
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else f'{int(value)}.0'
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = None
+
+
+def inc(name, amount=1.0, **labels):
+    """Increment a counter or gauge; a no-op until init_app has run."""
+    if registry is not None:
+        registry.add(name, amount, **labels)
+
+
+def init_app(app):
+    """Install request/pool instrumentation and the /metrics view."""
+    global registry
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    if registry is None or registry.directory != app.config['METRICS_DIR']:
+        registry = Registry(app.config['METRICS_DIR'])
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'checkout', _on_checkout):
+        event.listen(engine, 'connect', _on_connect)
+        event.listen(engine, 'close', _on_close)
+        event.listen(engine, 'checkout', _on_checkout)
+        event.listen(engine, 'checkin', _on_checkin)
+
+    @app.before_request
+    def start_request_metrics():
+        registry.activate()
+        request.environ['petclinic.started'] = perf_counter()
+        inc('petclinic_requests_in_flight', 1)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = request.environ.get('petclinic.started')
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            inc('petclinic_requests_total', endpoint=endpoint, method=request.method,
+                status=str(response.status_code))
+            registry.observe('petclinic_request_duration_seconds', perf_counter() - started,
+                             endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if request.environ.pop('petclinic.started', None) is not None:
+            inc('petclinic_requests_in_flight', -1)
+
+    def metrics():
+        return Response(registry.exposition(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+
+def _on_connect(dbapi_connection, connection_record):
+    inc('petclinic_db_connections_opened_total')
+    inc('petclinic_db_connections_pooled', 1)
+
+
+def _on_close(dbapi_connection, connection_record):
+    inc('petclinic_db_connections_pooled', -1)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    inc('petclinic_db_connections_checked_out', 1)
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    inc('petclinic_db_connections_checked_out', -1)
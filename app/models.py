@@ -1,6 +1,12 @@
 from datetime import date
+from sqlalchemy.orm import validates
 from app import db
 
+
+def normalize_name(name):
+    """Case-folded form of a name, used for case-insensitive indexed lookups."""
+    return name.casefold() if name is not None else None
+
 # Association table for vet specialties (many-to-many)
 vet_specialties = db.Table('vet_specialties',
     db.Column('vet_id', db.Integer, db.ForeignKey('vets.id'), primary_key=True),
@@ -8,6 +14,42 @@ vet_specialties = db.Table('vet_specialties',
 )
 
 
+class DataVersion(db.Model):
+    """Change counter per data set, used to invalidate caches across processes."""
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(80), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def get(cls, name):
+        return db.session.execute(db.select(cls.version).where(cls.name == name)).scalar() or 0
+    
+    @classmethod
+    def get_many(cls, names):
+        """Return {name: version} for `names`; unknown names map to 0."""
+        rows = db.session.execute(db.select(cls.name, cls.version).where(cls.name.in_(names)))
+        versions = dict.fromkeys(names, 0)
+        versions.update((name, version) for name, version in rows)
+        return versions
+    
+    @classmethod
+    def bump(cls, *names):
+        """Increment the named counters as part of the current transaction."""
+        names = sorted(set(names))
+        if not names:
+            return
+        db.session.execute(
+            db.update(cls).where(cls.name.in_(names)).values(version=cls.version + 1))
+        existing = set(db.session.scalars(db.select(cls.name).where(cls.name.in_(names))))
+        missing = [{'name': name, 'version': 1} for name in names if name not in existing]
+        if missing:
+            db.session.execute(db.insert(cls), missing)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
+
+
 class PetType(db.Model):
     __tablename__ = 'types'
     
@@ -33,12 +75,25 @@ class Owner(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(30), nullable=False)
-    last_name = db.Column(db.String(30), nullable=False)
+    last_name = db.Column(db.String(30), nullable=False, index=True)
+    # normalize_name(last_name), kept in sync by the validator below
+    last_name_key = db.Column(db.String(30), index=True)
     address = db.Column(db.String(255), nullable=False)
     city = db.Column(db.String(80), nullable=False)
     telephone = db.Column(db.String(20), nullable=False)
     
-    pets = db.relationship('Pet', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
+    pets = db.relationship('Pet', backref='owner', cascade='all, delete-orphan', order_by='Pet.id')
+    
+    @validates('last_name')
+    def _sync_last_name_key(self, key, value):
+        self.last_name_key = normalize_name(value)
+        return value
+    
+    @classmethod
+    def last_name_starts_with(cls, prefix):
+        """Case-insensitive prefix filter that can use the last_name_key index."""
+        key = normalize_name(prefix)
+        return db.and_(cls.last_name_key >= key, cls.last_name_key < key + '\U0010ffff')
     
     @property
     def full_name(self):
@@ -58,11 +113,11 @@ class Pet(db.Model):
     name = db.Column(db.String(30), nullable=False)
     birth_date = db.Column(db.Date)
     type_id = db.Column(db.Integer, db.ForeignKey('types.id'))
-    owner_id = db.Column(db.Integer, db.ForeignKey('owners.id'))
+    owner_id = db.Column(db.Integer, db.ForeignKey('owners.id'), index=True)
     
     type = db.relationship('PetType')
-    visits = db.relationship('Visit', backref='pet', lazy='dynamic', cascade='all, delete-orphan',
-                            order_by='Visit.date')
+    visits = db.relationship('Visit', backref='pet', cascade='all, delete-orphan',
+                             order_by='Visit.date')
     
     def __repr__(self):
         return f'<Pet {self.name}>'
@@ -73,13 +128,41 @@ class Visit(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'))
-    date = db.Column(db.Date, default=date.today)
+    date = db.Column(db.Date, default=date.today, index=True)
     description = db.Column(db.String(255), nullable=False)
     
+    # Serves pet.visits (filtered by pet, ordered by date)
+    __table_args__ = (db.Index('ix_visits_pet_id_date', 'pet_id', 'date'),)
+    
     def __repr__(self):
         return f'<Visit {self.date}>'
 
 
+class VisitCount(db.Model):
+    """Number of visits per day and pet type, maintained by app.rollups."""
+    __tablename__ = 'visit_counts'
+    
+    day = db.Column(db.Date, primary_key=True)
+    # 0 for pets without a type (or visits without a pet)
+    type_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VisitCount {self.day} {self.type_id}={self.count}>'
+
+
+class RowChange(db.Model):
+    """Owners, pets and visits updated or deleted through the ORM, in commit order (app/analytics.py)."""
+    __tablename__ = 'row_changes'
+    
+    seq = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(30), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<RowChange {self.seq} {self.table_name}:{self.row_id}>'
+
+
 class Vet(db.Model):
     __tablename__ = 'vets'
     
@@ -96,3 +179,24 @@ class Vet(db.Model):
     
     def __repr__(self):
         return f'<Vet {self.first_name} {self.last_name}>'
+
+
+class Appointment(db.Model):
+    """A booked time slot [starts_at, ends_at) of a vet, with the visit it is for (app/scheduling.py)."""
+    __tablename__ = 'appointments'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    vet_id = db.Column(db.Integer, db.ForeignKey('vets.id'), nullable=False)
+    visit_id = db.Column(db.Integer, db.ForeignKey('visits.id'), nullable=False, unique=True)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=False)
+    
+    vet = db.relationship('Vet', backref=db.backref('appointments', cascade='all, delete-orphan'))
+    visit = db.relationship('Visit', backref=db.backref('appointment', uselist=False,
+                                                        cascade='all, delete-orphan'))
+    
+    # Serves the conflict check and the per-vet schedule (by vet, ordered by start)
+    __table_args__ = (db.Index('ix_appointments_vet_id_starts_at', 'vet_id', 'starts_at'),)
+    
+    def __repr__(self):
+        return f'<Appointment {self.vet_id} {self.starts_at}>'
@@ -0,0 +1,116 @@
+"""
+Read-only query layer for the REST GET handlers.
+
+Rows are read with Core SELECTs and projected into small `__slots__`
+records instead of ORM instances, so a read skips the identity map,
+attribute instrumentation and change tracking, and each record costs a
+fraction of the memory of a mapped object. Records carry the same
+attribute names as the models, so the app.api.schemas serializers accept
+either. Relationships named by a FieldSelection are attached with one IN
+query per level, like app.loaders does for the ORM.
+
+Records are plain values: never add them to a session or modify them.
+"""
+
+from app import db
+from app.loaders import MODELS, ONE_TO_MANY, RELATIONSHIP_KEYS
+
+
+class Record:
+    """Base for read-only rows; `columns` are filled positionally from a SELECT."""
+
+    __slots__ = ()
+    columns = ()
+
+    def __init__(self, row):
+        for name, value in zip(self.columns, row):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id}>'
+
+
+class OwnerRecord(Record):
+    columns = ('id', 'first_name', 'last_name', 'address', 'city', 'telephone')
+    __slots__ = columns + ('pets',)
+
+
+class PetRecord(Record):
+    columns = ('id', 'name', 'birth_date', 'type_id', 'owner_id')
+    __slots__ = columns + ('visits', 'owner')
+
+
+class VisitRecord(Record):
+    columns = ('id', 'date', 'description', 'pet_id')
+    __slots__ = columns + ('pet',)
+
+
+RECORDS = {
+    'owner': OwnerRecord,
+    'pet': PetRecord,
+    'visit': VisitRecord,
+}
+
+
+def select_records(resource):
+    """Core SELECT of the columns of `resource` records, to filter and order further."""
+    table = MODELS[resource].__table__
+    return db.select(*(table.c[name] for name in RECORDS[resource].columns))
+
+
+def _attach_many(records, selection, name):
+    nested = selection.nested(name)
+    foreign_key, order_by = ONE_TO_MANY[(selection.resource, name)]
+    column = MODELS[nested.resource].__table__.c[foreign_key]
+    query = select_records(nested.resource).where(column.in_({record.id for record in records}))
+    children = load(query.order_by(*order_by), nested)
+
+    grouped = {record.id: [] for record in records}
+    for child in children:
+        grouped[getattr(child, foreign_key)].append(child)
+    for record in records:
+        setattr(record, name, grouped[record.id])
+
+
+def _attach_one(records, selection, name):
+    nested = selection.nested(name)
+    foreign_key, = RELATIONSHIP_KEYS[(selection.resource, name)]
+    ids = {getattr(record, foreign_key) for record in records} - {None}
+    by_id = {}
+    if ids:
+        column = MODELS[nested.resource].__table__.c.id
+        by_id = {parent.id: parent for parent in load(select_records(nested.resource).where(column.in_(ids)), nested)}
+    for record in records:
+        setattr(record, name, by_id.get(getattr(record, foreign_key)))
+
+
+def attach(records, selection):
+    """Load the relationships `selection` includes onto `records`."""
+    if not records:
+        return records
+    for path in {path.split('.')[0] for path in selection.include}:
+        if (selection.resource, path) in ONE_TO_MANY:
+            _attach_many(records, selection, path)
+        else:
+            _attach_one(records, selection, path)
+    return records
+
+
+def load(query, selection):
+    """Run a select_records() query and return its records with their relationships."""
+    cls = RECORDS[selection.resource]
+    return attach([cls(row) for row in db.session.execute(query)], selection)
+
+
+def first(selection, *criteria):
+    """The first `selection.resource` record matching `criteria`, or None."""
+    records = load(select_records(selection.resource).where(*criteria).limit(1), selection)
+    return records[0] if records else None
+
+
+def iterate(query, selection, batch_size):
+    """Yield the records of `query`, reading and attaching relationships `batch_size` rows at a time."""
+    cls = RECORDS[selection.resource]
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield from attach([cls(row) for row in rows], selection)
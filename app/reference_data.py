@@ -0,0 +1,89 @@
+"""
+In-process cache for reference data (pet types and specialties).
+
+These tables almost never change, so each worker keeps them in memory and
+checks a single DataVersion counter per request to see whether another
+process has modified them. Write handlers call `invalidate()`, which bumps
+the counter in the same transaction as the change.
+
+The entry a request resolved is kept in `g`, so the version check and the
+hit/miss metric happen once per request and table, not once per lookup
+(serializers look up the type of every pet row).
+"""
+
+import threading
+
+from flask import current_app, g
+from app import metrics
+from app.models import DataVersion, PetType, Specialty
+
+
+class ReferenceCache:
+    """Cached (id, name) rows of a small lookup table."""
+
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+        self._lock = threading.Lock()
+
+    def _state(self):
+        return current_app.extensions.setdefault('reference_data', {})
+
+    def _current_version(self):
+        versions = g.setdefault('reference_versions', {})
+        if self.name not in versions:
+            versions[self.name] = DataVersion.get(self.name)
+        return versions[self.name]
+
+    def _load(self):
+        loaded = g.setdefault('reference_entries', {})
+        entry = loaded.get(self.name)
+        if entry is None:
+            entry = loaded[self.name] = self._resolve()
+        return entry
+
+    def _resolve(self):
+        version = self._current_version()
+        state = self._state()
+        entry = state.get(self.name)
+        if entry is not None and entry['version'] == version:
+            metrics.inc('petclinic_cache_requests_total', cache=self.name, result='hit')
+        else:
+            metrics.inc('petclinic_cache_requests_total', cache=self.name, result='miss')
+            with self._lock:
+                entry = state.get(self.name)
+                if entry is None or entry['version'] != version:
+                    rows = self.model.query.with_entities(self.model.id, self.model.name) \
+                        .order_by(self.model.id).all()
+                    entry = {
+                        'version': version,
+                        'rows': [(row.id, row.name) for row in rows],
+                        'by_id': {row.id: {'id': row.id, 'name': row.name} for row in rows},
+                        'by_name': {row.name: row.id for row in reversed(rows)},
+                    }
+                    state[self.name] = entry
+        return entry
+
+    def choices(self):
+        """Return [(id, name), ...] ordered by id, e.g. for a SelectField."""
+        return list(self._load()['rows'])
+
+    def get(self, item_id):
+        """Return the serialized row for `item_id`, or None."""
+        item = self._load()['by_id'].get(item_id)
+        return dict(item) if item is not None else None
+
+    def id_for_name(self, name):
+        """Return the id of the first row called `name`, or None."""
+        return self._load()['by_name'].get(name)
+
+    def invalidate(self):
+        """Bump the version as part of the current transaction and drop local data."""
+        DataVersion.bump(self.name)
+        self._state().pop(self.name, None)
+        g.setdefault('reference_versions', {}).pop(self.name, None)
+        g.setdefault('reference_entries', {}).pop(self.name, None)
+
+
+pet_types = ReferenceCache('types', PetType)
+specialties = ReferenceCache('specialties', Specialty)
@@ -0,0 +1,155 @@
+"""
+Visit count rollups behind /api/stats/visits.
+
+`visit_counts` holds the number of visits per day and pet type, so a stats
+query sums at most (days x pet types) rows, however many visits exist.
+Every ORM write is turned into count deltas, applied in the same
+transaction: visits added, deleted or moved to another date or pet, and
+pets changing type (which moves all their visits). Deleting an owner or
+pet cascades to the visits in the session, so it is covered too. The
+deltas come in two halves: before the flush, the stored visits that are
+moved or deleted are subtracted under their old keys; after it, when
+relationship changes have set the foreign keys and new rows have ids, the
+written visits are added under their new keys.
+
+Writes that bypass the ORM unit of work (Core inserts) must call apply()
+themselves, like they bump DataVersion counters; rebuild() recomputes the
+whole table from the visits.
+"""
+
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import event, func, inspect, tuple_
+
+from app import db
+from app.models import Pet, Visit, VisitCount
+
+NO_TYPE = 0
+
+
+def _committed(obj, attr):
+    """The value of `attr` before this flush."""
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+
+def _changed(obj, *attrs):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _type_of(session, pet_id, committed=False):
+    """The type id of `pet_id`, before this flush if `committed`."""
+    pet = session.get(Pet, pet_id) if pet_id is not None else None
+    if pet is None:
+        return NO_TYPE
+    return (_committed(pet, 'type_id') if committed else pet.type_id) or NO_TYPE
+
+
+def _retyped_pets(session):
+    return [obj for obj in session.dirty
+            if isinstance(obj, Pet) and obj not in session.deleted and _changed(obj, 'type_id', 'type')]
+
+
+def _moved_visits(session):
+    return [obj for obj in session.dirty
+            if isinstance(obj, Visit) and obj not in session.deleted and _changed(obj, 'date', 'pet_id', 'pet')]
+
+
+def _stored_visits(session, pet_id):
+    """(day, count) of the visits of `pet_id` in the database."""
+    visits = Visit.__table__
+    return session.execute(
+        db.select(visits.c.date, func.count()).where(visits.c.pet_id == pet_id).group_by(visits.c.date))
+
+
+def removed_counts(session):
+    """
+    Count deltas {(day, type_id): -n} of the stored visits the pending ORM
+    writes in `session` move or delete, by their keys before the flush.
+    Returns (deltas, ids of the pets changing type); all visits of those
+    pets are removed, and added back by added_counts().
+    """
+    deltas = Counter()
+    retyped = set()
+    for pet in _retyped_pets(session):
+        retyped.add(pet.id)
+        old_type = _committed(pet, 'type_id') or NO_TYPE
+        for day, count in _stored_visits(session, pet.id):
+            deltas[(day, old_type)] -= count
+    visits = [obj for obj in session.deleted if isinstance(obj, Visit)] + _moved_visits(session)
+    for visit in visits:
+        pet_id = _committed(visit, 'pet_id')
+        if pet_id not in retyped:
+            deltas[(_committed(visit, 'date'), _type_of(session, pet_id, committed=True))] -= 1
+    return deltas, retyped
+
+
+def added_counts(session, retyped):
+    """
+    Count deltas {(day, type_id): n} of the visits written by the flush that
+    just ran (called from after_flush, when foreign keys and new ids are set).
+    """
+    deltas = Counter()
+    for pet_id in retyped:
+        new_type = _type_of(session, pet_id)
+        for day, count in _stored_visits(session, pet_id):
+            deltas[(day, new_type)] += count
+    visits = [obj for obj in session.new if isinstance(obj, Visit)] + _moved_visits(session)
+    for visit in visits:
+        if visit.pet_id not in retyped:
+            # date.today is the column default, applied at INSERT
+            deltas[(visit.date or date.today(), _type_of(session, visit.pet_id))] += 1
+    return deltas
+
+
+def apply(session, deltas):
+    """Add `deltas` {(day, type_id): n} to visit_counts in the current transaction."""
+    deltas = {key: n for key, n in deltas.items() if n and key[0] is not None}
+    if not deltas:
+        return
+    table = VisitCount.__table__
+    session.execute(
+        table.update()
+        .where(table.c.day == db.bindparam('b_day'), table.c.type_id == db.bindparam('b_type_id'))
+        .values(count=table.c.count + db.bindparam('b_count')),
+        [{'b_day': day, 'b_type_id': type_id, 'b_count': n} for (day, type_id), n in deltas.items()])
+    keys = tuple_(table.c.day, table.c.type_id)
+    existing = set(session.execute(db.select(table.c.day, table.c.type_id).where(keys.in_(list(deltas)))))
+    missing = [{'day': day, 'type_id': type_id, 'count': n}
+               for (day, type_id), n in deltas.items() if (day, type_id) not in existing]
+    if missing:
+        session.execute(table.insert(), missing)
+    session.execute(table.delete().where(keys.in_(list(deltas)), table.c.count <= 0))
+
+
+def rebuild():
+    """Recompute visit_counts from the visits table."""
+    visits, pets, table = Visit.__table__, Pet.__table__, VisitCount.__table__
+    type_id = func.coalesce(pets.c.type_id, NO_TYPE)
+    db.session.execute(table.delete())
+    db.session.execute(table.insert().from_select(
+        ['day', 'type_id', 'count'],
+        db.select(visits.c.date, type_id, func.count())
+        .select_from(visits.outerjoin(pets, pets.c.id == visits.c.pet_id))
+        .where(visits.c.date.is_not(None))
+        .group_by(visits.c.date, type_id)))
+
+
+def create_visit_rollups():
+    """Schema revision 3: create and fill the visit_counts table."""
+    VisitCount.__table__.create(db.session.connection(), checkfirst=True)
+    rebuild()
+
+
+@event.listens_for(db.session, 'before_flush')
+def remove_visit_counts(session, flush_context, instances):
+    deltas, retyped = removed_counts(session)
+    apply(session, deltas)
+    session.info['retyped_pets'] = retyped
+
+
+@event.listens_for(db.session, 'after_flush')
+def add_visit_counts(session, flush_context):
+    apply(session, added_counts(session, session.info.pop('retyped_pets', set())))
@@ -1,7 +1,10 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
-from app import db
-from app.models import Owner, Pet, PetType, Visit
-from app.forms import OwnerForm, PetForm, VisitForm
+from app import db, reference_data
+from app.fragments import deferred, is_cached, versions
+from app.models import Owner, Pet, Visit
+from app.loaders import with_owner_graph
+
+# app.forms (WTForms) is imported inside the form views, off the cold-start path
 
 bp = Blueprint('owners', __name__, url_prefix='/owners')
 
@@ -18,31 +21,34 @@ def list_owners():
     page = request.args.get('page', 1, type=int)
     last_name = request.args.get('lastName', '')
     
-    query = Owner.query
+    query = with_owner_graph(Owner.query, include_visits=False)
     if last_name:
-        query = query.filter(Owner.last_name.ilike(f'{last_name}%'))
-    
-    query = query.order_by(Owner.last_name)
-    pagination = query.paginate(page=page, per_page=PAGE_SIZE, error_out=False)
-    owners = pagination.items
+        query = query.filter(Owner.last_name_starts_with(last_name))
     
-    # If no owners found
-    if not owners:
-        flash('No owners found', 'warning')
-        return render_template('owners/findOwners.html', not_found=True)
+    query = query.order_by(Owner.last_name_key, Owner.id)
+    pagination = deferred(lambda: query.paginate(page=page, per_page=PAGE_SIZE, error_out=False))
     
-    # If exactly one owner found, redirect to details
-    if pagination.total == 1:
-        return redirect(url_for('owners.show_owner', owner_id=owners[0].id))
+    # A cached list fragment means this search matched several owners; skip the queries
+    if not is_cached('owners-list', last_name, page, versions('owners')):
+        # If no owners found
+        if not pagination.items:
+            flash('No owners found', 'warning')
+            return render_template('owners/findOwners.html', not_found=True)
+        
+        # If exactly one owner found, redirect to details
+        if pagination.total == 1:
+            return redirect(url_for('owners.show_owner', owner_id=pagination.items[0].id))
     
     return render_template('owners/ownersList.html',
-                          owners=owners,
+                          owners=deferred(lambda: pagination.items),
                           pagination=pagination,
+                          last_name=last_name,
                           current_page=page)
 
 
 @bp.route('/new', methods=['GET', 'POST'])
 def new_owner():
+    from app.forms import OwnerForm
     form = OwnerForm()
     if form.validate_on_submit():
         owner = Owner(
@@ -61,13 +67,16 @@ def new_owner():
 
 @bp.route('/<int:owner_id>')
 def show_owner(owner_id):
-    owner = Owner.query.get_or_404(owner_id)
-    return render_template('owners/ownerDetails.html', owner=owner)
+    # Loaded only when the page's fragment is not cached
+    owner = deferred(lambda: with_owner_graph(Owner.query).filter_by(id=owner_id).first_or_404())
+    return render_template('owners/ownerDetails.html', owner=owner, owner_id=owner_id,
+                          pet_types=deferred(lambda: dict(reference_data.pet_types.choices())))
 
 
 @bp.route('/<int:owner_id>/edit', methods=['GET', 'POST'])
 def edit_owner(owner_id):
     owner = Owner.query.get_or_404(owner_id)
+    from app.forms import OwnerForm
     form = OwnerForm(obj=owner)
     
     if form.validate_on_submit():
@@ -87,8 +96,9 @@ def edit_owner(owner_id):
 @bp.route('/<int:owner_id>/pets/new', methods=['GET', 'POST'])
 def new_pet(owner_id):
     owner = Owner.query.get_or_404(owner_id)
+    from app.forms import PetForm
     form = PetForm()
-    form.type_id.choices = [(t.id, t.name) for t in PetType.query.all()]
+    form.type_id.choices = reference_data.pet_types.choices()
     
     if form.validate_on_submit():
         pet = Pet(
@@ -113,8 +123,9 @@ def edit_pet(owner_id, pet_id):
         flash('Pet not found', 'error')
         return redirect(url_for('owners.show_owner', owner_id=owner.id))
     
+    from app.forms import PetForm
     form = PetForm(obj=pet)
-    form.type_id.choices = [(t.id, t.name) for t in PetType.query.all()]
+    form.type_id.choices = reference_data.pet_types.choices()
     
     if form.validate_on_submit():
         pet.name = form.name.data
@@ -136,6 +147,7 @@ def new_visit(owner_id, pet_id):
         flash('Pet not found', 'error')
         return redirect(url_for('owners.show_owner', owner_id=owner.id))
     
+    from app.forms import VisitForm
     form = VisitForm()
     
     if form.validate_on_submit():
@@ -1,5 +1,6 @@
-from flask import Blueprint, render_template, request, jsonify
-from app.models import Vet
+from flask import Blueprint, current_app, render_template, request
+from app import vets_directory
+from app.fragments import deferred
 
 bp = Blueprint('vets', __name__)
 
@@ -9,27 +10,16 @@ PAGE_SIZE = 5
 @bp.route('/vets.html')
 def show_vets():
     page = request.args.get('page', 1, type=int)
-    pagination = Vet.query.paginate(page=page, per_page=PAGE_SIZE, error_out=False)
-    vets = pagination.items
+    # Loaded only when the page's fragment is not cached
+    pagination = deferred(lambda: vets_directory.current().paginate(page, PAGE_SIZE))
     
     return render_template('vets/vetList.html',
-                          vets=vets,
+                          vets=deferred(lambda: pagination.items),
                           pagination=pagination,
                           current_page=page)
 
 
 @bp.route('/vets')
 def vets_json():
-    """Return vets as JSON for API access"""
-    vets = Vet.query.all()
-    return jsonify({
-        'vets': [
-            {
-                'id': vet.id,
-                'firstName': vet.first_name,
-                'lastName': vet.last_name,
-                'specialties': [{'id': s.id, 'name': s.name} for s in vet.specialties]
-            }
-            for vet in vets
-        ]
-    })
+    """Return vets as JSON for API access (pre-serialized by the vets directory)"""
+    return current_app.response_class(vets_directory.current().json, mimetype=current_app.json.mimetype)
@@ -0,0 +1,234 @@
+"""
+Appointment scheduling: vet availability and conflict-free booking.
+
+Appointments occupy [starts_at, ends_at) of one vet. They start on a grid
+of APPOINTMENT_SLOT_MINUTES from the daily opening time, last a whole
+number of slots (at most APPOINTMENT_MAX_MINUTES) and stay within the
+opening hours (APPOINTMENT_HOURS). A vet's appointments never overlap.
+
+Each worker keeps a ScheduleIndex: per vet, the start and end times of its
+upcoming appointments as two sorted lists (as appointments never overlap,
+ordering them by start also orders their ends). A conflict check is one
+bisect, and the first free slot of a vet in a window only walks the
+appointments inside it. The first free vet with a specialty takes the vets
+from the vets directory and keeps the earliest slot. The index checks the
+'appointments' DataVersion and re-reads the appointments of the vets whose
+'schedule:<vet id>' counter moved.
+
+A booking is checked against the index first, then against the database
+after its row is written, when the transaction holds the write lock (on
+SQLite the write fails with SQLITE_BUSY if another worker committed since
+the transaction began, and is retried, see app/sqlite.py). The vet row is
+locked with SELECT ... FOR UPDATE for databases that support it. The
+database check is a range scan of (vet_id, starts_at) bounded by the
+longest appointment.
+"""
+
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+
+from app import db, vets_directory
+from app.models import Appointment, DataVersion, Vet, Visit
+
+_lock = threading.Lock()
+
+
+class OpeningHours:
+    """Daily opening hours and the slot grid appointments are placed on."""
+
+    def __init__(self, spec, slot_minutes):
+        opening, closing = spec.split('-')
+        self.opening = time.fromisoformat(opening.strip())
+        self.closing = time.fromisoformat(closing.strip())
+        self.slot = timedelta(minutes=slot_minutes)
+
+    def span(self, day):
+        return datetime.combine(day, self.opening), datetime.combine(day, self.closing)
+
+    def contains(self, start, end):
+        """True if [start, end) is a run of slots within the opening hours of one day."""
+        opening, closing = self.span(start.date())
+        return opening <= start < end <= closing and (start - opening) % self.slot == timedelta(0)
+
+    @property
+    def length(self):
+        """Time between opening and closing, the longest possible appointment."""
+        opening, closing = self.span(date.today())
+        return closing - opening
+
+    def fit(self, moment, duration, end):
+        """
+        The earliest slot start at or after `moment` leaving `duration` before
+        closing time, or None if there is none before `end`.
+        """
+        if duration > self.length:
+            return None
+        day = moment.date()
+        while datetime.combine(day, self.opening) < end:
+            opening, closing = self.span(day)
+            start = opening if moment <= opening else opening + -((opening - moment) // self.slot) * self.slot
+            if start + duration <= closing:
+                return start
+            day += timedelta(days=1)
+        return None
+
+
+def opening_hours():
+    config = current_app.config
+    return OpeningHours(config['APPOINTMENT_HOURS'], config['APPOINTMENT_SLOT_MINUTES'])
+
+
+class VetSchedule:
+    """The upcoming appointments of one vet, as sorted start and end times."""
+
+    __slots__ = ('counter', 'starts', 'ends')
+
+    def __init__(self, counter, starts=(), ends=()):
+        self.counter = counter
+        self.starts = list(starts)
+        self.ends = list(ends)
+
+    def conflicts(self, start, end):
+        """True if [start, end) overlaps an appointment."""
+        index = bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def first_free(self, start, end, duration, hours):
+        """The earliest free slot start of `duration` within [start, end), or None."""
+        index = bisect_right(self.ends, start)
+        slot = hours.fit(start, duration, end)
+        while slot is not None and slot + duration <= end:
+            while index < len(self.ends) and self.ends[index] <= slot:
+                index += 1
+            if index == len(self.starts) or self.starts[index] >= slot + duration:
+                return slot
+            slot = hours.fit(self.ends[index], duration, end)
+        return None
+
+
+EMPTY = VetSchedule(0)
+
+
+class ScheduleIndex:
+    """Per-vet schedules of the appointments ending after `since`."""
+
+    def __init__(self, version, since, schedules):
+        self.version = version
+        self.since = since
+        self.schedules = schedules
+
+    def schedule(self, vet_id):
+        return self.schedules.get(vet_id, EMPTY)
+
+
+def _load(since, vet_ids=None):
+    """{vet_id: ([starts], [ends])} of the appointments ending after `since`."""
+    query = db.select(Appointment.vet_id, Appointment.starts_at, Appointment.ends_at) \
+        .where(Appointment.ends_at > since).order_by(Appointment.vet_id, Appointment.starts_at)
+    if vet_ids is not None:
+        query = query.where(Appointment.vet_id.in_(vet_ids))
+    result = {}
+    for vet_id, starts_at, ends_at in db.session.execute(query):
+        starts, ends = result.setdefault(vet_id, ([], []))
+        starts.append(starts_at)
+        ends.append(ends_at)
+    return result
+
+
+def _rebuild(previous, version):
+    counters = dict(db.session.execute(
+        db.select(DataVersion.name, DataVersion.version).where(DataVersion.name.like('schedule:%'))).all())
+    counters = {int(name.partition(':')[2]): counter for name, counter in counters.items()}
+    if previous is None:
+        since = datetime.combine(date.today(), time())
+        stale = None
+    else:
+        since = previous.since
+        stale = [vet_id for vet_id, counter in counters.items() if previous.schedule(vet_id).counter != counter]
+
+    loaded = _load(since, stale) if stale is None or stale else {}
+    schedules = {} if previous is None else dict(previous.schedules)
+    for vet_id in (set(loaded) | set(counters) if stale is None else stale):
+        starts, ends = loaded.get(vet_id, ((), ()))
+        schedules[vet_id] = VetSchedule(counters.get(vet_id, 0), starts, ends)
+    return ScheduleIndex(version, since, schedules)
+
+
+def current():
+    """Return the up-to-date ScheduleIndex for this worker."""
+    version = DataVersion.get('appointments')
+    index = current_app.extensions.get('schedule_index')
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        index = current_app.extensions.get('schedule_index')
+        if index is None or index.version != version:
+            index = _rebuild(index, version)
+            current_app.extensions['schedule_index'] = index
+    return index
+
+
+def vets_with_specialty(specialty_id):
+    """Ids of the vets with `specialty_id`, in id order."""
+    return [vet.id for vet in vets_directory.current().vets
+            if any(specialty.id == specialty_id for specialty in vet.specialties)]
+
+
+def first_available(vet_ids, start, end, duration):
+    """(slot start, vet id) of the earliest free slot of `duration` in [start, end), or None."""
+    hours = opening_hours()
+    index = current()
+    earliest = hours.fit(start, duration, end)
+    if earliest is None:
+        return None
+    best = None
+    for vet_id in vet_ids:
+        slot = index.schedule(vet_id).first_free(start, end, duration, hours)
+        if slot is not None:
+            best = (slot, vet_id)
+            if slot == earliest:
+                break
+            # the next vets only matter with a slot before this one
+            end = slot + duration - timedelta(microseconds=1)
+    return best
+
+
+def has_conflict(vet_id, start, end, exclude_id=None):
+    """True if an appointment of `vet_id` in the database overlaps [start, end)."""
+    longest = timedelta(minutes=current_app.config['APPOINTMENT_MAX_MINUTES'])
+    query = db.select(Appointment.id).where(
+        Appointment.vet_id == vet_id,
+        Appointment.starts_at > start - longest,
+        Appointment.starts_at < end,
+        Appointment.ends_at > start)
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    return db.session.execute(query.limit(1)).first() is not None
+
+
+def book(vet_id, pet_id, start, end, description):
+    """
+    Book [start, end) with `vet_id` for a new visit of `pet_id` and commit.
+    Returns the Appointment, or None (nothing written) if the slot is taken.
+    """
+    if current().schedule(vet_id).conflicts(start, end):
+        return None
+    db.session.execute(db.select(Vet.id).where(Vet.id == vet_id).with_for_update())
+
+    visit = Visit(pet_id=pet_id, date=start.date(), description=description)
+    appointment = Appointment(vet_id=vet_id, visit=visit, starts_at=start, ends_at=end)
+    db.session.add(appointment)
+    db.session.flush()
+    if has_conflict(vet_id, start, end, exclude_id=appointment.id):
+        db.session.rollback()
+        return None
+    db.session.commit()
+    return appointment
+
+
+def create_appointments():
+    """Schema revision 5: create the appointments table."""
+    Appointment.__table__.create(db.session.connection(), checkfirst=True)
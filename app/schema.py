@@ -0,0 +1,88 @@
+"""
+Schema revisions for existing databases.
+
+`db.create_all()` only creates missing tables; it never adds columns or
+indexes to tables that already exist. `upgrade()` runs create_all and then
+applies each revision in REVISIONS that the database has not seen yet.
+The number of applied revisions is stored as the 'schema' DataVersion.
+Revisions must be idempotent, since a fresh database created by create_all
+already has the current layout.
+
+When the stored version already matches REVISIONS, upgrade() returns after
+that single lookup and skips create_all's table reflection (this matters
+for cold starts), so new tables must be introduced by a revision as well.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.analytics import create_row_changes
+from app.models import DataVersion, Owner, normalize_name
+from app.scheduling import create_appointments
+from app.rollups import create_visit_rollups
+from app.search import create_search_index
+
+
+def _add_column(table, column):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    columns = {c['name'] for c in inspect(db.engine).get_columns(table.name)}
+    if column.name not in columns:
+        column_type = column.type.compile(dialect=db.engine.dialect)
+        db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+def create_indexes(*tables):
+    """Create the indexes declared on the models that are missing in the database."""
+    connection = db.session.connection()
+    for table in tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def add_lookup_indexes():
+    """Revision 1: foreign-key/date indexes and the case-folded owner last name."""
+    _add_column(Owner.__table__, Owner.__table__.c.last_name_key)
+
+    owners = Owner.__table__
+    rows = db.session.execute(
+        db.select(owners.c.id, owners.c.last_name).where(owners.c.last_name_key.is_(None))).all()
+    if rows:
+        db.session.execute(
+            owners.update().where(owners.c.id == db.bindparam('owner_id'))
+            .values(last_name_key=db.bindparam('key')),
+            [{'owner_id': row.id, 'key': normalize_name(row.last_name)} for row in rows])
+
+    create_indexes(*db.metadata.sorted_tables)
+
+
+REVISIONS = [
+    add_lookup_indexes,
+    create_search_index,
+    create_visit_rollups,
+    create_row_changes,
+    create_appointments,
+]
+
+
+def is_current():
+    """True if the database records every revision in REVISIONS as applied."""
+    try:
+        return DataVersion.get('schema') == len(REVISIONS)
+    except OperationalError:
+        # No data_versions table yet: a new database
+        db.session.rollback()
+        return False
+
+
+def upgrade():
+    """Create missing tables and apply pending revisions. Returns the schema version."""
+    if is_current():
+        return len(REVISIONS)
+    db.create_all()
+    applied = DataVersion.get('schema')
+    for revision in REVISIONS[applied:]:
+        revision()
+        DataVersion.bump('schema')
+        db.session.commit()
+    return len(REVISIONS)
@@ -0,0 +1,193 @@
+"""
+SQLite FTS5 full-text index over owners, pets and visits.
+
+One FTS5 table, `search_index`, holds a document per owner, pet and visit.
+Document rowids encode the source row (id * 4 + kind), so triggers on the
+source tables can replace or delete a document by rowid without scanning
+the index. The triggers keep the index current for every write path,
+including bulk inserts and the web forms. Renaming a pet or pet type
+re-indexes that pet's (or type's) pets and visits.
+
+The index is only available on SQLite builds with FTS5; on other databases
+`is_available()` returns False. Revision 2 creates nothing on a build
+without FTS5; the index is then created by the first is_available() call
+once the build has it.
+"""
+
+import re
+import weakref
+
+from app import db
+
+KINDS = ('owner', 'pet', 'visit')
+OWNER, PET, VISIT = range(3)
+
+# Weights for bm25(): title, body, tags
+RANK = 'bm25(search_index, 0, 0, 4.0, 1.0, 0.5)'
+
+_PET_DOC = """
+    SELECT p.id * 4 + {pet}, 'pet', p.owner_id, p.name, '', coalesce(t.name, '')
+    FROM pets p LEFT JOIN types t ON t.id = p.type_id
+""".format(pet=PET)
+
+_VISIT_DOC = """
+    SELECT v.id * 4 + {visit}, 'visit', p.owner_id, coalesce(p.name, ''), v.description,
+           coalesce(t.name, '')
+    FROM visits v LEFT JOIN pets p ON p.id = v.pet_id LEFT JOIN types t ON t.id = p.type_id
+""".format(visit=VISIT)
+
+_OWNER_DOC = """
+    SELECT o.id * 4 + {owner}, 'owner', o.id, o.first_name || ' ' || o.last_name,
+           o.address || ' ' || o.city || ' ' || o.telephone, ''
+    FROM owners o
+""".format(owner=OWNER)
+
+_INSERT = 'INSERT INTO search_index(rowid, kind, owner_id, title, body, tags) '
+
+DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED, owner_id UNINDEXED, title, body, tags,
+        tokenize = 'porter unicode61'
+    )""",
+
+    f"""CREATE TRIGGER IF NOT EXISTS search_owners_ai AFTER INSERT ON owners BEGIN
+        {_INSERT} {_OWNER_DOC} WHERE o.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_owners_au AFTER UPDATE ON owners BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + {OWNER};
+        {_INSERT} {_OWNER_DOC} WHERE o.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_owners_ad AFTER DELETE ON owners BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + {OWNER};
+    END""",
+
+    f"""CREATE TRIGGER IF NOT EXISTS search_pets_ai AFTER INSERT ON pets BEGIN
+        {_INSERT} {_PET_DOC} WHERE p.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_pets_au AFTER UPDATE ON pets BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + {PET};
+        {_INSERT} {_PET_DOC} WHERE p.id = new.id;
+        DELETE FROM search_index WHERE rowid IN (SELECT id * 4 + {VISIT} FROM visits WHERE pet_id = new.id);
+        {_INSERT} {_VISIT_DOC} WHERE v.pet_id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_pets_ad AFTER DELETE ON pets BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + {PET};
+    END""",
+
+    f"""CREATE TRIGGER IF NOT EXISTS search_visits_ai AFTER INSERT ON visits BEGIN
+        {_INSERT} {_VISIT_DOC} WHERE v.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_visits_au AFTER UPDATE ON visits BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + {VISIT};
+        {_INSERT} {_VISIT_DOC} WHERE v.id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_visits_ad AFTER DELETE ON visits BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + {VISIT};
+    END""",
+
+    f"""CREATE TRIGGER IF NOT EXISTS search_types_au AFTER UPDATE OF name ON types BEGIN
+        DELETE FROM search_index WHERE rowid IN (SELECT id * 4 + {PET} FROM pets WHERE type_id = new.id);
+        {_INSERT} {_PET_DOC} WHERE p.type_id = new.id;
+        DELETE FROM search_index WHERE rowid IN (
+            SELECT v.id * 4 + {VISIT} FROM visits v JOIN pets p ON p.id = v.pet_id WHERE p.type_id = new.id);
+        {_INSERT} {_VISIT_DOC} WHERE p.type_id = new.id;
+    END""",
+]
+
+
+# engine -> whether the search index is available (is_available)
+_available = weakref.WeakKeyDictionary()
+
+TRIGGERS = [
+    'search_owners_ai', 'search_owners_au', 'search_owners_ad',
+    'search_pets_ai', 'search_pets_au', 'search_pets_ad',
+    'search_visits_ai', 'search_visits_au', 'search_visits_ad',
+    'search_types_au',
+]
+
+
+def _compiled_with_fts5():
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    return 'ENABLE_FTS5' in set(db.session.execute(db.text('PRAGMA compile_options')).scalars())
+
+
+def is_available():
+    """
+    Return True if the database supports the FTS5 search index. Checked once
+    per engine; builds the index if revision 2 ran on a build without FTS5.
+    """
+    engine = db.engine
+    available = _available.get(engine)
+    if available is None:
+        available = _compiled_with_fts5()
+        if available and not _index_exists():
+            create_search_index()
+            db.session.commit()
+        _available[engine] = available
+    return available
+
+
+def _index_exists():
+    return db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")).first() is not None
+
+
+def create_search_index():
+    """Schema revision 2: create the index and its triggers, then (re)build it."""
+    if not _compiled_with_fts5():
+        return
+    for statement in DDL:
+        db.session.execute(db.text(statement))
+    rebuild()
+
+
+def rebuild():
+    """Repopulate the whole index from the source tables."""
+    db.session.execute(db.text('DELETE FROM search_index'))
+    for doc in (_OWNER_DOC, _PET_DOC, _VISIT_DOC):
+        db.session.execute(db.text(_INSERT + doc))
+
+
+def match_expression(text):
+    """
+    Turn free text into a safe FTS5 query: every word must match, and the
+    last word is treated as a prefix so results appear while typing.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(text, kind=None, limit=20):
+    """Return ranked matches as dicts with kind, id, ownerId, title and snippet."""
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    sql = f"""
+        SELECT rowid, kind, owner_id, title,
+               snippet(search_index, -1, '[', ']', '...', 12) AS snippet,
+               {RANK} AS rank
+        FROM search_index
+        WHERE search_index MATCH :expression
+    """
+    params = {'expression': expression, 'limit': limit}
+    if kind:
+        sql += ' AND kind = :kind'
+        params['kind'] = kind
+    sql += ' ORDER BY rank LIMIT :limit'
+    rows = db.session.execute(db.text(sql), params)
+    return [
+        {
+            'kind': row.kind,
+            'id': row.rowid // 4,
+            'ownerId': row.owner_id,
+            'title': row.title,
+            'snippet': row.snippet,
+            'rank': row.rank,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,197 @@
+"""
+Response cache shared by the worker processes of one host.
+
+GET responses of the REST API views decorated with `versioned()` (owners
+with their pets, the vets directory, pet types, ...) are stored, serialized,
+in one SQLite file (SHARED_CACHE_PATH) opened by every worker: a payload
+rendered by one worker is served by all of them, and a new worker starts
+warm. The file is memory-mapped (PRAGMA mmap_size), so a hit is a B-tree
+lookup in the page cache shared by all processes. Durability is off: the
+file only holds copies and may be deleted at any time.
+
+Entries are keyed by request path and query string, and tagged with the
+request's ETag, which is derived from the DataVersion counters the view
+depends on. Every ORM write bumps those counters in its transaction
+(app.versioning), so once a write handler commits, the next lookup finds a
+different ETag and treats the entry as a miss; the fresh response then
+replaces it. Keys are namespaced by the database URI and a random
+'cache_epoch' stored in the database, so a recreated database never sees
+the entries of its predecessor.
+
+Eviction is LRU by bytes: storing an entry that takes the total over
+SHARED_CACHE_SIZE_MB removes the least recently used entries down to 90%
+of it. Hits refresh an entry's last-use time at most once per TOUCH_INTERVAL
+seconds, so hot keys do not turn every read into a write. Responses larger
+than SHARED_CACHE_MAX_ENTRY_KB are not stored, and any error of the cache
+file makes the lookup a miss.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from flask import current_app, request
+from sqlalchemy.exc import IntegrityError
+
+from app import db, metrics
+from app.models import DataVersion
+
+logger = logging.getLogger(__name__)
+
+TOUCH_INTERVAL = 1.0
+# Headers a cached response is rebuilt with (pagination links)
+HEADERS = ('Link',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    mimetype TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals VALUES ('bytes', 0);
+"""
+
+
+class SharedCache:
+    """LRU store of serialized responses in a SQLite file shared between processes."""
+
+    def __init__(self, path, size, max_entry, namespace):
+        self.path = path
+        self.size = size
+        self.max_entry = max_entry
+        self.namespace = namespace
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')
+            connection.execute(f'PRAGMA mmap_size = {self.size * 2}')
+            connection.executescript(SCHEMA)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def key(self, path):
+        return f'{self.namespace}:{path}'
+
+    def get(self, key, etag):
+        """(mimetype, {header: value}, body) stored for `key` with `etag`, or None."""
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT etag, mimetype, headers, body, last_used FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] != etag:
+            return None
+        now = time.time()
+        if now - row[4] > TOUCH_INTERVAL:
+            connection.execute('UPDATE entries SET last_used = ? WHERE key = ?', (now, key))
+        headers = dict(line.split(': ', 1) for line in row[2].splitlines())
+        return row[1], headers, row[3]
+
+    def set(self, key, etag, mimetype, headers, body):
+        """Store a response, evicting the least recently used entries beyond the size cap."""
+        size = len(key) + len(body)
+        if size > self.max_entry:
+            return
+        headers = '\n'.join(f'{name}: {value}' for name, value in headers.items())
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            previous = connection.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (key, etag, mimetype, headers, body, size, time.time()))
+            connection.execute("UPDATE totals SET value = value + ? WHERE name = 'bytes'",
+                               (size - (previous[0] if previous else 0),))
+            total = connection.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+            if total > self.size:
+                self._evict(connection, total - int(self.size * 0.9))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _evict(self, connection, excess):
+        victims, freed = [], 0
+        for key, size in connection.execute('SELECT key, size FROM entries ORDER BY last_used'):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        connection.executemany('DELETE FROM entries WHERE key = ?', victims)
+        connection.execute("UPDATE totals SET value = value - ? WHERE name = 'bytes'", (freed,))
+
+    def clear(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM entries')
+        connection.execute("UPDATE totals SET value = 0 WHERE name = 'bytes'")
+
+
+def _request_key():
+    args = '&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))
+    return request.path + '?' + args
+
+
+def lookup(etag):
+    """The cached response of the current GET request for `etag`, or None."""
+    cache = current_app.extensions.get('shared_cache')
+    if cache is None or request.method != 'GET':
+        return None
+    try:
+        entry = cache.get(cache.key(_request_key()), etag)
+    except sqlite3.Error as error:
+        logger.warning('Shared cache lookup failed: %s', error)
+        entry = None
+    metrics.inc('petclinic_cache_requests_total', cache='shared', result='hit' if entry else 'miss')
+    if entry is None:
+        return None
+    mimetype, headers, body = entry
+    response = current_app.response_class(body, mimetype=mimetype)
+    response.headers.update(headers)
+    return response
+
+
+def store(etag, response):
+    """Keep the 200 response of the current GET request for `etag`."""
+    cache = current_app.extensions.get('shared_cache')
+    if cache is None or request.method != 'GET' or response.status_code != 200 or response.is_streamed:
+        return
+    headers = {name: response.headers[name] for name in HEADERS if name in response.headers}
+    try:
+        cache.set(cache.key(_request_key()), etag, response.mimetype, headers, response.get_data())
+    except sqlite3.Error as error:
+        logger.warning('Shared cache store failed: %s', error)
+
+
+def _epoch():
+    """This database's 'cache_epoch', chosen at random the first time."""
+    epoch = DataVersion.get('cache_epoch')
+    if not epoch:
+        try:
+            db.session.add(DataVersion(name='cache_epoch', version=random.randint(1, 2 ** 31 - 1)))
+            db.session.commit()
+        except IntegrityError:  # another worker got there first
+            db.session.rollback()
+        epoch = DataVersion.get('cache_epoch')
+    return epoch
+
+
+def init_app(app):
+    """Open the shared cache when SHARED_CACHE is set (call in an app context, after schema.upgrade)."""
+    if not app.config.get('SHARED_CACHE'):
+        return
+    database = hashlib.sha1(app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8')).hexdigest()[:12]
+    app.extensions['shared_cache'] = SharedCache(
+        app.config['SHARED_CACHE_PATH'], app.config['SHARED_CACHE_SIZE_MB'] * 1024 * 1024,
+        app.config['SHARED_CACHE_MAX_ENTRY_KB'] * 1024, f'{database}:{_epoch()}')
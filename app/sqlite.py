@@ -0,0 +1,87 @@
+"""
+Production profile for SQLite databases.
+
+`init_app()` applies the SQLITE_PRAGMAS from the config on every new
+connection (WAL journal, synchronous level, mmap, cache size, busy timeout,
+temp store) and wraps every view that accepts POST/PUT/DELETE so that a
+transaction failing with SQLITE_BUSY ("database is locked") is rolled back
+and the whole view is retried with jittered exponential backoff.
+
+Nothing is changed when the configured database is not SQLite.
+"""
+
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+WRITE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+def init_app(app):
+    """Install the connection pragmas and the busy-retry wrapper on `app`."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = dict(app.config.get('SQLITE_PRAGMAS') or {})
+    if pragmas:
+        event.listen(engine, 'connect', lambda dbapi_connection, record: apply_pragmas(dbapi_connection, pragmas))
+
+    if app.config.get('SQLITE_BUSY_RETRIES'):
+        for rule in app.url_map.iter_rules():
+            if rule.methods & WRITE_METHODS:
+                view = app.view_functions[rule.endpoint]
+                if not getattr(view, 'retries_on_busy', False):
+                    app.view_functions[rule.endpoint] = retry_on_busy(view)
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Execute `PRAGMA name = value` for each configured pragma."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def is_busy(error):
+    """Return True if `error` is SQLITE_BUSY / SQLITE_LOCKED."""
+    orig = getattr(error, 'orig', error)
+    if not isinstance(orig, sqlite3.OperationalError):
+        return False
+    code = getattr(orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED)
+    return 'locked' in str(orig) or 'busy' in str(orig)
+
+
+def retry_on_busy(view):
+    """Retry `view` after a rollback when its transaction hits SQLITE_BUSY."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        retries = current_app.config['SQLITE_BUSY_RETRIES']
+        backoff = current_app.config['SQLITE_BUSY_BACKOFF']
+        attempt = 0
+        while True:
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as error:
+                if attempt >= retries or not is_busy(error):
+                    raise
+                db.session.rollback()
+                time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.0))
+                attempt += 1
+    wrapper.retries_on_busy = True
+    return wrapper
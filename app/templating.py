@@ -0,0 +1,57 @@
+"""
+Precompiled Jinja templates.
+
+`flask compile-templates` compiles every template into the bytecode cache
+directory JINJA_BYTECODE_CACHE_DIR; the deployment package ships that
+directory, so the first render of each page after a cold start loads
+bytecode instead of parsing and compiling the template. Cache entries are
+keyed by template name only (not by absolute path), so they stay valid
+when the package is unpacked somewhere else, and Jinja discards any entry
+whose source checksum or Python version does not match.
+"""
+
+import os
+
+import click
+from jinja2 import FileSystemBytecodeCache
+
+
+class PortableBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache that ignores the template's absolute path and read-only filesystems."""
+
+    def get_cache_key(self, name, filename=None):
+        return super().get_cache_key(name)
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            # e.g. a read-only package mount: keep serving, just without caching
+            pass
+
+
+def init_app(app):
+    """Use the precompiled cache if it exists and register `flask compile-templates`."""
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if directory and os.path.isdir(directory):
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': PortableBytecodeCache(directory)}
+
+    @app.cli.command('compile-templates')
+    def compile_templates_command():
+        """Compile all Jinja templates into JINJA_BYTECODE_CACHE_DIR."""
+        count = compile_templates(app)
+        click.echo(f"Compiled {count} templates into {app.config['JINJA_BYTECODE_CACHE_DIR']}")
+
+
+def compile_templates(app):
+    """Fill the bytecode cache with every template the app can load. Returns the count."""
+    directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    cache = PortableBytecodeCache(directory)
+    cache.clear()
+    environment = app.create_jinja_environment()
+    environment.bytecode_cache = cache
+    names = environment.list_templates()
+    for name in names:
+        environment.get_template(name)
+    return len(names)
@@ -0,0 +1,67 @@
+"""
+Automatic DataVersion bumps for every ORM write.
+
+Before each flush the pending inserts, updates and deletes are mapped to the
+data sets they affect, and the matching DataVersion counters are incremented
+in the same transaction. Collection counters are named after the resource
+('owners', 'pets', ...); an owner's whole graph (pets and visits included)
+is tracked by 'owner:<id>', a single vet by 'vet:<id>' and a vet's
+appointments by 'schedule:<vet id>'.
+
+Writes that bypass the ORM unit of work (Core inserts) must call
+DataVersion.bump() themselves.
+"""
+
+from sqlalchemy import event, inspect
+
+from app import db
+from app.models import Appointment, DataVersion, Owner, Pet, PetType, Specialty, Vet, Visit
+
+
+def _previous(obj, attr):
+    """Return the committed value of `attr` if it changed in this flush."""
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+
+def _pet_owner_ids(session, pet_id):
+    if pet_id is None:
+        return set()
+    pet = session.get(Pet, pet_id)
+    return {pet.owner_id} if pet is not None else set()
+
+
+def affected_versions(session, obj):
+    """Return the DataVersion names affected by writing `obj`."""
+    if isinstance(obj, Owner):
+        return {'owners', f'owner:{obj.id}'} if obj.id is not None else {'owners'}
+    if isinstance(obj, Pet):
+        owner_ids = {obj.owner_id, _previous(obj, 'owner_id')}
+        return {'owners', 'pets'} | {f'owner:{i}' for i in owner_ids if i is not None}
+    if isinstance(obj, Visit):
+        owner_ids = _pet_owner_ids(session, obj.pet_id) | _pet_owner_ids(session, _previous(obj, 'pet_id'))
+        return {'owners', 'pets', 'visits'} | {f'owner:{i}' for i in owner_ids if i is not None}
+    if isinstance(obj, PetType):
+        return {'types'}
+    if isinstance(obj, Specialty):
+        return {'specialties', 'vets'}
+    if isinstance(obj, Vet):
+        return {'vets', f'vet:{obj.id}'} if obj.id is not None else {'vets'}
+    if isinstance(obj, Appointment):
+        vet_ids = {obj.vet_id, _previous(obj, 'vet_id')}
+        return {'appointments'} | {f'schedule:{i}' for i in vet_ids if i is not None}
+    return set()
+
+
+@event.listens_for(db.session, 'before_flush')
+def bump_data_versions(session, flush_context, instances):
+    names = set()
+    for obj in session.new:
+        names |= affected_versions(session, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            names |= affected_versions(session, obj)
+    for obj in session.deleted:
+        names |= affected_versions(session, obj)
+    if names:
+        DataVersion.bump(*names)
@@ -0,0 +1,130 @@
+"""
+Precomputed vets directory, shared by /vets, /vets.html and /api/vets.
+
+Each worker keeps every vet with its resolved specialties, the serialized
+API dicts, the ready-made /vets JSON body and the JSON bytes of each vet
+(for /api/vets pages) in memory, and checks the
+'vets' DataVersion once per request. When it changed, the directory is
+rebuilt incrementally: only vets whose 'vet:<id>' counter moved (or that
+are new) are re-read, vanished ones are dropped, and the vet_specialties
+association is re-read for those vets only, or entirely when the
+specialties changed. Specialty names come from app.reference_data.
+"""
+
+import threading
+from collections import namedtuple
+
+from flask import current_app, g
+from flask_sqlalchemy.pagination import Pagination
+
+from app import db, metrics, reference_data
+from app.models import DataVersion, Vet, vet_specialties
+
+VetEntry = namedtuple('VetEntry', 'id first_name last_name specialties')
+SpecialtyEntry = namedtuple('SpecialtyEntry', 'id name')
+
+_lock = threading.Lock()
+
+
+class ListPagination(Pagination):
+    """Flask-SQLAlchemy pagination over an in-memory list (`items=`)."""
+
+    def _query_items(self):
+        start = self._query_offset
+        return self._query_args['items'][start:start + self.per_page]
+
+    def _query_count(self):
+        return len(self._query_args['items'])
+
+
+class VetsDirectory:
+    """An immutable snapshot of all vets, ordered by id."""
+
+    def __init__(self, version, specialties_version, rows):
+        from app.api.schemas import serialize_vet
+
+        self.version = version
+        self.specialties_version = specialties_version
+        # rows: {vet_id: (counter, first_name, last_name, specialty_ids)}
+        self.rows = rows
+        self.ids = sorted(rows)
+        self.vets = []
+        for vet_id in self.ids:
+            _, first_name, last_name, specialty_ids = rows[vet_id]
+            resolved = (reference_data.specialties.get(i) for i in specialty_ids)
+            self.vets.append(VetEntry(vet_id, first_name, last_name,
+                                      [SpecialtyEntry(s['id'], s['name']) for s in resolved if s]))
+        self.data = [serialize_vet(vet) for vet in self.vets]
+        self.json = current_app.json.response({'vets': self.data}).get_data()
+        # compact JSON of each vet, joined into /api/vets pages
+        self.items = [current_app.json.dumps(vet, separators=(',', ':')).encode('utf-8') for vet in self.data]
+
+    def paginate(self, page, per_page):
+        return ListPagination(page=page, per_page=per_page, error_out=False, items=self.vets)
+
+
+def _specialty_ids(vet_ids=None):
+    """{vet_id: [specialty_id, ...]} from the association table (all vets if None)."""
+    query = db.select(vet_specialties.c.vet_id, vet_specialties.c.specialty_id) \
+        .order_by(vet_specialties.c.vet_id, vet_specialties.c.specialty_id)
+    if vet_ids is not None:
+        query = query.where(vet_specialties.c.vet_id.in_(vet_ids))
+    result = {}
+    for vet_id, specialty_id in db.session.execute(query):
+        result.setdefault(vet_id, []).append(specialty_id)
+    return result
+
+
+def _rebuild(previous, version, specialties_version):
+    counters = dict(db.session.execute(
+        db.select(DataVersion.name, DataVersion.version).where(DataVersion.name.like('vet:%'))).all())
+    ids = db.session.scalars(db.select(Vet.id)).all()
+    old_rows = previous.rows if previous is not None else {}
+
+    stale = [vet_id for vet_id in ids
+             if vet_id not in old_rows or old_rows[vet_id][0] != counters.get(f'vet:{vet_id}', 0)]
+    names = {}
+    if stale:
+        query = db.select(Vet.id, Vet.first_name, Vet.last_name).where(Vet.id.in_(stale))
+        names = {row.id: (row.first_name, row.last_name) for row in db.session.execute(query)}
+
+    reload_all = previous is None or previous.specialties_version != specialties_version
+    if reload_all:
+        associations = _specialty_ids()
+    else:
+        associations = _specialty_ids(stale) if stale else {}
+
+    rows = {}
+    for vet_id in ids:
+        if vet_id in names:
+            first_name, last_name = names[vet_id]
+            counter = counters.get(f'vet:{vet_id}', 0)
+        else:
+            counter, first_name, last_name, specialty_ids = old_rows[vet_id]
+            if not reload_all:
+                associations[vet_id] = specialty_ids
+        rows[vet_id] = (counter, first_name, last_name, tuple(associations.get(vet_id, ())))
+    return VetsDirectory(version, specialties_version, rows)
+
+
+def current():
+    """Return the up-to-date VetsDirectory for this worker."""
+    versions = g.setdefault('reference_versions', {})
+    for name in ('vets', 'specialties'):
+        if name not in versions:
+            versions[name] = DataVersion.get(name)
+
+    directory = current_app.extensions.get('vets_directory')
+    if directory is not None and directory.version == versions['vets'] \
+            and directory.specialties_version == versions['specialties']:
+        metrics.inc('petclinic_cache_requests_total', cache='vets_directory', result='hit')
+        return directory
+
+    metrics.inc('petclinic_cache_requests_total', cache='vets_directory', result='miss')
+    with _lock:
+        directory = current_app.extensions.get('vets_directory')
+        if directory is None or directory.version != versions['vets'] \
+                or directory.specialties_version != versions['specialties']:
+            directory = _rebuild(directory, versions['vets'], versions['specialties'])
+            current_app.extensions['vets_directory'] = directory
+    return directory
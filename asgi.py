@@ -0,0 +1,12 @@
+"""
+ASGI entry point for high-concurrency deployments:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+Serves the same Flask application as run.py; see app/asgi.py.
+"""
+
+from app import create_app
+from app.asgi import ASGIAdapter
+
+app = ASGIAdapter(create_app())
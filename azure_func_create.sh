@@ -53,6 +53,9 @@ az functionapp config appsettings delete \
 # Deploy the function app
 rm -rf function.zip
 
+# Precompile the Jinja templates into jinja_cache/ so it ships in the package
+FLASK_APP=run.py flask compile-templates
+
 zip -r function.zip . \
     -x "*.git*" \
     -x "*__pycache__*" \
@@ -0,0 +1,162 @@
+"""
+Throughput and latency under many concurrent keep-alive connections,
+comparing the WSGI deployment (gunicorn, 2 sync workers, as in the
+Dockerfile) with the ASGI mode (uvicorn asgi:app, 2 workers).
+
+Each connection issues GET /api/owners/<id> requests back to back on one
+keep-alive socket (reconnecting when the server closes it). A share of
+the connections are slow clients that trickle their request headers out
+byte by byte, which ties up a sync worker but only a coroutine in ASGI mode.
+
+    python benchmarks/asgi_concurrency.py --connections 1000 --seconds 20
+
+Needs gunicorn and uvicorn on PATH, and an open-files limit above the
+connection count (ulimit -n).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MODES = {
+    'wsgi (gunicorn)': ['gunicorn', '--bind', '127.0.0.1:{port}', '--workers', '2', 'app:create_app()'],
+    'asgi (uvicorn)': ['uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', '{port}', '--workers', '2',
+                       '--log-level', 'warning'],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, keep_alive)."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def client(port, owners, deadline, slow, stats, rng):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            request = (f'GET /api/owners/{rng.randint(1, owners)} HTTP/1.1\r\n'
+                       f'Host: 127.0.0.1:{port}\r\nConnection: keep-alive\r\n\r\n').encode()
+            started = time.monotonic()
+            if slow:
+                for i in range(0, len(request), 8):
+                    writer.write(request[i:i + 8])
+                    await writer.drain()
+                    await asyncio.sleep(0.05)
+            else:
+                writer.write(request)
+                await writer.drain()
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout=30)
+            if not slow:
+                stats['latencies'].append(time.monotonic() - started)
+            stats['ok' if status < 400 else 'errors'] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+            stats['errors'] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.1)
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, args):
+    stats = {'ok': 0, 'errors': 0, 'latencies': []}
+    deadline = time.monotonic() + args.seconds
+    rng = random.Random(1)
+    slow = int(args.connections * args.slow_share)
+    await asyncio.gather(*[
+        client(port, args.owners, deadline, i < slow, stats, random.Random(rng.random()))
+        for i in range(args.connections)
+    ])
+    latencies = sorted(stats['latencies']) or [float('nan')]
+    return {
+        'req/s': stats['ok'] / args.seconds,
+        'errors': stats['errors'],
+        'p50 ms': statistics.median(latencies) * 1000,
+        'p99 ms': latencies[int(len(latencies) * 0.99) - 1 if len(latencies) > 1 else 0] * 1000,
+    }
+
+
+def run_mode(name, command, uri, args):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=uri, REQUEST_TIMING='0')
+    server = subprocess.Popen([part.format(port=port) for part in command], cwd=ROOT, env=env)
+    try:
+        wait_for_port(port)
+        return asyncio.run(load(port, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--owners', type=int, default=10000)
+    parser.add_argument('--slow-share', type=float, default=0.05,
+                        help='fraction of connections that send their requests slowly (default 0.05)')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    uri = 'sqlite:///' + path
+    subprocess.run([sys.executable, 'init_db.py', '--scale', str(args.owners)], cwd=ROOT,
+                   env=dict(os.environ, DATABASE_URL=uri), check=True)
+
+    results = {}
+    for name, command in MODES.items():
+        if shutil.which(command[0]) is None:
+            print(f'skipping {name}: {command[0]} is not installed')
+            continue
+        results[name] = run_mode(name, command, uri, args)
+    if not results:
+        return
+    columns = list(next(iter(results.values())))
+    print(f"{'mode':20}" + ''.join(f'{c:>12}' for c in columns))
+    for name, row in results.items():
+        print(f'{name:20}' + ''.join(f'{row[c]:12.1f}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
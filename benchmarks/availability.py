@@ -0,0 +1,166 @@
+"""
+Latency of "first free vet with specialty X between T1 and T2".
+
+Seeds --vets vets spread over --specialties specialties and books about
+--fill of their slots over the next --days days, then answers random
+availability queries (specialty, window of 1-7 days, 15-120 minutes) by:
+
+    index    scheduling.first_available(), the per-vet interval index
+    sql      one query for the window's appointments of the candidate vets
+             (ix_appointments_vet_id_starts_at), gaps searched in Python
+    api      GET /api/appointments/availability through the test client
+
+and also times booking through POST /api/appointments.
+
+    python benchmarks/availability.py --vets 200 --days 30 --queries 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def seed(app, args, rng):
+    from app import db, scheduling
+    from app.models import Appointment, Owner, Pet, Specialty, Vet, Visit, vet_specialties
+    with app.app_context():
+        db.session.execute(Specialty.__table__.insert(), [
+            {'id': i, 'name': f'specialty{i}'} for i in range(1, args.specialties + 1)])
+        db.session.execute(Vet.__table__.insert(), [
+            {'id': i, 'first_name': 'Vet', 'last_name': f'Name{i}'} for i in range(1, args.vets + 1)])
+        db.session.execute(vet_specialties.insert(), [
+            {'vet_id': i, 'specialty_id': (i % args.specialties) + 1} for i in range(1, args.vets + 1)])
+        db.session.execute(Owner.__table__.insert(), [
+            {'id': 1, 'first_name': 'Owner', 'last_name': 'Name', 'last_name_key': 'name',
+             'address': 'Main St.', 'city': 'Madison', 'telephone': '6085550000'}])
+        db.session.execute(Pet.__table__.insert(), [{'id': 1, 'name': 'Pet', 'owner_id': 1}])
+
+        hours = scheduling.opening_hours()
+        slot = hours.slot
+        visits, appointments = [], []
+        for vet_id in range(1, args.vets + 1):
+            for offset in range(1, args.days + 1):
+                opening, closing = hours.span(date.today() + timedelta(days=offset))
+                start = opening
+                while start < closing:
+                    length = slot * rng.choice((1, 2, 4))
+                    if start + length <= closing and rng.random() < args.fill:
+                        visits.append({'id': len(visits) + 1, 'pet_id': 1, 'date': start.date(),
+                                       'description': 'seed'})
+                        appointments.append({'vet_id': vet_id, 'visit_id': len(visits),
+                                             'starts_at': start, 'ends_at': start + length})
+                    start += length
+        db.session.execute(Visit.__table__.insert(), visits)
+        db.session.execute(Appointment.__table__.insert(), appointments)
+        db.session.commit()
+        return len(appointments)
+
+
+def first_available_sql(vet_ids, start, end, duration):
+    """The same answer as scheduling.first_available(), read from the database per query."""
+    from flask import current_app
+    from app import db, scheduling
+    from app.models import Appointment
+    hours = scheduling.opening_hours()
+    longest = timedelta(minutes=current_app.config['APPOINTMENT_MAX_MINUTES'])
+    rows = db.session.execute(
+        db.select(Appointment.vet_id, Appointment.starts_at, Appointment.ends_at)
+        .where(Appointment.vet_id.in_(vet_ids), Appointment.starts_at > start - longest,
+               Appointment.starts_at < end)
+        .order_by(Appointment.vet_id, Appointment.starts_at))
+    booked = {}
+    for vet_id, starts_at, ends_at in rows:
+        starts, ends = booked.setdefault(vet_id, ([], []))
+        starts.append(starts_at)
+        ends.append(ends_at)
+    best = None
+    for vet_id in vet_ids:
+        schedule = scheduling.VetSchedule(0, *booked.get(vet_id, ((), ())))
+        slot = schedule.first_free(start, end, duration, hours)
+        if slot is not None and (best is None or slot < best[0]):
+            best = (slot, vet_id)
+    return best
+
+
+def queries(args, rng):
+    result = []
+    for _ in range(args.queries):
+        start = datetime.combine(date.today() + timedelta(days=rng.randint(1, args.days)), datetime.min.time()) \
+            + timedelta(hours=rng.randint(6, 17))
+        result.append((rng.randint(1, args.specialties), start, start + timedelta(days=rng.randint(1, 7)),
+                       timedelta(minutes=rng.choice((15, 30, 60, 120)))))
+    return result
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vets', type=int, default=200)
+    parser.add_argument('--specialties', type=int, default=5)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--fill', type=float, default=0.9, help='share of the slots booked')
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['REQUEST_TIMING'] = '0'
+    from app import create_app, scheduling
+    app = create_app()
+    rng = random.Random(42)
+    with app.test_request_context():
+        booked = seed(app, args, rng)
+    print(f'{args.vets} vets, {booked} appointments over {args.days} days')
+
+    work = queries(args, rng)
+    with app.app_context():
+        started = time.perf_counter()
+        scheduling.current()
+        print(f'index build: {(time.perf_counter() - started) * 1000:.1f} ms')
+
+        results = {}
+        for name, find in (('index', scheduling.first_available), ('sql', first_available_sql)):
+            samples, answers = [], []
+            for specialty_id, start, end, duration in work:
+                began = time.perf_counter()
+                answers.append(find(scheduling.vets_with_specialty(specialty_id), start, end, duration))
+                samples.append((time.perf_counter() - began) * 1000)
+            results[name] = answers
+            print(f'{name:8} p50 {percentiles(samples)[0]:8.3f} ms   p99 {percentiles(samples)[1]:8.3f} ms')
+        assert results['index'] == results['sql']
+
+    client = app.test_client()
+    samples = []
+    for specialty_id, start, end, duration in work:
+        began = time.perf_counter()
+        response = client.get('/api/appointments/availability', query_string={
+            'specialty': specialty_id, 'from': start.isoformat(), 'to': end.isoformat(),
+            'duration': duration.seconds // 60})
+        samples.append((time.perf_counter() - began) * 1000)
+        assert response.status_code in (200, 404)
+    print(f"{'api':8} p50 {percentiles(samples)[0]:8.3f} ms   p99 {percentiles(samples)[1]:8.3f} ms")
+
+    samples, statuses = [], []
+    for specialty_id, start, end, duration in work:
+        began = time.perf_counter()
+        response = client.post('/api/appointments', json={
+            'specialty': specialty_id, 'petId': 1, 'start': start.replace(hour=rng.randint(8, 16)).isoformat(),
+            'description': 'benchmark'})
+        samples.append((time.perf_counter() - began) * 1000)
+        statuses.append(response.status_code)
+    print(f"{'booking':8} p50 {percentiles(samples)[0]:8.3f} ms   p99 {percentiles(samples)[1]:8.3f} ms"
+          f"   ({statuses.count(201)} booked, {statuses.count(409)} taken)")
+
+
+if __name__ == '__main__':
+    main()
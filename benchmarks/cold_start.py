@@ -0,0 +1,72 @@
+"""
+Cold-start cost of the application as seen by the Azure Functions entry
+point: import + create_app(), then the first HTML page and the first API
+request, each measured in a fresh interpreter. Compares running without
+the Jinja bytecode cache against the cache built by
+`flask compile-templates`.
+
+    python benchmarks/cold_start.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get('/owners/1')
+html = time.perf_counter()
+client.get('/api/owners/1')
+api = time.perf_counter()
+print(json.dumps({'create_app': created - started, 'first page': html - created, 'first API call': api - html}))
+"""
+
+
+def probe(env):
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db'), REQUEST_TIMING='0')
+    subprocess.run([sys.executable, 'init_db.py'], cwd=ROOT, env=env, check=True, capture_output=True)
+
+    cache_dir = os.path.join(workdir, 'jinja_cache')
+    subprocess.run([sys.executable, '-m', 'flask', 'compile-templates'], cwd=ROOT, check=True, capture_output=True,
+                   env=dict(env, FLASK_APP='run.py', JINJA_BYTECODE_CACHE_DIR=cache_dir))
+
+    profiles = {
+        'no template cache': dict(env, JINJA_BYTECODE_CACHE_DIR=os.path.join(workdir, 'missing')),
+        'precompiled': dict(env, JINJA_BYTECODE_CACHE_DIR=cache_dir),
+    }
+    results = {}
+    for name, profile_env in profiles.items():
+        probe(profile_env)  # warm the OS file cache and .pyc files
+        runs = [probe(profile_env) for _ in range(args.runs)]
+        results[name] = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+
+    columns = list(next(iter(results.values())))
+    print(f"{'median ms':20}" + ''.join(f'{c:>16}' for c in columns))
+    for name, row in results.items():
+        print(f'{name:20}' + ''.join(f'{row[c]:16.1f}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Write throughput of POST /api/visits with and without group commit.
+
+Client threads of one worker process post visits through the Flask test
+client for --seconds each, first with one transaction per request and
+then with GROUP_COMMIT (app/group_commit.py), once per SQLite
+synchronous level (FULL syncs every commit, NORMAL only at WAL checkpoints).
+
+    python benchmarks/group_commit.py --threads 32 --seconds 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+MODES = {
+    'per request': {'GROUP_COMMIT': False},
+    'group commit': {'GROUP_COMMIT': True},
+}
+
+
+def make_app(uri, overrides):
+    from config import Config
+    from app import create_app
+    config = type('BenchmarkConfig', (Config,), dict(overrides, SQLALCHEMY_DATABASE_URI=uri))
+    return create_app(config)
+
+
+def seed(app, pets):
+    from app import db
+    from app.models import Owner, Pet
+    with app.app_context():
+        db.session.execute(Owner.__table__.insert(), [
+            {'id': i, 'first_name': 'Owner', 'last_name': f'Name{i}', 'last_name_key': f'name{i}',
+             'address': 'Main St.', 'city': 'Madison', 'telephone': '6085550000'}
+            for i in range(1, pets + 1)])
+        db.session.execute(Pet.__table__.insert(), [
+            {'id': i, 'name': 'Pet', 'owner_id': i, 'type_id': None} for i in range(1, pets + 1)])
+        db.session.commit()
+
+
+def client_thread(app, pets, deadline, samples):
+    client = app.test_client()
+    rng = random.Random(threading.get_ident())
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = client.post('/api/visits', json={
+            'petId': rng.randint(1, pets), 'description': 'benchmark', 'date': '2024-01-01'})
+        samples.append((response.status_code < 400, time.perf_counter() - started))
+
+
+def run(mode, synchronous, args):
+    from config import Config
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    pragmas = dict(Config.SQLITE_PRAGMAS, synchronous=synchronous)
+    app = make_app('sqlite:///' + path, dict(MODES[mode], SQLITE_PRAGMAS=pragmas, REQUEST_TIMING=False))
+    seed(app, args.pets)
+
+    samples = []
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=client_thread, args=(app, args.pets, deadline, samples))
+               for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    latencies = sorted(latency for _, latency in samples)
+    successes = sum(ok for ok, _ in samples)
+    return {
+        'writes/s': successes / args.seconds,
+        'errors': len(samples) - successes,
+        'p50 ms': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'p99 ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--pets', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'synchronous':12} {'mode':14}" + ''.join(f'{c:>10}' for c in ('writes/s', 'errors', 'p50 ms', 'p99 ms')))
+    for synchronous in ('FULL', 'NORMAL'):
+        for mode in MODES:
+            row = run(mode, synchronous, args)
+            print(f'{synchronous:12} {mode:14}' + ''.join(f'{value:10.1f}' for value in row.values()))
+
+
+if __name__ == '__main__':
+    main()
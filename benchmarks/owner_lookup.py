@@ -0,0 +1,120 @@
+"""
+Before/after benchmark for the lookup indexes added in schema revision 1.
+
+Builds a synthetic SQLite database (1M owners by default), then times the
+owner last-name search, an owner's pets and a pet's visits, first with the
+secondary indexes dropped ("before") and then with them in place ("after").
+
+    python benchmarks/owner_lookup.py --owners 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+SYLLABLES = ['an', 'ber', 'cha', 'da', 'el', 'fra', 'gor', 'hal', 'in', 'jo',
+             'ka', 'lin', 'mar', 'no', 'or', 'pe', 'qui', 'ros', 'sa', 'ton']
+INDEXES = ['ix_owners_last_name', 'ix_owners_last_name_key', 'ix_pets_owner_id',
+           'ix_visits_date', 'ix_visits_pet_id_date']
+CHUNK = 50000
+
+
+def populate(db, owners, visits_per_pet, seed):
+    from app.models import Owner, Pet, Visit, normalize_name
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    for first in range(1, owners + 1, CHUNK):
+        ids = range(first, min(first + CHUNK, owners + 1))
+        owner_rows, pet_rows, visit_rows = [], [], []
+        for owner_id in ids:
+            last_name = ''.join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+            owner_rows.append({'id': owner_id, 'first_name': 'Owner', 'last_name': last_name,
+                               'last_name_key': normalize_name(last_name), 'address': 'Main St.',
+                               'city': 'Madison', 'telephone': '6085550000'})
+            pet_rows.append({'id': owner_id, 'name': 'Pet', 'owner_id': owner_id, 'type_id': 1})
+            for _ in range(visits_per_pet):
+                visit_rows.append({'pet_id': owner_id, 'description': 'checkup',
+                                   'date': start + timedelta(days=rng.randrange(3650))})
+        db.session.execute(Owner.__table__.insert(), owner_rows)
+        db.session.execute(Pet.__table__.insert(), pet_rows)
+        db.session.execute(Visit.__table__.insert(), visit_rows)
+    db.session.commit()
+
+
+def timed(db, statement, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.session.execute(db.text(statement), params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run_queries(db, owners, repeat, seed):
+    rng = random.Random(seed)
+    owner_id = rng.randrange(1, owners + 1)
+    return {
+        'lastName ILIKE prefix (old search)': timed(
+            db, "SELECT id FROM owners WHERE last_name LIKE :p ORDER BY last_name, id LIMIT 100",
+            {'p': 'Marro%'}, repeat),
+        'last_name_key range (new search)': timed(
+            db, "SELECT id FROM owners WHERE last_name_key >= :k AND last_name_key < :k || char(1114111) "
+                "ORDER BY last_name_key, id LIMIT 100",
+            {'k': 'marro'}, repeat),
+        "owner's pets": timed(
+            db, "SELECT id FROM pets WHERE owner_id = :o", {'o': owner_id}, repeat),
+        "pet's visits by date": timed(
+            db, "SELECT id FROM visits WHERE pet_id = :p ORDER BY date", {'p': owner_id}, repeat),
+        'visits in one week': timed(
+            db, "SELECT count(*) FROM visits WHERE date BETWEEN :a AND :b",
+            {'a': '2020-03-01', 'b': '2020-03-07'}, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--owners', type=int, default=1000000)
+    parser.add_argument('--visits-per-pet', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='keep the generated database')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from app import create_app, db
+    from app.schema import create_indexes
+    app = create_app()
+
+    with app.app_context():
+        started = time.perf_counter()
+        populate(db, args.owners, args.visits_per_pet, args.seed)
+        print(f'populated {args.owners} owners in {time.perf_counter() - started:.1f}s ({path})')
+
+        for name in INDEXES:
+            db.session.execute(db.text(f'DROP INDEX {name}'))
+        db.session.execute(db.text('ANALYZE'))
+        before = run_queries(db, args.owners, args.repeat, args.seed)
+
+        create_indexes(*db.metadata.sorted_tables)
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        after = run_queries(db, args.owners, args.repeat, args.seed)
+
+    print(f"{'query':40} {'before ms':>12} {'after ms':>12}")
+    for name in before:
+        print(f'{name:40} {before[name]:12.3f} {after[name]:12.3f}')
+
+    if not args.keep:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
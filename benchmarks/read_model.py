@@ -0,0 +1,99 @@
+"""
+ORM instances vs. app.read_model records for the read-only API paths.
+
+Builds a synthetic database with init_db's generator, then reads the first
+--rows pets (with their visits) and visits, serializes them, and reports the
+median time and the peak memory (tracemalloc) of each read path:
+
+    orm      with_fields(...).all(), mapped objects in the identity map
+    records  read_model.load(), __slots__ records from Core rows
+    rows     app.api.rows, Core rows serialized straight to dicts (list pages)
+
+    python benchmarks/read_model.py --owners 20000 --rows 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def read_orm(selection, model, serialize, rows):
+    from app.loaders import with_fields
+    items = with_fields(model.query, selection).order_by(model.id).limit(rows).all()
+    return items, [serialize(item, selection=selection) for item in items]
+
+
+def read_records(selection, model, serialize, rows):
+    from app import read_model
+    query = read_model.select_records(selection.resource).order_by(model.id).limit(rows)
+    items = read_model.load(query, selection)
+    return items, [serialize(item, selection=selection) for item in items]
+
+
+def read_rows(selection, model, serialize, rows):
+    from app import db
+    from app.api.rows import select_rows, serialize_rows
+    items = db.session.execute(select_rows(selection).order_by(model.id).limit(rows)).all()
+    return items, serialize_rows(items, selection)
+
+
+def measure(db, read, args, repeat):
+    samples = []
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        read(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    db.session.remove()
+    tracemalloc.start()
+    items, data = read(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(samples), peak, len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--owners', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help='keep the generated database')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    import init_db
+    from app import create_app, db
+    from app.api.fieldsets import FieldSelection
+    from app.api.schemas import serialize_pet, serialize_visit
+    from app.models import Pet, Visit
+
+    init_db.init_scaled_db(args.owners, workers=1)
+    app = create_app()
+
+    cases = [
+        ('/api/pets (with visits)', FieldSelection('pet', {}, ['visits']), Pet, serialize_pet),
+        ('/api/visits', FieldSelection('visit', {}, []), Visit, serialize_visit),
+    ]
+    paths = [('orm', read_orm), ('records', read_records), ('rows', read_rows)]
+
+    print(f"{'endpoint':26} {'path':8} {'rows':>7} {'ms':>9} {'peak KiB':>10} {'B/row':>7}")
+    with app.test_request_context():
+        for name, selection, model, serialize in cases:
+            for label, read in paths:
+                ms, peak, count = measure(db, read, (selection, model, serialize, args.rows), args.repeat)
+                print(f'{name:26} {label:8} {count:7} {ms:9.1f} {peak / 1024:10.0f} {peak // max(count, 1):7}')
+
+    if not args.keep:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
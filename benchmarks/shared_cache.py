@@ -0,0 +1,72 @@
+"""
+Warm-up of new worker processes with and without the shared response cache.
+
+Builds a synthetic database, then starts --workers worker processes one
+after the other, as a gunicorn restart or scale-up would. Each one serves
+the same --requests GETs (owners with their pets, the vets directory, pet
+types) through the Flask test client and reports its median and total
+latency. Without SHARED_CACHE every worker renders every payload itself;
+with it, only the first one does and the others read the shared file.
+
+    python benchmarks/shared_cache.py --owners 20000 --workers 4 --requests 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def worker(shared, paths, results):
+    os.environ['SHARED_CACHE'] = '1' if shared else '0'
+    from app import create_app
+    client = create_app().test_client()
+    samples = []
+    for path in paths:
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, path
+    results.put((statistics.median(samples), sum(samples)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--owners', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--hot', type=int, default=500, help='number of distinct owners requested')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+    os.environ['SHARED_CACHE_PATH'] = os.path.join(directory, 'cache.db')
+    os.environ['REQUEST_TIMING'] = '0'
+    import init_db
+    init_db.init_scaled_db(args.owners, workers=1)
+
+    rng = random.Random(42)
+    owners = rng.sample(range(1, args.owners + 1), args.hot)
+    paths = [rng.choice((f'/api/owners/{rng.choice(owners)}', '/api/vets', '/api/pettypes'))
+             for _ in range(args.requests)]
+
+    print(f"{'cache':8} {'worker':>6} {'p50 ms':>8} {'total ms':>10}")
+    context = multiprocessing.get_context('spawn')
+    for shared in (False, True):
+        for number in range(1, args.workers + 1):
+            results = context.Queue()
+            process = context.Process(target=worker, args=(shared, paths, results))
+            process.start()
+            median, total = results.get()
+            process.join()
+            print(f"{'shared' if shared else 'off':8} {number:6} {median:8.2f} {total:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Read throughput of the REST API under a concurrent write load, comparing
+the default SQLite rollback journal with the production profile from
+config.py (WAL, synchronous=NORMAL, mmap, busy_timeout, busy retries).
+
+Reader processes fetch random owners (GET /api/owners/<id>) while writer
+processes add visits (POST /api/visits), all through the Flask test client
+against the same database file.
+
+    python benchmarks/sqlite_concurrency.py --readers 4 --writers 2 --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+PROFILES = {
+    'rollback journal': {
+        'SQLITE_PRAGMAS': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'SQLITE_BUSY_RETRIES': 0,
+    },
+    'production (WAL)': {},
+}
+
+
+def make_app(uri, overrides):
+    from config import Config
+    from app import create_app
+    config = type('BenchmarkConfig', (Config,), dict(overrides, SQLALCHEMY_DATABASE_URI=uri))
+    return create_app(config)
+
+
+def seed(uri, owners):
+    from app import db
+    from app.models import Owner, Pet
+    app = make_app(uri, {})
+    with app.app_context():
+        db.session.execute(Owner.__table__.insert(), [
+            {'id': i, 'first_name': 'Owner', 'last_name': f'Name{i}', 'last_name_key': f'name{i}',
+             'address': 'Main St.', 'city': 'Madison', 'telephone': '6085550000'}
+            for i in range(1, owners + 1)])
+        db.session.execute(Pet.__table__.insert(), [
+            {'id': i, 'name': 'Pet', 'owner_id': i, 'type_id': None} for i in range(1, owners + 1)])
+        db.session.commit()
+
+
+def worker(role, uri, overrides, owners, seconds, barrier, results):
+    client = make_app(uri, overrides).test_client()
+    rng = random.Random(os.getpid())
+    ok = errors = 0
+    barrier.wait()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        owner_id = rng.randint(1, owners)
+        try:
+            if role == 'reader':
+                response = client.get(f'/api/owners/{owner_id}')
+            else:
+                response = client.post('/api/visits', json={
+                    'petId': owner_id, 'description': 'benchmark', 'date': '2024-01-01'})
+            success = response.status_code < 400
+        except Exception:
+            success = False
+        ok += success
+        errors += not success
+    results.put((role, ok, errors))
+
+
+def run_profile(name, overrides, args):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    uri = 'sqlite:///' + path
+    context = multiprocessing.get_context('spawn')
+    seeder = context.Process(target=seed, args=(uri, args.owners))
+    seeder.start()
+    seeder.join()
+
+    roles = ['reader'] * args.readers + ['writer'] * args.writers
+    barrier = context.Barrier(len(roles))
+    results = context.Queue()
+    workers = [
+        context.Process(target=worker, args=(role, uri, overrides, args.owners, args.seconds, barrier, results))
+        for role in roles
+    ]
+    for process in workers:
+        process.start()
+    counts = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+
+    totals = {'reader': [0, 0], 'writer': [0, 0]}
+    for role, ok, errors in counts:
+        totals[role][0] += ok
+        totals[role][1] += errors
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return {
+        'reads/s': totals['reader'][0] / args.seconds,
+        'read errors': totals['reader'][1],
+        'writes/s': totals['writer'][0] / args.seconds,
+        'write errors': totals['writer'][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--owners', type=int, default=10000)
+    args = parser.parse_args()
+
+    results = {name: run_profile(name, overrides, args) for name, overrides in PROFILES.items()}
+    columns = list(next(iter(results.values())))
+    print(f"{'profile':20}" + ''.join(f'{c:>14}' for c in columns))
+    for name, row in results.items():
+        print(f'{name:20}' + ''.join(f'{row[c]:14.1f}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
+import hashlib
+import importlib.util
 import os
+import tempfile
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -15,3 +18,84 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + db_path
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite connection profile, applied on every new connection (app/sqlite.py).
+    # WAL lets readers run concurrently with the single writer; synchronous=NORMAL
+    # is durable against application crashes (an OS crash may lose the last commits).
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': -64000,            # 64 MB (negative values are KiB)
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    # Write views failing with SQLITE_BUSY are retried this many times,
+    # sleeping SQLITE_BUSY_BACKOFF * 2**attempt seconds (with jitter) in between
+    SQLITE_BUSY_RETRIES = 5
+    SQLITE_BUSY_BACKOFF = 0.05
+
+    # Group commit (app/group_commit.py): write requests run on one writer thread per
+    # process and are committed together, collecting requests for at most
+    # GROUP_COMMIT_WINDOW_MS and GROUP_COMMIT_MAX_BATCH requests per transaction
+    GROUP_COMMIT = os.environ.get('GROUP_COMMIT', '0') != '0'
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 2))
+    GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 64))
+
+    # Memory-first storage (app/memorydb.py): when set, serve from an in-memory
+    # database loaded from this snapshot file and checkpointed back to it every
+    # SQLITE_CHECKPOINT_INTERVAL seconds and at exit (single worker process only)
+    SQLITE_MEMORY_SNAPSHOT = os.environ.get('SQLITE_MEMORY_SNAPSHOT')
+    SQLITE_CHECKPOINT_INTERVAL = float(os.environ.get('SQLITE_CHECKPOINT_INTERVAL', 60))
+
+    # Per-request SQL/serialization/render timing (Server-Timing header + log line)
+    REQUEST_TIMING = os.environ.get('REQUEST_TIMING', '1') != '0'
+    # Requests slower than this are logged with their SQL statements
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+
+    # Prometheus /metrics endpoint; worker processes share samples through files in METRICS_DIR,
+    # by default one directory per database, so other deployments on the host are not summed in
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(
+        tempfile.gettempdir(), 'petclinic-metrics-' + hashlib.sha1(SQLALCHEMY_DATABASE_URI.encode('utf-8')).hexdigest()[:12])
+
+    # Precompiled Jinja bytecode (flask compile-templates), used when the directory exists
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(basedir, 'jinja_cache')
+
+    # Opt-in: serialized API GET responses shared by the worker processes of a host
+    # (app/shared_cache.py): cache file, total size cap and largest response stored
+    SHARED_CACHE = os.environ.get('SHARED_CACHE', '0') != '0'
+    SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'petclinic-cache.db')
+    SHARED_CACHE_SIZE_MB = int(os.environ.get('SHARED_CACHE_SIZE_MB', 64))
+    SHARED_CACHE_MAX_ENTRY_KB = int(os.environ.get('SHARED_CACHE_MAX_ENTRY_KB', 1024))
+
+    # Rendered {% cache %} fragments kept per process (app/fragments.py)
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 1000))
+
+    # ASGI mode (asgi.py): threads running the Flask views; connection I/O stays on the event loop
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 16))
+
+    # JSON encoder behind jsonify/app.json: 'auto' uses orjson when it is installed,
+    # 'orjson' requires it, 'stdlib' keeps Flask's json module provider
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+    # Columnar analytics snapshots (/api/analytics, needs NumPy): log ORM changes to
+    # owners/pets/visits so snapshots refresh incrementally; the log keeps this many entries.
+    # On by default only where NumPy is installed, so other installs skip the change log
+    ANALYTICS = os.environ.get('ANALYTICS', '1' if importlib.util.find_spec('numpy') else '0') != '0'
+    ANALYTICS_CHANGELOG_SIZE = int(os.environ.get('ANALYTICS_CHANGELOG_SIZE', 100000))
+
+    # Appointments (app/scheduling.py): slot grid from the daily opening time, longest
+    # appointment, opening hours (local time) and longest availability search window
+    APPOINTMENT_SLOT_MINUTES = int(os.environ.get('APPOINTMENT_SLOT_MINUTES', 15))
+    APPOINTMENT_MAX_MINUTES = int(os.environ.get('APPOINTMENT_MAX_MINUTES', 240))
+    APPOINTMENT_HOURS = os.environ.get('APPOINTMENT_HOURS', '08:00-18:00')
+    APPOINTMENT_SEARCH_DAYS = int(os.environ.get('APPOINTMENT_SEARCH_DAYS', 31))
+
+    # REST API list endpoints: default and maximum page size (keyset pagination)
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+    # Rows fetched per batch for ?stream=true list responses
+    API_STREAM_BATCH_SIZE = int(os.environ.get('API_STREAM_BATCH_SIZE', 500))
+    # Maximum number of records accepted by the /bulk create endpoints
+    API_BULK_MAX_ITEMS = int(os.environ.get('API_BULK_MAX_ITEMS', 5000))
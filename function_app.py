@@ -1,18 +1,19 @@
 """
 Azure Functions entry point for Flask PetClinic application.
 Uses the WSGI middleware to run Flask as an Azure Function.
+
+Cold starts are kept short: create_app() only checks the stored schema
+version (app/schema.py), WTForms is imported on first use, and templates
+are loaded from the bytecode cache built by `flask compile-templates`
+(see azure_func_create.sh).
 """
 
 import azure.functions as func
-from app import create_app, db
+from app import create_app
 
-# Create the Flask application
+# Create the Flask application (also creates/upgrades the schema if needed)
 flask_app = create_app()
 
-# Initialize database within app context
-with flask_app.app_context():
-    db.create_all()
-
 # WSGI middleware for Flask
 wsgi_middleware = func.WsgiMiddleware(flask_app.wsgi_app)
 
@@ -1,10 +1,54 @@
 """
 Database initialization script with sample data.
-Run this script to populate the database with sample data.
+Run this script to populate the database with sample data:
+
+    python init_db.py
+
+or with a large, deterministic synthetic clinic for capacity planning:
+
+    python init_db.py --scale 1000000 --seed 42 --workers 4
+
+In scale mode rows are generated in parallel worker processes (each chunk
+from its own seeded RNG, so the result does not depend on the number of
+workers) and inserted with Core executemany in one transaction.
 """
-from datetime import date
-from app import create_app, db
-from app.models import Owner, Pet, PetType, Visit, Vet, Specialty
+import argparse
+import math
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+from app import create_app, db, rollups, schema, search
+from app.models import (
+    DataVersion, Owner, Pet, PetType, Visit, Vet, Specialty, normalize_name, vet_specialties
+)
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+               'Thomas', 'Sarah', 'Carlos', 'Maria', 'Wei', 'Aisha', 'Yuki', 'Olga', 'Sanjay',
+               'Fatima', 'Liam', 'Emma', 'Noah', 'Olivia', 'Mateo', 'Sofia']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson',
+              'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson',
+              'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson', 'Walker',
+              'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores']
+STREETS = ['Main St.', 'Oak Ave.', 'Maple St.', 'Cedar Ln.', 'Lake St.', 'Hill Rd.', 'Park Blvd.',
+           'Pine St.', 'Elm St.', 'Washington Ave.', 'Liberty St.', 'Commerce St.']
+CITIES = ['Madison', 'Sun Prairie', 'McFarland', 'Windsor', 'Monona', 'Waunakee', 'Middleton',
+          'Verona', 'Fitchburg', 'Stoughton', 'Oregon', 'DeForest']
+PET_NAMES = ['Leo', 'Basil', 'Rosy', 'Jewel', 'Iggy', 'George', 'Samantha', 'Max', 'Lucky',
+             'Mulligan', 'Freddy', 'Sly', 'Bella', 'Charlie', 'Luna', 'Daisy', 'Milo', 'Coco',
+             'Rocky', 'Zoe', 'Oscar', 'Pepper', 'Toby', 'Nala']
+PET_TYPES = ['cat', 'dog', 'lizard', 'snake', 'bird', 'hamster']
+PET_TYPE_WEIGHTS = [35, 45, 4, 3, 8, 5]
+SPECIALTIES = ['radiology', 'surgery', 'dentistry', 'cardiology', 'dermatology', 'oncology',
+               'ophthalmology', 'neurology', 'exotics', 'behavior']
+VISIT_REASONS = ['rabies shot', 'annual checkup', 'neutered', 'spayed', 'dental cleaning',
+                 'limping on the left hind leg', 'ear infection', 'vomiting', 'skin rash',
+                 'weight loss', 'broken claw', 'eye discharge', 'allergy follow-up',
+                 'vaccination booster', 'x-ray after fall', 'lump removal']
+
+OWNERS_PER_CHUNK = 10000
 
 
 def init_db():
@@ -13,7 +57,7 @@ def init_db():
     with app.app_context():
         # Drop all tables and recreate
         db.drop_all()
-        db.create_all()
+        schema.upgrade()
         
         # Create pet types
         pet_types = [
@@ -119,8 +163,138 @@ def init_db():
             db.session.add(visit)
         db.session.commit()
         
+        # Invalidate reference data cached by running workers
+        DataVersion.bump('types', 'specialties')
+        db.session.commit()
+        
         print("Database initialized with sample data!")
 
 
+def generate_chunk(seed, chunk, first_owner, owners, visits_per_pet):
+    """
+    Generate owners first_owner..first_owner+owners-1 as plain tuples.
+    Pets reference owners by id and visits reference pets by their index in
+    this chunk; ids for pets and visits are assigned by the caller.
+    """
+    rng = random.Random(seed * 1000003 + chunk)
+    type_ids = range(1, len(PET_TYPES) + 1)
+    today = date(2026, 1, 1)
+    # Log-normal visit counts: most pets visit rarely, a few very often
+    sigma = 1.2
+    mu = math.log(visits_per_pet + 0.5) - sigma * sigma / 2
+
+    owner_rows, pet_rows, visit_rows = [], [], []
+    for owner_id in range(first_owner, first_owner + owners):
+        last_name = rng.choice(LAST_NAMES)
+        owner_rows.append((owner_id, rng.choice(FIRST_NAMES), last_name,
+                           f'{rng.randint(1, 9999)} {rng.choice(STREETS)}', rng.choice(CITIES),
+                           f'608{rng.randint(0, 9999999):07d}'))
+        for _ in range(min(int(rng.paretovariate(2.5)), 8)):
+            birth_date = today - timedelta(days=rng.randint(60, 365 * 18))
+            pet_rows.append((rng.choice(PET_NAMES), birth_date,
+                             rng.choices(type_ids, PET_TYPE_WEIGHTS)[0], owner_id))
+            visits = min(int(rng.lognormvariate(mu, sigma)), 500)
+            age = (today - birth_date).days
+            for _ in range(visits):
+                visit_rows.append((len(pet_rows) - 1, birth_date + timedelta(days=rng.randint(0, age)),
+                                   rng.choice(VISIT_REASONS)))
+    return owner_rows, pet_rows, visit_rows
+
+
+def _generate_chunk(args):
+    return generate_chunk(*args)
+
+
+def insert_chunk(owner_rows, pet_rows, visit_rows, first_pet_id, first_visit_id):
+    """Insert one generated chunk with Core executemany; returns (pets, visits) inserted."""
+    db.session.execute(Owner.__table__.insert(), [
+        {'id': owner_id, 'first_name': first, 'last_name': last, 'last_name_key': normalize_name(last),
+         'address': address, 'city': city, 'telephone': telephone}
+        for owner_id, first, last, address, city, telephone in owner_rows])
+    db.session.execute(Pet.__table__.insert(), [
+        {'id': first_pet_id + index, 'name': name, 'birth_date': birth_date,
+         'type_id': type_id, 'owner_id': owner_id}
+        for index, (name, birth_date, type_id, owner_id) in enumerate(pet_rows)])
+    db.session.execute(Visit.__table__.insert(), [
+        {'id': first_visit_id + index, 'pet_id': first_pet_id + pet_index,
+         'date': visit_date, 'description': description}
+        for index, (pet_index, visit_date, description) in enumerate(visit_rows)])
+    return len(pet_rows), len(visit_rows)
+
+
+def init_scaled_db(owners, seed=42, workers=None, visits_per_pet=7.5):
+    """Recreate the database with `owners` synthetic owners and related rows."""
+    app = create_app()
+    workers = workers or multiprocessing.cpu_count()
+    started = time.perf_counter()
+
+    with app.app_context():
+        db.drop_all()
+        schema.upgrade()
+
+        # Bulk load without secondary indexes or search triggers; rebuilt afterwards
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(db.session.connection())
+        if search.is_available():
+            for name in search.TRIGGERS:
+                db.session.execute(db.text(f'DROP TRIGGER IF EXISTS {name}'))
+        db.session.commit()
+        # A single huge transaction is cheaper with a rollback journal than with WAL;
+        # leaving WAL needs the only open connection, so drop the pooled ones first
+        db.session.close()
+        db.engine.dispose()
+        db.session.connection().exec_driver_sql('PRAGMA journal_mode = DELETE')
+
+        rng = random.Random(seed)
+        db.session.execute(PetType.__table__.insert(), [{'id': i, 'name': name} for i, name in enumerate(PET_TYPES, 1)])
+        db.session.execute(Specialty.__table__.insert(), [{'id': i, 'name': name} for i, name in enumerate(SPECIALTIES, 1)])
+        vet_count = max(6, owners // 1000)
+        db.session.execute(Vet.__table__.insert(), [
+            {'id': i, 'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES)}
+            for i in range(1, vet_count + 1)])
+        db.session.execute(vet_specialties.insert(), [
+            {'vet_id': vet_id, 'specialty_id': specialty_id}
+            for vet_id in range(1, vet_count + 1)
+            for specialty_id in rng.sample(range(1, len(SPECIALTIES) + 1), rng.choice([0, 1, 1, 2, 3]))])
+
+        tasks = [(seed, chunk, first, min(OWNERS_PER_CHUNK, owners - first + 1), visits_per_pet)
+                 for chunk, first in enumerate(range(1, owners + 1, OWNERS_PER_CHUNK))]
+        pet_id = visit_id = 1
+        with multiprocessing.Pool(workers) as pool:
+            # Bounded windows keep at most 2 * workers generated chunks in memory
+            window = 2 * workers
+            for start in range(0, len(tasks), window):
+                for rows in pool.imap(_generate_chunk, tasks[start:start + window]):
+                    pets, visits = insert_chunk(*rows, pet_id, visit_id)
+                    pet_id += pets
+                    visit_id += visits
+                print(f'  {min((start + window) * OWNERS_PER_CHUNK, owners):>10} owners '
+                      f'{pet_id - 1:>10} pets {visit_id - 1:>10} visits '
+                      f'({time.perf_counter() - started:.0f}s)')
+
+        schema.create_indexes(*db.metadata.sorted_tables)
+        search.create_search_index()
+        rollups.rebuild()
+        DataVersion.bump('types', 'specialties')
+        db.session.commit()
+        db.session.connection().exec_driver_sql('PRAGMA journal_mode = WAL')
+
+    print(f'Database initialized with {owners} owners, {pet_id - 1} pets and {visit_id - 1} visits '
+          f'in {time.perf_counter() - started:.0f}s')
+
+
 if __name__ == '__main__':
-    init_db()
+    parser = argparse.ArgumentParser(description='Initialize the PetClinic database.')
+    parser.add_argument('--scale', type=int, metavar='OWNERS',
+                        help='generate a synthetic clinic with this many owners instead of the sample data')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for --scale (default 42)')
+    parser.add_argument('--workers', type=int, help='generator processes for --scale (default: CPU count)')
+    parser.add_argument('--visits-per-pet', type=float, default=7.5,
+                        help='mean visits per pet for --scale (default 7.5, ~10 visits per owner)')
+    args = parser.parse_args()
+
+    if args.scale:
+        init_scaled_db(args.scale, seed=args.seed, workers=args.workers, visits_per_pet=args.visits_per_pet)
+    else:
+        init_db()
@@ -0,0 +1,55 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db  # noqa: E402
+from app.models import Owner, Pet, PetType, Visit  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def seed():
+    """Two pet types, two owners with a pet each, and two visits per pet."""
+    cat, dog = PetType(name='cat'), PetType(name='dog')
+    db.session.add_all([cat, dog])
+    for number, pet_type in ((1, cat), (2, dog)):
+        owner = Owner(first_name=f'First{number}', last_name=f'Last{number}', address='Main St.',
+                      city='Madison', telephone='6085550000')
+        pet = Pet(name=f'Pet{number}', birth_date=date(2020, 1, number), type=pet_type, owner=owner)
+        db.session.add_all([owner, pet,
+                            Visit(pet=pet, date=date(2024, 3, 1), description='checkup'),
+                            Visit(pet=pet, date=date(2024, 4, 1), description='shots')])
+    db.session.commit()
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build a seeded app on a fresh database; keyword arguments override config settings."""
+    def make(**settings):
+        config = type('TestConfig', (Config,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'petclinic.db'),
+            'SHARED_CACHE': False,
+            'SHARED_CACHE_PATH': str(tmp_path / 'cache.db'),
+            'METRICS_ENABLED': False,
+            'WTF_CSRF_ENABLED': False,
+            **settings,
+        })
+        app = create_app(config)
+        with app.app_context():
+            if not db.session.get(Owner, 1):
+                seed()
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
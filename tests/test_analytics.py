@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+
+from app import analytics, db
+from app.models import Pet, RowChange, Visit
+
+
+def visits_by_type(client):
+    response = client.get('/api/analytics/visits?groupBy=type')
+    assert response.status_code == 200
+    return {row['type']['name']: row['count'] for row in response.get_json()}
+
+
+def test_counts_from_built_snapshot(client):
+    pytest.importorskip('numpy')
+    assert visits_by_type(client) == {'cat': 2, 'dog': 2}
+    assert client.get('/api/analytics/pets?groupBy=city').get_json() == [{'city': 'Madison', 'count': 2}]
+
+
+def test_refresh_applies_writes_incrementally(app, client):
+    np = pytest.importorskip('numpy')
+    visits_by_type(client)
+    with app.app_context():
+        built = app.extensions['analytics']['snapshot']
+        db.session.get(Pet, 1).type_id = 2
+        db.session.delete(db.session.get(Visit, 2))
+        db.session.add(Visit(pet_id=2, date=date(2024, 5, 1), description='checkup'))
+        db.session.commit()
+
+    assert visits_by_type(client) == {'dog': 4}
+    with app.app_context():
+        refreshed = app.extensions['analytics']['snapshot']
+        assert refreshed is not built and refreshed.cities is built.cities
+        assert refreshed.seq == db.session.query(db.func.max(RowChange.seq)).scalar() > built.seq
+        rebuilt = analytics.build()
+        for name, columns in rebuilt.tables.items():
+            for column, values in columns.items():
+                assert np.array_equal(refreshed.column(name, column), values)
+
+
+def test_not_available_without_numpy(client, monkeypatch):
+    monkeypatch.setattr(analytics, 'np', None)
+    assert client.get('/api/analytics/visits?groupBy=type').status_code == 501
+
+
+def test_no_change_log_when_off(make_app):
+    app = make_app(ANALYTICS=False)
+    client = app.test_client()
+    assert client.get('/api/analytics/visits').status_code == 501
+    assert client.put('/api/pets/1', json={'name': 'Renamed'}).status_code == 200
+    assert client.delete('/api/visits/1').status_code == 204
+    with app.app_context():
+        assert db.session.query(RowChange).count() == 0
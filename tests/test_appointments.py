@@ -0,0 +1,58 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Vet
+from app.scheduling import OpeningHours
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+@pytest.fixture
+def vet(app):
+    with app.app_context():
+        vet = Vet(first_name='Helen', last_name='Leary')
+        db.session.add(vet)
+        db.session.commit()
+        return vet.id
+
+
+@pytest.fixture
+def appointment(client, vet):
+    response = client.post('/api/appointments', json={
+        'vetId': vet, 'petId': 1, 'start': f'{TOMORROW}T09:00', 'duration': 30, 'description': 'x-ray'})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_fit_gives_up_when_duration_exceeds_opening_hours():
+    hours = OpeningHours('08:00-10:00', 15)
+    start = datetime(2030, 5, 2, 8)
+    assert hours.fit(start, timedelta(minutes=240), start + timedelta(days=31)) is None
+    assert hours.fit(start, timedelta(minutes=60), start + timedelta(days=31)) == start
+
+
+def test_duration_longer_than_opening_hours_is_rejected(make_app, vet):
+    client = make_app(APPOINTMENT_HOURS='08:00-10:00').test_client()
+    response = client.get('/api/appointments/availability', query_string={'vetId': vet, 'duration': 240})
+    assert response.status_code == 400
+    assert 'at most 120' in response.get_json()['error']
+
+
+def test_appointment_shows_visit_updates(client, appointment):
+    etag = client.get(f"/api/appointments/{appointment['id']}").headers['ETag']
+    client.put(f"/api/visits/{appointment['visitId']}", json={'description': 'ultrasound'})
+
+    response = client.get(f"/api/appointments/{appointment['id']}", headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['visit']['description'] == 'ultrasound'
+
+
+def test_visit_with_appointment_keeps_its_date(client, appointment):
+    visit_url = f"/api/visits/{appointment['visitId']}"
+    response = client.put(visit_url, json={'date': str(TOMORROW + timedelta(days=1))})
+    assert response.status_code == 409
+    assert client.get(visit_url).get_json()['date'] == str(TOMORROW)
+
+    assert client.put(visit_url, json={'date': str(TOMORROW), 'description': 'x-ray'}).status_code == 200
@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('a2wsgi')
+
+from app.asgi import ASGIAdapter  # noqa: E402
+
+
+def call(adapter, method, path, body=b'', headers=()):
+    """Run one HTTP request through `adapter`; returns (status, headers, body)."""
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+             'root_path': '', 'headers': [(b'host', b'testserver'), *headers],
+             'client': ('127.0.0.1', 1234), 'server': ('testserver', 80)}
+    # the body arrives in two chunks, as from a slow client
+    messages = [{'type': 'http.request', 'body': body[:5], 'more_body': True},
+                {'type': 'http.request', 'body': body[5:], 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(adapter(scope, receive, send))
+    start = sent[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+
+def test_get_matches_wsgi(app, client):
+    status, headers, body = call(ASGIAdapter(app), 'GET', '/api/owners/1')
+    assert status == 200
+    assert json.loads(body) == client.get('/api/owners/1').get_json()
+
+
+def test_post_reads_chunked_body(app):
+    payload = json.dumps({'petId': 1, 'description': 'checkup', 'date': '2024-05-01'}).encode()
+    status, headers, body = call(ASGIAdapter(app), 'POST', '/api/visits', payload, [
+        (b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())])
+    assert status == 201
+    assert json.loads(body)['description'] == 'checkup'
+
+
+def test_body_over_limit_is_rejected(app):
+    status, headers, body = call(ASGIAdapter(app, max_body=8), 'POST', '/api/visits', b'x' * 16)
+    assert status == 413
+
+
+def test_unsupported_scope_type(app):
+    with pytest.raises(ValueError):
+        asyncio.run(ASGIAdapter(app)({'type': 'websocket'}, None, None))
@@ -0,0 +1,33 @@
+from sqlalchemy import event
+
+from app import db
+
+
+def test_bulk_ids_match_input_order(app, client):
+    records = [{'petId': 1, 'description': f'visit {i}', 'date': '2024-06-01'} for i in range(50)]
+    records.insert(3, {'petId': 1})
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    response = client.post('/api/visits/bulk', json=records)
+
+    assert response.status_code == 207
+    results = response.get_json()
+    assert results[3] == {'index': 3, 'status': 400, 'error': 'description is required'}
+    for record, result in zip(records, results):
+        if result['status'] == 201:
+            assert client.get(f"/api/visits/{result['id']}").get_json()['description'] == record['description']
+    assert len([s for s in statements if s.startswith('INSERT INTO visits')]) == 1
+
+
+def test_bulk_ids_after_deleting_newest_row(client):
+    created = client.post('/api/owners/bulk', json=[
+        {'firstName': f'First{i}', 'lastName': f'Last{i}', 'address': 'Main St.', 'city': 'Madison',
+         'telephone': '6085550000'} for i in range(3)]).get_json()
+    client.delete(f"/api/owners/{created[-1]['id']}")
+
+    created = client.post('/api/owners/bulk', json=[
+        {'firstName': 'Again', 'lastName': f'Last{i}', 'address': 'Main St.', 'city': 'Madison',
+         'telephone': '6085550000'} for i in range(2)]).get_json()
+    for i, result in enumerate(created):
+        assert client.get(f"/api/owners/{result['id']}").get_json()['lastName'] == f'Last{i}'
@@ -0,0 +1,24 @@
+def test_matching_if_none_match_is_not_modified(client):
+    etag = client.get('/api/owners').headers['ETag']
+    response = client.get('/api/owners', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_write_to_pet_changes_owner_list_etag(client):
+    etag = client.get('/api/owners').headers['ETag']
+    assert client.put('/api/pets/1', json={'name': 'Renamed'}).status_code == 200
+    response = client.get('/api/owners', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()[0]['pets'][0]['name'] == 'Renamed'
+
+
+def test_stale_if_match_is_rejected(client):
+    etag = client.get('/api/owners/1').headers['ETag']
+    assert client.put('/api/owners/1', json={'city': 'Monona'}, headers={'If-Match': etag}).status_code == 200
+
+    response = client.put('/api/owners/1', json={'city': 'Verona'}, headers={'If-Match': etag})
+    assert response.status_code == 412
+    assert client.get('/api/owners/1').get_json()['city'] == 'Monona'
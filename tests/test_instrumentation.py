@@ -0,0 +1,28 @@
+import re
+
+
+def queries(response):
+    return int(re.search(r'desc="(\d+) queries"', response.headers['Server-Timing']).group(1))
+
+
+def test_counts_queries(client):
+    assert queries(client.get('/api/owners/1')) > 0
+
+
+def test_counts_queries_of_group_committed_writes(make_app):
+    client = make_app(GROUP_COMMIT=True).test_client()
+    response = client.post('/api/visits', json={'petId': 1, 'description': 'checkup'})
+    assert response.status_code == 201
+    assert queries(response) > 0
+
+
+def test_failed_statement_does_not_leak_start_time(app):
+    from sqlalchemy.exc import OperationalError
+    from app import db
+    with app.app_context():
+        with db.engine.connect() as connection:
+            try:
+                connection.exec_driver_sql('SELECT * FROM no_such_table')
+            except OperationalError:
+                pass
+            assert connection.info.get('query_started') == []
@@ -0,0 +1,53 @@
+import os
+
+
+def test_no_samples_file_until_a_request(make_app, tmp_path):
+    metrics_dir = tmp_path / 'metrics'
+    app = make_app(METRICS_ENABLED=True, METRICS_DIR=str(metrics_dir))
+    assert not metrics_dir.exists()
+
+    client = app.test_client()
+    assert client.get('/api/owners/1').status_code == 200
+    assert os.listdir(metrics_dir) == [f'{os.getpid()}.db']
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'petclinic_requests_total{endpoint="api.get_owner"' in body
+    assert 'petclinic_db_connections_opened_total' in body
+
+
+def test_reference_cache_counted_once_per_request(make_app, tmp_path):
+    app = make_app(METRICS_ENABLED=True, METRICS_DIR=str(tmp_path / 'metrics'))
+    client = app.test_client()
+    assert len(client.get('/api/pets').get_json()) == 2
+    body = client.get('/metrics').get_data(as_text=True)
+    counted = [line for line in body.splitlines() if line.startswith('petclinic_cache_requests_total{cache="types"')]
+    assert sum(float(line.split()[-1]) for line in counted) == 1
+
+
+def test_files_of_exited_processes_are_folded(tmp_path):
+    import json
+    import subprocess
+    import sys
+    from app.metrics import MmapFile, Registry
+
+    def exited_pid():
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        return process.pid
+
+    def key(name, **labels):
+        return json.dumps([name, sorted(labels.items())])
+
+    directory = tmp_path / 'metrics'
+    directory.mkdir()
+    for requests in (2.0, 3.0):
+        store = MmapFile(str(directory / f'{exited_pid()}.db'))
+        store.add(key('petclinic_requests_total', endpoint='api.list_owners'), requests)
+        store.add(key('petclinic_requests_in_flight'), 1.0)
+
+    registry = Registry(str(directory))
+    requests = ('petclinic_requests_total', (('endpoint', 'api.list_owners'),))
+    for _ in range(2):
+        totals = registry.collect()
+        assert totals[requests] == 5.0
+        assert totals.get(('petclinic_requests_in_flight', ()), 0.0) == 0.0
+        assert sorted(os.listdir(directory)) == ['.lock', f'{os.getpid()}.db', 'aggregate.db']
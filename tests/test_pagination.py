@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from app import db
+from app.api.pagination import encode_cursor
+from app.models import Owner
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        # Ties on last_name are ordered by id, across page boundaries
+        for number, last_name in enumerate(['Davis', 'Last1', 'Davis', 'Adams', 'Davis', 'Last1', 'Davis']):
+            db.session.add(Owner(first_name=f'Extra{number}', last_name=last_name, address='Main St.',
+                                 city='Madison', telephone='6085550000'))
+        db.session.commit()
+    return app.test_client()
+
+
+def next_link(response):
+    match = re.match(r'<([^>]+)>; rel="next"', response.headers.get('Link', ''))
+    return match.group(1) if match else None
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4])
+def test_pages_cover_every_owner_once(client, limit):
+    expected = sorted((owner['lastName'], owner['id']) for owner in client.get('/api/owners?limit=100').get_json())
+    assert len(expected) == 9
+
+    seen, url = [], f'/api/owners?limit={limit}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert 0 < len(page) <= limit
+        seen += [(owner['lastName'], owner['id']) for owner in page]
+        url = next_link(response)
+    assert seen == expected
+
+
+@pytest.mark.parametrize('query', [
+    'cursor=not-a-cursor!',
+    'cursor=' + encode_cursor({'lastName': 'Davis'}),
+    'cursor=' + encode_cursor([5]),
+    'limit=ten',
+    'limit=0',
+])
+def test_malformed_cursor_or_limit_is_rejected(client, query):
+    response = client.get('/api/owners?' + query)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,139 @@
+"""visit_counts after each kind of ORM write must equal a full rebuild()."""
+
+from datetime import date
+
+import pytest
+
+from app import db, rollups
+from app.models import Owner, Pet, PetType, Visit, VisitCount
+
+
+def stored_counts():
+    table = VisitCount.__table__
+    return {(row.day, row.type_id): row.count for row in db.session.execute(db.select(table))}
+
+
+def assert_matches_rebuild():
+    db.session.commit()
+    stored = stored_counts()
+    rollups.rebuild()
+    assert stored == stored_counts()
+    db.session.rollback()
+
+
+@pytest.fixture
+def session(app):
+    with app.app_context():
+        rollups.rebuild()
+        db.session.commit()
+        yield db.session
+
+
+def test_new_visit(session):
+    session.add(Visit(pet_id=1, date=date(2024, 5, 1), description='new'))
+    assert_matches_rebuild()
+
+
+def test_new_visit_without_date(session):
+    session.add(Visit(pet_id=1, description='today'))
+    assert_matches_rebuild()
+
+
+def test_new_pet_flushed_with_its_visits(session):
+    owner = session.get(Owner, 1)
+    pet = Pet(name='Fresh', type_id=2, owner=owner)
+    pet.visits.extend([Visit(date=date(2024, 5, 1), description='a'), Visit(date=date(2024, 5, 2), description='b')])
+    session.add(pet)
+    assert_matches_rebuild()
+
+
+def test_new_pet_without_type(session):
+    pet = Pet(name='Untyped', owner_id=1)
+    pet.visits.append(Visit(date=date(2024, 5, 1), description='a'))
+    session.add(pet)
+    assert_matches_rebuild()
+
+
+def test_retyped_pet(session):
+    session.get(Pet, 1).type_id = 2
+    assert_matches_rebuild()
+
+
+def test_pet_type_removed(session):
+    session.get(Pet, 1).type = None
+    assert_matches_rebuild()
+
+
+def test_retyped_pet_with_visit_moved_in_same_flush(session):
+    session.get(Pet, 1).type_id = 2
+    visit = session.get(Pet, 1).visits[0]
+    visit.date = date(2023, 1, 1)
+    assert_matches_rebuild()
+
+
+def test_visit_moved_off_retyped_pet(session):
+    session.get(Pet, 1).type_id = 2
+    session.get(Pet, 1).visits[0].pet_id = 2
+    assert_matches_rebuild()
+
+
+def test_visit_moved_onto_retyped_pet(session):
+    session.get(Pet, 1).type = session.get(PetType, 2)
+    session.get(Pet, 2).visits[0].pet = session.get(Pet, 1)
+    assert_matches_rebuild()
+
+
+def test_visit_deleted_from_retyped_pet(session):
+    session.get(Pet, 1).type_id = 2
+    session.delete(session.get(Pet, 1).visits[0])
+    assert_matches_rebuild()
+
+
+def test_visit_moved_to_other_date(session):
+    session.get(Visit, 1).date = date(2023, 12, 24)
+    assert_matches_rebuild()
+
+
+def test_visit_moved_to_pet_of_other_type(session):
+    session.get(Visit, 1).pet_id = 2
+    assert_matches_rebuild()
+
+
+def test_visit_moved_to_other_pet_and_date(session):
+    visit = session.get(Visit, 1)
+    visit.pet = session.get(Pet, 2)
+    visit.date = date(2023, 12, 24)
+    assert_matches_rebuild()
+
+
+def test_deleted_visit(session):
+    session.delete(session.get(Visit, 1))
+    assert_matches_rebuild()
+
+
+def test_deleted_pet_cascades_to_visits(session):
+    session.delete(session.get(Pet, 1))
+    assert_matches_rebuild()
+
+
+def test_deleted_owner_cascades_to_visits(session):
+    session.delete(session.get(Owner, 2))
+    assert_matches_rebuild()
+
+
+def test_new_pet_type_and_pet_in_one_flush(session):
+    pet_type = PetType(name='lizard')
+    pet = Pet(name='Iggy', type=pet_type, owner_id=1)
+    pet.visits.append(Visit(date=date(2024, 5, 1), description='a'))
+    session.add(pet)
+    assert_matches_rebuild()
+
+
+def test_bulk_visits(app, session):
+    response = app.test_client().post('/api/visits/bulk', json=[
+        {'petId': 1, 'description': 'a', 'date': '2024-05-01'},
+        {'petId': 2, 'description': 'b', 'date': '2024-05-01'},
+        {'petId': 2, 'description': 'c'},
+    ])
+    assert response.status_code == 201
+    assert_matches_rebuild()
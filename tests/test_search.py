@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import event
+
+from app import db, search
+
+
+@pytest.fixture(autouse=True)
+def fts5(app):
+    with app.app_context():
+        if not search.is_available():
+            pytest.skip('SQLite build without FTS5')
+
+
+def test_search(client):
+    results = client.get('/api/search?q=Pet1').get_json()
+    assert {'kind': 'pet', 'id': 1} in [{'kind': r['kind'], 'id': r['id']} for r in results]
+
+
+def test_compile_options_read_once_per_engine(app, client):
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    for _ in range(3):
+        client.get('/api/search?q=checkup')
+    assert not [s for s in statements if 'compile_options' in s]
+
+
+def test_missing_index_is_built(make_app, app):
+    with app.app_context():
+        db.session.execute(db.text('DROP TABLE search_index'))
+        for name in search.TRIGGERS:
+            db.session.execute(db.text(f'DROP TRIGGER {name}'))
+        db.session.commit()
+
+    client = make_app().test_client()
+    response = client.get('/api/search?q=shots')
+    assert response.status_code == 200
+    assert {r['kind'] for r in response.get_json()} == {'visit'}
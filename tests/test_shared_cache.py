@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.fixture
+def workers(make_app):
+    """Two apps (worker processes) sharing one database and one cache file."""
+    return make_app(SHARED_CACHE=True).test_client(), make_app(SHARED_CACHE=True).test_client()
+
+
+def test_response_is_shared_between_workers(workers):
+    first, second = workers
+    body = first.get('/api/owners/1').get_json()
+    assert second.get('/api/owners/1').get_json() == body
+
+
+def test_write_to_included_pet_misses_cache(workers):
+    first, second = workers
+    assert first.get('/api/visits?include=pet').get_json()[0]['pet']['name'] == 'Pet1'
+
+    assert second.put('/api/pets/1', json={'name': 'Renamed'}).status_code == 200
+
+    assert first.get('/api/visits?include=pet').get_json()[0]['pet']['name'] == 'Renamed'
+
+
+def test_write_to_included_owner_misses_cache(workers):
+    first, second = workers
+    assert first.get('/api/pets?include=owner').get_json()[0]['owner']['lastName'] == 'Last1'
+
+    assert second.put('/api/owners/1', json={'lastName': 'Renamed'}).status_code == 200
+
+    assert first.get('/api/pets?include=owner').get_json()[0]['owner']['lastName'] == 'Renamed'
+
+
+def test_write_to_included_pet_changes_etag(client):
+    etag = client.get('/api/visits/1?include=pet').headers['ETag']
+    client.put('/api/pets/1', json={'name': 'Renamed'})
+    assert client.get('/api/visits/1?include=pet', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_disabled_by_default(app):
+    assert 'shared_cache' not in app.extensions
@@ -0,0 +1,29 @@
+import pytest
+
+from app.api.pagination import encode_cursor
+
+
+@pytest.fixture
+def client(make_app):
+    # Batches of one row, so the stream is written in several chunks
+    return make_app(API_STREAM_BATCH_SIZE=1).test_client()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/owners?limit=100',
+    '/api/owners?limit=100&include=pets.visits&fields[owner]=lastName,pets',
+    '/api/pets?limit=100',
+    '/api/pets?limit=100&include=owner,visits',
+    '/api/visits?limit=100',
+    '/api/visits?limit=100&include=pet',
+    # Empty results: a cursor past the last row
+    '/api/owners?limit=100&cursor=' + encode_cursor(['~', 1000]),
+    '/api/pets?limit=100&cursor=' + encode_cursor([1000]),
+    '/api/visits?limit=100&cursor=' + encode_cursor([1000]),
+])
+def test_streamed_body_is_identical(client, url):
+    listed = client.get(url)
+    streamed = client.get(url + '&stream=true')
+    assert listed.status_code == streamed.status_code == 200
+    assert 'Link' not in listed.headers
+    assert streamed.data == listed.data
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from app import db
+from app.models import Specialty, Vet
+
+
+@pytest.fixture
+def vets(app):
+    with app.app_context():
+        surgery = Specialty(name='surgery')
+        db.session.add_all([Vet(first_name='James', last_name='Carter'),
+                            Vet(first_name='Helen', last_name='Leary', specialties=[surgery]),
+                            Vet(first_name='Linda', last_name='Douglas', specialties=[surgery])])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('provider', ['stdlib', 'orjson'])
+def test_precomputed_pages_match_jsonify(make_app, vets, provider):
+    app = make_app(JSON_PROVIDER=provider)
+    client = app.test_client()
+    first = client.get('/api/vets?limit=2')
+    second = client.get(first.headers['Link'].split(';')[0].strip('<>'))
+    with app.test_request_context():
+        expected = app.json.response([{'id': 1, 'firstName': 'James', 'lastName': 'Carter', 'specialties': []},
+                                      {'id': 2, 'firstName': 'Helen', 'lastName': 'Leary',
+                                       'specialties': [{'id': 1, 'name': 'surgery'}]}]).get_data()
+    assert first.data == expected
+    assert first.mimetype == 'application/json'
+    assert [vet['id'] for vet in json.loads(second.data)] == [3]
+    assert 'Link' not in second.headers
+
+
+def test_fieldsets_still_apply(client, vets):
+    assert client.get('/api/vets?fields[vet]=id').get_json() == [{'id': 1}, {'id': 2}, {'id': 3}]
+
+
+def test_directory_follows_writes(client, vets):
+    client.put('/api/vets/1', json={'lastName': 'Renamed'})
+    assert client.get('/api/vets').get_json()[0]['lastName'] == 'Renamed'